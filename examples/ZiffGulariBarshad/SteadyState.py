@@ -164,7 +164,7 @@ ax.set_ylabel("CO$_2$ Production (mol/site)", fontsize=14)
 
 colors = "bgrcmykb"
 for i in range(results.niterations()):
-    for j in range(results.nreplicas()):
+    for j in range(results.nreplicas(i)):
         molecule_numbers = results.children_results(i, j).molecule_numbers(["CO2"], normalize_per_site=True)
 
         ax.plot(molecule_numbers["Time"], molecule_numbers["CO2"], lw=3, color=colors[i], zorder=-i)
@@ -23,6 +23,15 @@ class Cluster:
         """
         Creates a new Cluster object
         """
+        self.__setup(species, site_types, entity_number, neighboring, multiplicity, energy, label, {})
+
+    def __setup(self, species, site_types, entity_number, neighboring, multiplicity, energy, label, cache):
+        """
+        Initializes the object. Intermediate results depending only on the species, e.g., the default entity numbers
+        or the mass, are stored in the dictionary ``cache`` to be shared by other calls.
+        """
+        species_key = tuple(map(id, species))
+
         self.species = species  # e.g. [ Species("H*",1), Species("H*",1) ]
         self.sites = len([sp for sp in species if sp == Species.UNSPECIFIED or sp.is_adsorbed()])
 
@@ -42,7 +51,9 @@ class Cluster:
 
         self.entity_number = entity_number
         if entity_number is None:
-            self.entity_number = SpeciesList.default_entity_numbers(self.sites, self.species)
+            if ("entity_number", species_key) not in cache:
+                cache[("entity_number", species_key)] = SpeciesList.default_entity_numbers(self.sites, self.species)
+            self.entity_number = list(cache[("entity_number", species_key)])
 
         # TODO Make a way to check denticity consistency
         # if( sum([s.denticity for s in self.species]) != self.sites ):
@@ -50,24 +61,78 @@ class Cluster:
         # msg += "Inconsistent dimensions for species or site_types\n"
         # raise NameError(msg)
 
+        # The label is created the first time it is requested
         self.__userLabel = label
         self.__label = None
-        self.__updateLabel()
 
-        self.__mass = 0.0
-        self.__composition = {}
+        if ("mass", species_key) not in cache:
+            mass = 0.0
+            composition = {}
 
-        for item in species:
-            if item != Species.UNSPECIFIED:
-                self.__mass += item.mass()
-            else:
-                continue
-
-            for symbol, n in item.composition().items():
-                if not symbol in self.__composition:
-                    self.__composition[symbol] = n
+            for item in species:
+                if item != Species.UNSPECIFIED:
+                    mass += item.mass()
                 else:
-                    self.__composition[symbol] += n
+                    continue
+
+                for symbol, n in item.composition().items():
+                    if not symbol in composition:
+                        composition[symbol] = n
+                    else:
+                        composition[symbol] += n
+
+            cache[("mass", species_key)] = (mass, composition)
+
+        self.__mass = cache[("mass", species_key)][0]
+        self.__composition = dict(cache[("mass", species_key)][1])
+
+    @classmethod
+    def from_columns(
+        cls, species, site_types=None, entity_number=None, neighboring=None, multiplicity=None, energy=None, label=None
+    ):
+        """
+        Creates a list of Cluster objects from column-oriented inputs. All parameters have the same meaning as in the
+        constructor, but they are given as lists with one element per cluster. Optional parameters can also be None, or
+        contain None elements, to use the default values, and ``multiplicity`` and ``energy`` can be given as a single
+        value shared by all clusters. The intermediate results depending only on the species are computed once for
+        all clusters sharing them.
+        """
+        n = len(species)
+        scalars = ["multiplicity", "energy"]
+
+        columns = {
+            "species": species,
+            "site_types": site_types,
+            "entity_number": entity_number,
+            "neighboring": neighboring,
+            "multiplicity": multiplicity,
+            "energy": energy,
+            "label": label,
+        }
+
+        for name, values in columns.items():
+            if values is None or (name in scalars and not hasattr(values, "__len__")):
+                columns[name] = n * [values]
+            elif len(values) != n:
+                msg = "\n### ERROR ### Cluster.from_columns.\n"
+                msg += "              Inconsistent number of elements for " + name + "\n"
+                raise NameError(msg)
+
+        defaults = {"multiplicity": 1, "energy": 0.000}
+
+        cache = {}
+        output = []
+        for values in zip(*columns.values()):
+            parameters = dict(zip(columns.keys(), values))
+            for key, value in defaults.items():
+                if parameters[key] is None:
+                    parameters[key] = value
+
+            cl = cls.__new__(cls)
+            cl.__setup(*parameters.values(), cache)
+            output.append(cl)
+
+        return output
 
     def __len__(self):
         """
@@ -75,13 +140,27 @@ class Cluster:
         """
         return len(self.species)
 
+    def __setattr__(self, name, value):
+        """
+        Sets the attribute ``name``, and counts the change (see ``_version()``).
+        """
+        object.__setattr__(self, name, value)
+        object.__setattr__(self, "_Cluster__version", self._version() + 1)
+
+    def _version(self):
+        """
+        Returns the number of attribute assignments done on the object. It is used to detect changes, e.g., to
+        invalidate compiled views. Changes done in place, like ``obj.site_types[0] = "fcc"``, are not detected.
+        """
+        return self.__dict__.get("_Cluster__version", 0)
+
     def __eq__(self, other):
         """
         Returns True if both objects have the same label. Otherwise returns False
 
         *   ``other`` --
         """
-        if self.__label == other.__label:
+        if self.label() == other.label():
             return True
         else:
             return False
@@ -90,39 +169,42 @@ class Cluster:
         """
         Returns a hash based on the label
         """
-        return hash(self.__label)
+        return hash(self.label())
 
     def __updateLabel(self):
         """
         Updates the attribute 'label'
         """
         if self.__userLabel is not None:
-            self.__label = self.__userLabel
+            object.__setattr__(self, "_Cluster__label", self.__userLabel)
             return
 
-        self.__label = ""
+        label = ""
         for i in range(len(self.species)):
             if self.species[i] != Species.UNSPECIFIED:
-                self.__label += self.species[i].symbol
+                label += self.species[i].symbol
             else:
-                self.__label += "&"
+                label += "&"
 
             if len(self.entity_number) > 1:
-                self.__label += str(self.entity_number[i] + 1)
-            self.__label += str(self.site_types[i])
+                label += str(self.entity_number[i] + 1)
+            label += str(self.site_types[i])
 
         if self.neighboring is not None:
             if len(self.neighboring) > 0:
-                self.__label += ":"
+                label += ":"
 
         # For neighboring nodes are sorted
         if self.neighboring is not None:
             for i in range(len(self.neighboring)):
                 lNeighboring = list(self.neighboring[i])
                 lNeighboring.sort()
-                self.__label += str(tuple(lNeighboring)).replace(" ", "")
+                label += str(tuple(lNeighboring)).replace(" ", "")
                 if i != len(self.neighboring) - 1:
-                    self.__label += ","
+                    label += ","
+
+        # The label is a cached value, so it is not counted as a change (see ``_version()``)
+        object.__setattr__(self, "_Cluster__label", label)
 
     def label(self):
         """
@@ -137,7 +219,7 @@ class Cluster:
         """
         Translates the object to a string
         """
-        output = "cluster " + self.__label + "\n"
+        output = "cluster " + self.label() + "\n"
 
         if self.sites != 0:
             output += "  sites " + str(self.sites) + "\n"
@@ -251,4 +333,4 @@ class Cluster:
                 if self.site_types[j] == site_types_old[i]:
                     self.site_types[j] = site_types_new[i]
 
-        self.__updateLabel()
+        self.__label = None
@@ -1,6 +1,12 @@
+import io
 import os
+import hashlib
+import bisect
 from collections import UserList
 
+import numpy
+
+from .Species import *
 from .SpeciesList import *
 from .Cluster import *
 
@@ -31,9 +37,14 @@ class ClusterExpansion(UserList):
         copy_data = self.data
 
         self.data = []
+        self.__index = None
+        self.__version = 0
+        self.__species = None
         for cl in copy_data:
-            if cl not in self.data:
-                self.data.append(cl)
+            self.append(cl)
+
+        self.__compiled = None
+        self.__input = None
 
     def __fromZacrosFile(self, fileName, surface_species):
         """
@@ -48,6 +59,8 @@ class ClusterExpansion(UserList):
             line.split("#")[0] for line in file_content if line.split("#")[0].strip()
         ]  # Removes empty lines and comments
 
+        all_parameters = []
+
         nline = 0
         while nline < len(file_content):
             tokens = file_content[nline].split()
@@ -151,10 +164,16 @@ class ClusterExpansion(UserList):
 
                 del parameters["sites"]
                 del parameters["lattice_state"]
-                self.append(Cluster(**parameters))
+                all_parameters.append(parameters)
 
             nline += 1
 
+        # All items are created at once, sharing the intermediate results
+        keys = {key: None for parameters in all_parameters for key in parameters}
+        columns = {key: [parameters.get(key) for parameters in all_parameters] for key in keys}
+        if len(all_parameters) > 0:
+            self.extend(Cluster.from_columns(**columns))
+
     def append(self, item):
         """
         Appends a cluster to the end of the sequence. Appends a cluster to the end of the sequence. Notice that duplicate items are not accepted. In case of duplicity, the new cluster is just ignored.
@@ -177,46 +196,213 @@ class ClusterExpansion(UserList):
         *   ``i`` -- The index where ``item`` needs to be inserted.
         *   ``item`` --  The cluster to be inserted in the list.
         """
-        for cl in self:
-            if cl.label() == item.label():
-                return
+        index = self.__label_index()
+        if item.label() in index:
+            return
+
+        if i >= len(self):
+            index[item.label()] = len(self)
+            self.__index[2] = None
+            self.__version = getattr(self, "_ClusterExpansion__version", 0) + 1
+        else:
+            self.__changed()
 
         super(ClusterExpansion, self).insert(i, item)
 
+    def __label_index(self):
+        """
+        Returns the dictionary label -> position of the clusters. It is kept up to date by the methods modifying the
+        list, but not if the labels are changed directly on the clusters.
+        """
+        index = getattr(self, "_ClusterExpansion__index", None)
+        if index is None or index[0] is not self.data:
+            self.__index = [self.data, {cl.label(): i for i, cl in enumerate(self.data)}, None]
+
+        return self.__index[1]
+
+    def __changed(self):
+        """
+        Drops the label index and increases the version counter. It is called by the methods modifying the list, except
+        the ones removing a single item (see ``__pop()``).
+        """
+        self.__index = None
+        self.__version = getattr(self, "_ClusterExpansion__version", 0) + 1
+
+    def __pop(self, i):
+        """
+        Removes and returns the cluster at the i-th index. The label index is updated in place, so only the positions
+        of the following clusters are visited.
+        """
+        i = range(len(self.data))[i]
+        item = self.data.pop(i)
+
+        index = getattr(self, "_ClusterExpansion__index", None)
+        if index is not None and index[0] is self.data:
+            label = item.label()
+            if index[1].get(label) == i:
+                del index[1][label]
+                if index[2] is not None:
+                    del index[2][bisect.bisect_left(index[2], label)]
+
+            for j in range(i, len(self.data)):
+                index[1][self.data[j].label()] = j
+
+        self.__version = getattr(self, "_ClusterExpansion__version", 0) + 1
+
+        return item
+
+    def __species_lists(self):
+        """
+        Returns the gas and surface species lists. They are cached, and rebuilt only if the version counter of the
+        cluster expansion, or of any of its clusters, has changed.
+        """
+        key = (getattr(self, "_ClusterExpansion__version", 0), sum(cl._version() for cl in self.data))
+
+        cached = getattr(self, "_ClusterExpansion__species", None)
+        if cached is None or cached[0] != key:
+            species = [sp for cl in self.data for sp in cl.species if sp != Species.UNSPECIFIED]
+            gas_species = SpeciesList(list(dict.fromkeys(sp for sp in species if sp.is_gas())))
+            surface_species = SpeciesList(list(dict.fromkeys(sp for sp in species if sp.is_adsorbed())))
+            self.__species = cached = (key, gas_species, surface_species)
+
+        return cached[1], cached[2]
+
+    def __setitem__(self, i, item):
+        """
+        Sets the cluster at the i-th index
+        """
+        super(ClusterExpansion, self).__setitem__(i, item)
+        self.__changed()
+
+    def __delitem__(self, i):
+        """
+        Removes the cluster at the i-th index
+        """
+        if isinstance(i, slice):
+            super(ClusterExpansion, self).__delitem__(i)
+            self.__changed()
+        else:
+            self.__pop(i)
+
+    def __iadd__(self, other):
+        """
+        Extend sequence by appending elements from the iterable
+        """
+        self.extend(other)
+        return self
+
+    def __imul__(self, n):
+        """
+        Duplicates are not accepted, so the clusters are kept unchanged unless ``n`` is zero or negative
+        """
+        if n <= 0:
+            self.clear()
+        return self
+
+    def pop(self, i=-1):
+        """
+        Removes and returns the cluster at the i-th index
+        """
+        return self.__pop(i)
+
+    def remove(self, item):
+        """
+        Removes the first occurrence of ``item``
+        """
+        self.__pop(self.data.index(item))
+
+    def clear(self):
+        """
+        Removes all clusters
+        """
+        super(ClusterExpansion, self).clear()
+        self.__changed()
+
+    def reverse(self):
+        """
+        Reverses the order of the clusters
+        """
+        super(ClusterExpansion, self).reverse()
+        self.__changed()
+
+    def sort(self, /, *args, **kwds):
+        """
+        Sorts the clusters
+        """
+        super(ClusterExpansion, self).sort(*args, **kwds)
+        self.__changed()
+
     def __str__(self):
         """
         Translates the object to a string in Zacros input files format.
         """
-        output = "energetics\n\n"
+        return self.__cached_input()[0]
 
-        for cl in self:
-            output += str(cl) + "\n\n"
+    def __input_key(self):
+        """
+        Returns the values the Zacros input of the cluster expansion depends on: the version counter of the list, which
+        changes if any cluster is added, removed or replaced, and the id and version counter of every cluster.
+        """
+        return (getattr(self, "_ClusterExpansion__version", 0), [(id(cl), cl._version()) for cl in self])
 
-        output += "end_energetics"
+    def __cached_input(self):
+        """
+        Returns the Zacros input of the cluster expansion and its SHA-256 hash. Both are cached, and rebuilt only if the
+        list of clusters changes or any of them is modified by assigning its attributes.
+        """
+        key = self.__input_key()
 
-        return output
+        cached = getattr(self, "_ClusterExpansion__input", None)
+        if cached is None or cached[0] != key:
+            output = io.StringIO()
+            self.__write(output)
+            output = output.getvalue()
 
-    def gas_species(self):
-        """Returns the gas species."""
-        species = []
+            cached = (key, output, hashlib.sha256(output.encode()).hexdigest())
+            self.__input = cached
 
-        for cl in self:
-            species.extend(cl.gas_species())
+        return cached[1:]
 
-        species = SpeciesList(species)
-        species.remove_duplicates()
-        return species
+    def fingerprint(self):
+        """
+        Returns the SHA-256 hash of the Zacros input of the cluster expansion. It is cached, so it can be used to
+        compare cluster expansions without serializing them again.
+        """
+        return self.__cached_input()[1]
 
-    def surface_species(self):
-        """Returns the surface species."""
-        species = []
+    def write_to(self, fileobj):
+        """
+        Writes the cluster expansion to ``fileobj`` in Zacros input files format. Clusters are written one at a time.
+        If the cluster expansion was already serialized, e.g., by ``fingerprint()``, the cached content is written
+        instead.
+
+        *   ``fileobj`` -- File-like object with a ``write()`` method, e.g., the file returned by ``open('energetics_input.dat','w')``.
+        """
+        cached = getattr(self, "_ClusterExpansion__input", None)
+
+        if cached is not None and cached[0] == self.__input_key():
+            fileobj.write(cached[1])
+        else:
+            self.__write(fileobj)
+
+    def __write(self, fileobj):
+        """
+        Writes the cluster expansion to ``fileobj``. See ``write_to()``.
+        """
+        fileobj.write("energetics\n\n")
 
         for cl in self:
-            species.extend(cl.surface_species())
+            fileobj.write(str(cl) + "\n\n")
 
-        species = SpeciesList(species)
-        species.remove_duplicates()
-        return species
+        fileobj.write("end_energetics")
+
+    def gas_species(self):
+        """Returns the gas species."""
+        return SpeciesList(self.__species_lists()[0])
+
+    def surface_species(self):
+        """Returns the surface species."""
+        return SpeciesList(self.__species_lists()[1])
 
     def site_types_set(self):
         """
@@ -240,14 +426,128 @@ class ClusterExpansion(UserList):
         for cl in self:
             cl.replace_site_types(site_types_old, site_types_new)
 
-    def find(self, label):
+        self.__changed()
+
+    def compile(self):
+        """
+        Returns a CompiledClusterExpansion object, a frozen view of the cluster expansion where species, site types, and
+        graph patterns are replaced by integer indices, and the energies are stored as numpy arrays. The view is cached,
+        and it is only rebuilt if the list of clusters changes or any of them is modified by assigning its attributes,
+        e.g., ``cluster_expansion[0].energy = -1.0``.
+        """
+        key = (getattr(self, "_ClusterExpansion__version", 0), [(id(cl), cl._version()) for cl in self])
+
+        compiled = getattr(self, "_ClusterExpansion__compiled", None)
+        if compiled is not None and compiled._key == key:
+            return compiled
+
+        self.__compiled = CompiledClusterExpansion(self, key)
+        return self.__compiled
+
+    def find(self, label, prefix=False):
         """
         Returns the list of clusters where the substring ``label`` is found in the clusters' label
+
+        *   ``label`` -- Substring to look for.
+        *   ``prefix`` -- If True, only labels starting with ``label`` are considered. They are located by binary search on the sorted labels.
         """
-        return [cl for cl in self if cl.label().find(label) != -1]
+        if not prefix:
+            return [cl for cl in self if cl.label().find(label) != -1]
+
+        index = self.__label_index()
+        if self.__index[2] is None:
+            self.__index[2] = sorted(index)
+        labels = self.__index[2]
+
+        positions = []
+        for l in labels[bisect.bisect_left(labels, label) :]:
+            if not l.startswith(label):
+                break
+            positions.append(index[l])
+
+        return [self.data[i] for i in sorted(positions)]
 
     def find_one(self, label):
         """
         Returns the first cluster where the substring ``label`` is found in the cluster's label
         """
         return next(cl for cl in self if cl.label().find(label) != -1)
+
+    def find_exact(self, label):
+        """
+        Returns the cluster with label ``label``, or None if it is not found. The lookup does not depend on the
+        number of clusters.
+        """
+        i = self.__label_index().get(label)
+        if i is not None and self.data[i].label() != label:
+            self.__index = None
+            i = self.__label_index().get(label)
+
+        return self.data[i] if i is not None else None
+
+
+class CompiledClusterExpansion:
+    """
+    Frozen, integer-indexed view of a ClusterExpansion. It is created with ``ClusterExpansion.compile()``. All arrays
+    are read-only. Per-site quantities of all clusters are concatenated, and the sites of the cluster ``i`` are in the
+    slice ``site_offsets[i]:site_offsets[i+1]``. Similarly, the neighboring pairs of the cluster ``i`` are
+    ``neighbor_pairs[neighbor_offsets[i]:neighbor_offsets[i+1]]``, with indices relative to the first site of the
+    cluster.
+
+    *   ``labels`` -- Tuple with the labels of the clusters.
+    *   ``surface_species`` -- SpeciesList with the surface species. It defines the ids of ``species``.
+    *   ``site_types`` -- Tuple with the site types. It defines the ids of ``site_type_ids``.
+    *   ``multiplicity``, ``energy`` -- Arrays with one element per cluster.
+    *   ``site_offsets``, ``site_type_ids``, ``species``, ``entity_number`` -- Per-site arrays. Unspecified species have id -1.
+    *   ``neighbor_offsets``, ``neighbor_pairs`` -- Neighboring pairs.
+    """
+
+    def __init__(self, cluster_expansion, key):
+        self._key = key
+        self._clusters = tuple(cluster_expansion)
+
+        self.labels = tuple(cl.label() for cl in cluster_expansion)
+
+        self.surface_species = cluster_expansion.surface_species()
+        species_ids = {sp.symbol: i for i, sp in enumerate(self.surface_species)}
+
+        site_types = set()
+        for cl in cluster_expansion:
+            site_types.update(cl.site_types)
+        self.site_types = tuple(sorted(site_types, key=lambda st: (type(st) == str, st)))
+        site_type_ids = {st: i for i, st in enumerate(self.site_types)}
+
+        self.multiplicity = numpy.array([cl.multiplicity for cl in cluster_expansion], dtype=numpy.int64)
+        self.energy = numpy.array([cl.energy for cl in cluster_expansion], dtype=float)
+
+        nsites = [cl.sites for cl in cluster_expansion]
+        neighboring = [cl.neighboring if cl.neighboring is not None else [] for cl in cluster_expansion]
+
+        self.site_offsets = numpy.concatenate(([0], numpy.cumsum(nsites, dtype=numpy.int64)))
+        self.neighbor_offsets = numpy.concatenate(([0], numpy.cumsum([len(n) for n in neighboring], dtype=numpy.int64)))
+
+        def per_site(values):
+            return numpy.array([v for cl in cluster_expansion for v in values(cl)], dtype=numpy.int64)
+
+        self.site_type_ids = per_site(lambda cl: [site_type_ids[st] for st in cl.site_types])
+        self.species = per_site(
+            lambda cl: [
+                species_ids[sp.symbol] if sp != Species.UNSPECIFIED else -1
+                for sp in cl.species
+                if sp == Species.UNSPECIFIED or sp.is_adsorbed()
+            ]
+        )
+        self.entity_number = per_site(lambda cl: cl.entity_number)
+        self.neighbor_pairs = numpy.array(
+            [pair for pairs in neighboring for pair in pairs], dtype=numpy.int64
+        ).reshape(-1, 2)
+
+        for value in vars(self).values():
+            if isinstance(value, numpy.ndarray):
+                value.setflags(write=False)
+
+    def __len__(self):
+        """
+        Returns the number of clusters
+        """
+        return len(self.labels)
@@ -0,0 +1,154 @@
+"""Module containing the ClusterExpansionEvaluator class."""
+
+import numpy
+
+from .Species import *
+from .Lattice import *
+from .LatticeState import *
+
+__all__ = ["ClusterExpansionEvaluator"]
+
+
+class ClusterExpansionEvaluator:
+    """
+    Creates a new ClusterExpansionEvaluator object, which computes the energy of lattice states with a cluster expansion
+    the same way Zacros does, i.e., the ``Energy`` column of the 'specnum_output.txt' file. The graph pattern of each
+    cluster is compiled once into the index of all its embeddings on the lattice. Then, the energy of a LatticeState, or
+    of a whole trajectory, is obtained by looking up the species on these embeddings with array operations. Every
+    cluster contributes ``energy/multiplicity`` for each embedding matching the lattice state. The order of the sites
+    inside multidentate species is not checked.
+
+    *   ``cluster_expansion`` -- ClusterExpansion to evaluate.
+    *   ``lattice`` -- Lattice of the states to evaluate.
+    *   ``surface_species`` -- Surface species. It determines the meaning of the species indices when the states are given as arrays (see ``LatticeState.to_arrays()``). By default, it is taken from the first LatticeState evaluated.
+    """
+
+    def __init__(self, cluster_expansion, lattice, surface_species=None):
+        self.cluster_expansion = cluster_expansion
+        self.lattice = lattice
+        self.surface_species = surface_species
+
+        self.__patterns = [self.__compile(cluster) for cluster in cluster_expansion]
+
+    def __compile(self, cluster):
+        """
+        Returns the embeddings of the graph pattern of ``cluster`` on the lattice, together with the species symbol
+        (None for unspecified) and the entity number of every pattern site in the same order as the columns.
+        """
+        nsites = cluster.sites
+        if nsites == 0:
+            return numpy.empty((1, 0), dtype=numpy.int64), [], []
+
+        site_type_names = sorted(set(self.lattice.site_types))
+        site_types = [site_type_names[st] if type(st) == int else st for st in cluster.site_types]
+
+        neighboring = cluster.neighboring if cluster.neighboring is not None else []
+        order, neighboring = Lattice._pattern_order(nsites, neighboring)
+
+        if order is None:
+            msg = "\n### ERROR ### ClusterExpansionEvaluator.\n"
+            msg += "              The sites of the cluster " + cluster.label() + " are not connected\n"
+            raise Exception(msg)
+
+        embeddings = self.lattice._pattern_embeddings(site_types, order, neighboring)
+
+        symbols = [cluster.species[i].symbol if cluster.species[i] != Species.UNSPECIFIED else None for i in order]
+        entities = [cluster.entity_number[i] for i in order]
+
+        return embeddings, symbols, entities
+
+    def __arrays(self, states, entity_idx):
+        """
+        Returns the species and entities arrays with shape ``(n_snapshots, n_sites)`` and whether ``states`` was a
+        single snapshot.
+        """
+        single = isinstance(states, LatticeState) or (not isinstance(states, list) and numpy.ndim(states) == 1)
+
+        if single:
+            states = [states]
+
+        if len(states) > 0 and isinstance(states[0], LatticeState):
+            if self.surface_species is None:
+                self.surface_species = states[0].surface_species
+
+            arrays = [state.to_arrays() for state in states]
+            species = numpy.array([item[0] for item in arrays], dtype=numpy.int64).reshape(len(states), -1)
+            entities = numpy.array([item[1] for item in arrays], dtype=numpy.int64).reshape(len(states), -1)
+        else:
+            species = numpy.asarray(states, dtype=numpy.int64)
+            if entity_idx is None:
+                entities = numpy.where(species >= 0, numpy.arange(species.shape[1]), -1)
+            else:
+                entities = numpy.asarray(entity_idx, dtype=numpy.int64).reshape(species.shape)
+
+        return species, entities, single
+
+    def __species_id(self, symbol):
+        """
+        Returns the position of the species ``symbol`` in ``surface_species``, -1 for the empty site, or None if the
+        species is not present.
+        """
+        if symbol == "*":
+            return -1
+
+        if self.surface_species is None:
+            msg = "\n### ERROR ### ClusterExpansionEvaluator.\n"
+            msg += "              surface_species is required to evaluate states given as arrays\n"
+            raise Exception(msg)
+
+        for i, sp in enumerate(self.surface_species):
+            if sp.symbol == symbol:
+                return i
+
+        return None
+
+    def cluster_counts(self, states, entity_idx=None):
+        """
+        Returns the number of embeddings of each cluster matching the lattice states, as an integer array with one
+        element per cluster in ``cluster_expansion``.
+
+        *   ``states`` -- LatticeState, list of LatticeState, or array with the position in ``surface_species`` of the species adsorbed on each site (-1 for empty sites), with shape ``(n_sites)`` or ``(n_snapshots, n_sites)``. Results for lists and 2D arrays have an additional leading dimension for the snapshots.
+        *   ``entity_idx`` -- If ``states`` is an array, the array with the entity adsorbed on each site (see ``LatticeState.to_arrays()``). By default, each filled site is a different entity.
+        """
+        species, entities, single = self.__arrays(states, entity_idx)
+        nframes = species.shape[0]
+
+        counts = numpy.zeros((nframes, len(self.__patterns)), dtype=numpy.int64)
+        for ic, (embeddings, symbols, entity_numbers) in enumerate(self.__patterns):
+            match = numpy.ones((nframes, len(embeddings)), dtype=bool)
+
+            for i, symbol in enumerate(symbols):
+                if symbol is None:
+                    continue
+
+                species_id = self.__species_id(symbol)
+                if species_id is None:
+                    match[:] = False
+                    break
+
+                match &= species[:, embeddings[:, i]] == species_id
+
+            # Sites of the same entity in the pattern should belong to the same adsorbate, and vice versa
+            for i in range(len(symbols)):
+                for j in range(i + 1, len(symbols)):
+                    if symbols[i] in [None, "*"] or symbols[j] in [None, "*"]:
+                        continue
+
+                    same = entities[:, embeddings[:, i]] == entities[:, embeddings[:, j]]
+                    match &= same if entity_numbers[i] == entity_numbers[j] else ~same
+
+            counts[:, ic] = match.sum(axis=1)
+
+        return counts[0] if single else counts
+
+    def energy(self, states, entity_idx=None):
+        """
+        Returns the energy of the lattice states in eV.
+
+        *   ``states`` -- LatticeState, list of LatticeState, or array with the position in ``surface_species`` of the species adsorbed on each site (-1 for empty sites), with shape ``(n_sites)`` or ``(n_snapshots, n_sites)``. Results for lists and 2D arrays are arrays with one element per snapshot.
+        *   ``entity_idx`` -- If ``states`` is an array, the array with the entity adsorbed on each site (see ``LatticeState.to_arrays()``). By default, each filled site is a different entity.
+        """
+        compiled = self.cluster_expansion.compile()
+        weights = compiled.energy / compiled.multiplicity
+
+        return self.cluster_counts(states, entity_idx) @ weights
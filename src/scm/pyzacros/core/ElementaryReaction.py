@@ -37,7 +37,42 @@ class ElementaryReaction:
         prox_factor=None,
         label=None,
     ):
+        self.__setup(
+            initial,
+            final,
+            site_types,
+            initial_entity_number,
+            final_entity_number,
+            neighboring,
+            reversible,
+            pre_expon,
+            pe_ratio,
+            activation_energy,
+            prox_factor,
+            label,
+            {},
+        )
 
+    def __setup(
+        self,
+        initial,
+        final,
+        site_types,
+        initial_entity_number,
+        final_entity_number,
+        neighboring,
+        reversible,
+        pre_expon,
+        pe_ratio,
+        activation_energy,
+        prox_factor,
+        label,
+        cache,
+    ):
+        """
+        Initializes the object. Intermediate results depending only on the species, e.g., the default entity numbers
+        or the masses, are stored in the dictionary ``cache`` to be shared by other calls.
+        """
         if (type(initial) != SpeciesList and type(initial) != list) or (
             type(final) != SpeciesList and type(final) != list
         ):
@@ -45,13 +80,25 @@ class ElementaryReaction:
             msg += "              Inconsistent type for initial or final\n"
             raise NameError(msg)
 
-        sites_initial = len([sp for sp in initial if sp.is_adsorbed()])
-        sites_final = len([sp for sp in final if sp.is_adsorbed()])
+        def split(species):
+            key = ("split", tuple(map(id, species)))
+            if key not in cache:
+                cache[key] = (
+                    SpeciesList([sp for sp in species if sp.is_gas()]),
+                    SpeciesList([sp for sp in species if sp.is_adsorbed()]),
+                )
+            return cache[key]
+
+        initial_gas, initial_adsorbed = split(initial)
+        final_gas, final_adsorbed = split(final)
+
+        sites_initial = len(initial_adsorbed)
+        sites_final = len(final_adsorbed)
         if sites_initial != sites_final:
             msg = "\n### ERROR ### ElementaryReaction.__init__.\n"
             msg += "Inconsistent number of surface sites between initial and final\n"
-            msg += "sites_initial=" + str([sp.symbol for sp in initial if sp.is_adsorbed()]) + "\n"
-            msg += "sites_final=" + str([sp.symbol for sp in final if sp.is_adsorbed()]) + "\n"
+            msg += "sites_initial=" + str([sp.symbol for sp in initial_adsorbed]) + "\n"
+            msg += "sites_final=" + str([sp.symbol for sp in final_adsorbed]) + "\n"
             raise NameError(msg)
         self.sites = sites_initial
 
@@ -67,25 +114,31 @@ class ElementaryReaction:
 
         self.neighboring = neighboring  # e.g. [ (0,1) ]
 
+        def default_entity_numbers(adsorbed):
+            key = ("entity_number", tuple(map(id, adsorbed)))
+            if key not in cache:
+                cache[key] = SpeciesList.default_entity_numbers(self.sites, adsorbed)
+            return list(cache[key])
+
         self.initial = initial
         if type(initial) == list:
             self.initial = SpeciesList(initial)
-        self.__initial_gas = SpeciesList([sp for sp in self.initial if sp.is_gas()])
-        self.__initial_adsorbed = SpeciesList([sp for sp in self.initial if sp.is_adsorbed()])
+        self.__initial_gas = initial_gas
+        self.__initial_adsorbed = initial_adsorbed
 
         self.initial_entity_number = initial_entity_number
         if initial_entity_number is None:
-            self.initial_entity_number = SpeciesList.default_entity_numbers(self.sites, self.__initial_adsorbed)
+            self.initial_entity_number = default_entity_numbers(initial_adsorbed)
 
         self.final = final
         if type(final) == list:
             self.final = SpeciesList(final)
-        self.__final_gas = SpeciesList([sp for sp in self.final if sp.is_gas()])
-        self.__final_adsorbed = SpeciesList([sp for sp in self.final if sp.is_adsorbed()])
+        self.__final_gas = final_gas
+        self.__final_adsorbed = final_adsorbed
 
         self.final_entity_number = final_entity_number
         if final_entity_number is None:
-            self.final_entity_number = SpeciesList.default_entity_numbers(self.sites, self.__final_adsorbed)
+            self.final_entity_number = default_entity_numbers(final_adsorbed)
 
         self.reversible = reversible
         self.pre_expon = pre_expon
@@ -99,42 +152,114 @@ class ElementaryReaction:
         # msg += "              Inconsistent dimensions for sites, initial or final\n"
         # raise NameError(msg)
 
+        def mass(species, entity_number):
+            key = ("mass", tuple(map(id, species)), tuple(entity_number))
+            if key not in cache:
+                cache[key] = species.mass(entity_number)
+            return cache[key]
+
+        initial_mass = mass(self.initial, self.initial_entity_number)
+        final_mass = mass(self.final, self.final_entity_number)
+
         # If adsorbed species have 'mass==0.0', the user didn't use a chemical formula for its symbol,
         # or the job was reconstructed from a Zacros input file. So, it doesn't make any sense to
         # check mass conservation
         check_mass = True
-        if (
-            abs(self.initial.mass(self.initial_entity_number)) < 1e-6
-            or abs(self.final.mass(self.final_entity_number)) < 1e-6
-        ):
+        if abs(initial_mass) < 1e-6 or abs(final_mass) < 1e-6:
             check_mass = False
 
-        if (
-            abs(self.initial.mass(self.initial_entity_number) - self.final.mass(self.final_entity_number)) > 1e-6
-            and check_mass
-        ):
+        if abs(initial_mass - final_mass) > 1e-6 and check_mass:
             msg = "\n### ERROR ### ElementaryReaction.__init__.\n"
             msg += "              The mass is not conserved during the reaction\n"
-            msg += (
-                "              initial:mass("
-                + str([sp.symbol for sp in self.initial])
-                + ")="
-                + str(self.initial.mass(self.initial_entity_number))
-            )
-            msg += (
-                ", final:mass("
-                + str([sp.symbol for sp in self.final])
-                + ")="
-                + str(self.final.mass(self.final_entity_number))
-                + "\n"
-            )
+            msg += "              initial:mass(" + str([sp.symbol for sp in self.initial]) + ")=" + str(initial_mass)
+            msg += ", final:mass(" + str([sp.symbol for sp in self.final]) + ")=" + str(final_mass) + "\n"
             msg += "              initial:entity_number=" + str(self.initial_entity_number)
             msg += ", final:entity_number=" + str(self.final_entity_number) + "\n"
             raise NameError(msg)
 
+        # The label is created the first time it is requested
         self.__userLabel = label
         self.__label = None
-        self.__updateLabel()
+
+    @classmethod
+    def from_columns(
+        cls,
+        initial,
+        final,
+        site_types=None,
+        initial_entity_number=None,
+        final_entity_number=None,
+        neighboring=None,
+        reversible=None,
+        pre_expon=None,
+        pe_ratio=None,
+        activation_energy=None,
+        prox_factor=None,
+        label=None,
+    ):
+        """
+        Creates a list of ElementaryReaction objects from column-oriented inputs. All parameters have the same meaning
+        as in the constructor, but they are given as lists with one element per reaction. Optional parameters can also
+        be None, or contain None elements, to use the default values, and scalar parameters (``reversible``,
+        ``pre_expon``, ``pe_ratio``, ``activation_energy``, and ``prox_factor``) can be given as a single value shared
+        by all reactions. The reactions are validated as in the constructor, but the intermediate results depending
+        only on the species are computed once for all reactions sharing them.
+        """
+        n = len(initial)
+        scalars = ["reversible", "pre_expon", "pe_ratio", "activation_energy", "prox_factor"]
+
+        columns = {
+            "initial": initial,
+            "final": final,
+            "site_types": site_types,
+            "initial_entity_number": initial_entity_number,
+            "final_entity_number": final_entity_number,
+            "neighboring": neighboring,
+            "reversible": reversible,
+            "pre_expon": pre_expon,
+            "pe_ratio": pe_ratio,
+            "activation_energy": activation_energy,
+            "prox_factor": prox_factor,
+            "label": label,
+        }
+
+        for name, values in columns.items():
+            if values is None or (name in scalars and not hasattr(values, "__len__")):
+                columns[name] = n * [values]
+            elif len(values) != n:
+                msg = "\n### ERROR ### ElementaryReaction.from_columns.\n"
+                msg += "              Inconsistent number of elements for " + name + "\n"
+                raise NameError(msg)
+
+        defaults = {"reversible": True, "pre_expon": 0.0, "pe_ratio": 0.0, "activation_energy": 0.0}
+
+        cache = {}
+        output = []
+        for values in zip(*columns.values()):
+            parameters = dict(zip(columns.keys(), values))
+            for key, value in defaults.items():
+                if parameters[key] is None:
+                    parameters[key] = value
+
+            rxn = cls.__new__(cls)
+            rxn.__setup(*parameters.values(), cache)
+            output.append(rxn)
+
+        return output
+
+    def __setattr__(self, name, value):
+        """
+        Sets the attribute ``name``, and counts the change (see ``_version()``).
+        """
+        object.__setattr__(self, name, value)
+        object.__setattr__(self, "_ElementaryReaction__version", self._version() + 1)
+
+    def _version(self):
+        """
+        Returns the number of attribute assignments done on the object. It is used to detect changes, e.g., to
+        invalidate compiled views. Changes done in place, like ``obj.site_types[0] = "fcc"``, are not detected.
+        """
+        return self.__dict__.get("_ElementaryReaction__version", 0)
 
     def __eq__(self, other):
         """
@@ -142,7 +267,7 @@ class ElementaryReaction:
 
         *   ``other`` --
         """
-        if self.__label == other.__label:
+        if self.label() == other.label():
             return True
         else:
             return False
@@ -151,7 +276,7 @@ class ElementaryReaction:
         """
         Returns a hash based on the label
         """
-        return hash(self.__label)
+        return hash(self.label())
 
     @staticmethod
     def __getSpeciesListFullName(species, entity_number, site_types):
@@ -170,7 +295,7 @@ class ElementaryReaction:
         Updates the attribute 'label'
         """
         if self.__userLabel is not None:
-            self.__label = self.__userLabel
+            object.__setattr__(self, "_ElementaryReaction__label", self.__userLabel)
             return
 
         initialLabel = ElementaryReaction.__getSpeciesListFullName(
@@ -187,27 +312,30 @@ class ElementaryReaction:
         if len(self.final.gas_species()) > 0:
             finalLabel += ":" + SpeciesList(self.final.gas_species()).label()
 
-        self.__label = ""
+        label = ""
 
         if self.reversible:
             # Reaction labels in lexicographical order
             if initialLabel > finalLabel:
-                self.__label = initialLabel + "<->" + finalLabel
+                label = initialLabel + "<->" + finalLabel
             else:
-                self.__label = finalLabel + "<->" + initialLabel
+                label = finalLabel + "<->" + initialLabel
         else:
-            self.__label = initialLabel + "->" + finalLabel
+            label = initialLabel + "->" + finalLabel
 
         # For neighboring nodes are sorted
         if self.neighboring is not None:
             for i in range(len(self.neighboring)):
                 if i == 0:
-                    self.__label += ";"
+                    label += ";"
                 lNeighboring = list(self.neighboring[i])
                 lNeighboring.sort()
-                self.__label += str(tuple(lNeighboring)).replace(" ", "")
+                label += str(tuple(lNeighboring)).replace(" ", "")
                 if i != len(self.neighboring) - 1:
-                    self.__label += ","
+                    label += ","
+
+        # The label is a cached value, so it is not counted as a change (see ``_version()``)
+        object.__setattr__(self, "_ElementaryReaction__label", label)
 
     def label(self):
         """
@@ -222,10 +350,20 @@ class ElementaryReaction:
         """
         Translates the object to a string
         """
+        return self._input()
+
+    def _input(self, pre_expon=None):
+        """
+        Returns the Zacros input of the elementary step. If ``pre_expon`` is not None, it is used instead of the
+        pre-exponential term of the object, e.g., to write a scaled copy without modifying the reaction.
+        """
+        if pre_expon is None:
+            pre_expon = self.pre_expon
+
         if self.reversible:
-            output = "reversible_step " + self.__label + "\n"
+            output = "reversible_step " + self.label() + "\n"
         else:
-            output = "step " + self.__label + "\n"
+            output = "step " + self.label() + "\n"
 
         initial_gas_species = SpeciesList(self.initial.gas_species())
         final_gas_species = SpeciesList(self.final.gas_species())
@@ -323,7 +461,7 @@ class ElementaryReaction:
                     output += " "
             output += "\n"
 
-        output += "  pre_expon " + ("%12.5e" % self.pre_expon) + "\n"
+        output += "  pre_expon " + ("%12.5e" % pre_expon) + "\n"
 
         if self.reversible:
             output += "  pe_ratio " + ("%12.5e" % self.pe_ratio) + "\n"
@@ -360,4 +498,4 @@ class ElementaryReaction:
                 if self.site_types[j] == site_types_old[i]:
                     self.site_types[j] = site_types_new[i]
 
-        self.__updateLabel()
+        self.__label = None
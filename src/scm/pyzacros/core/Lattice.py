@@ -1,7 +1,11 @@
 """Module containing the Lattice class."""
 
+import io
 import os
 import math
+import hashlib
+
+import numpy
 
 __all__ = ["Lattice"]
 
@@ -154,6 +158,9 @@ class Lattice:
 
     __NeighboringToStr = {SELF: "self", NORTH: "north", NORTHEAST: "northeast", EAST: "east", SOUTHEAST: "southeast"}
 
+    # Assigning these attributes drops the cached Zacros input and nearest-neighbors arrays
+    __CACHED_FROM = ("cell_vectors", "site_types", "site_coordinates", "nearest_neighbors")
+
     def __init__(self, **kwargs):
         self.cell_vectors = None
         self.site_types = None
@@ -161,6 +168,8 @@ class Lattice:
         self.nearest_neighbors = None
 
         self.__origin = None
+        self.__neighbors_csr = None
+        self.__input = None
 
         # Default Lattices
         if "lattice_type" in kwargs and "lattice_constant" in kwargs and "repeat_cell" in kwargs:
@@ -220,6 +229,18 @@ class Lattice:
             msg += "       - Lattice( fileName )\n"
             raise Exception(msg)
 
+    def __setattr__(self, name, value):
+        """
+        Sets the attribute ``name``. If it is one of the public attributes, the cached Zacros input and
+        nearest-neighbors arrays are dropped, so they are rebuilt with the new values. Changes done in place, like
+        ``lattice.site_types[0] = "fcc"``, are not detected.
+        """
+        object.__setattr__(self, name, value)
+
+        if name in Lattice.__CACHED_FROM:
+            object.__setattr__(self, "_Lattice__input", None)
+            object.__setattr__(self, "_Lattice__neighbors_csr", None)
+
     def __fromDefaultLattices(self, lattice_type, lattice_constant, repeat_cell):
         """
         Creates a default Lattice
@@ -227,6 +248,7 @@ class Lattice:
         self.__lattice_type_default = lattice_type
         self.__lattice_constant_default = lattice_constant
         self.__repeat_cell_default = repeat_cell
+        self.__input = None
 
         if self.__lattice_type_default == Lattice.TRIANGULAR:
 
@@ -289,6 +311,8 @@ class Lattice:
         self.site_coordinates = nsites * [None]
         self.site_types = nsites * [None]
         self.nearest_neighbors = nsites * [None]
+        self.__neighbors_csr = None
+        self.__input = None
 
         def getcellnumber(i, j):
             if i < 0 or j < 0 or i >= repeat_cell[0] or j >= repeat_cell[1]:
@@ -347,6 +371,8 @@ class Lattice:
         self.site_coordinates = site_coordinates
         self.nearest_neighbors = nearest_neighbors
         self.cell_vectors = cell_vectors
+        self.__neighbors_csr = None
+        self.__input = None
 
     def __fromZacrosFile(self, fileName):
         """
@@ -539,6 +565,8 @@ class Lattice:
             self.site_types.append(site_type)
             self.site_coordinates.append(coordinates)
             self.__origin = Lattice.__FROM_EXPLICIT
+            self.__neighbors_csr = None
+            self.__input = None
             locId = len(self.site_types) - 1
 
         return locId
@@ -552,6 +580,8 @@ class Lattice:
         """
         self.nearest_neighbors[id_site].append(id_neighbor)
         self.__origin = Lattice.__FROM_EXPLICIT
+        self.__neighbors_csr = None
+        self.__input = None
 
     def extend(self, other, precision=0.1, cell_vectors_precision=0.01):
         """
@@ -594,6 +624,8 @@ class Lattice:
         # self.__neighboring_structure_unit_cell.extend( other.__neighboring_structure_unit_cell )
 
         self.__origin = Lattice.__FROM_EXPLICIT
+        self.__neighbors_csr = None
+        self.__input = None
         # self.__origin = Lattice.__FROM_UNIT_CELL
 
     def plot(self, pause=-1, show=True, color=None, ax=None, close=False, show_sites_ids=False, file_name=None):
@@ -721,100 +753,138 @@ class Lattice:
         """
         Translate the object to a string following the Zacros input files format
         """
-        output = ""
+        return self.__cached_input()[0]
+
+    def __cached_input(self):
+        """
+        Returns the Zacros input of the lattice and its SHA-256 hash. Both are cached until the lattice is modified
+        through its methods or its public attributes are assigned.
+        """
+        cached = getattr(self, "_Lattice__input", None)
+
+        if cached is None:
+            output = io.StringIO()
+            self.__write(output)
+            output = output.getvalue()
+
+            cached = (output, hashlib.sha256(output.encode()).hexdigest())
+            self.__input = cached
+
+        return cached
+
+    def fingerprint(self):
+        """
+        Returns the SHA-256 hash of the Zacros input of the lattice. It is cached, so it can be used to compare
+        lattices without serializing them again.
+        """
+        return self.__cached_input()[1]
+
+    def write_to(self, fileobj):
+        """
+        Writes the lattice to ``fileobj`` following the Zacros input files format. The content is emitted
+        line by line, so the memory needed does not depend on the number of sites of the lattice. If the lattice
+        was already serialized, e.g., by ``fingerprint()``, the cached content is written instead.
+
+        *   ``fileobj`` -- File-like object with a ``write()`` method, e.g., the file returned by ``open('lattice_input.dat','w')``.
+        """
+        cached = getattr(self, "_Lattice__input", None)
+
+        if cached is not None:
+            fileobj.write(cached[0])
+        else:
+            self.__write(fileobj)
+
+    def __write(self, fileobj):
+        """
+        Writes the lattice to ``fileobj``. See ``write_to()``.
+        """
+        write = fileobj.write
 
         if self.__origin == Lattice.__FROM_DEFAULT:
-            output += "lattice default_choice\n"
+            write("lattice default_choice\n")
 
             if self.__lattice_type_default == Lattice.TRIANGULAR:
-                output += "  triangular_periodic"
+                write("  triangular_periodic")
             elif self.__lattice_type_default == Lattice.RECTANGULAR:
-                output += "  rectangular_periodic"
+                write("  rectangular_periodic")
             elif self.__lattice_type_default == Lattice.HEXAGONAL:
-                output += "  hexagonal_periodic"
+                write("  hexagonal_periodic")
             else:
                 raise Exception("Error: Default lattice not implemented yet! (" + self.__lattice_type_default + ")")
 
-            output += " " + str(self.__lattice_constant_default)
-            output += " " + str(self.__repeat_cell_default[0])
-            output += " " + str(self.__repeat_cell_default[1]) + "\n"
+            write(" " + str(self.__lattice_constant_default))
+            write(" " + str(self.__repeat_cell_default[0]))
+            write(" " + str(self.__repeat_cell_default[1]) + "\n")
 
-            output += "end_lattice"
+            write("end_lattice")
 
         elif self.__origin == Lattice.__FROM_UNIT_CELL:
-            output += "lattice periodic_cell\n"
+            write("lattice periodic_cell\n")
 
-            output += "  cell_vectors\n"
+            write("  cell_vectors\n")
             for i in range(2):
-                for j in range(2):
-                    output += "    " + ("%.8f" % self.__cell_vectors_unit_cell[i][j])
-                output += "\n"
+                write("".join("    " + ("%.8f" % self.__cell_vectors_unit_cell[i][j]) for j in range(2)) + "\n")
 
-            output += "  repeat_cell " + str(str(self.__repeat_cell_unit_cell)[1:-1]).replace(",", "") + "\n"
+            write("  repeat_cell " + str(str(self.__repeat_cell_unit_cell)[1:-1]).replace(",", "") + "\n")
 
             n_cell_sites = len(self.__site_coordinates_unit_cell)
 
             site_types = list(set(self.__site_types_unit_cell))
             site_types.sort()
 
-            output += "  n_site_types " + str(len(site_types)) + "\n"
-            output += "  site_type_names " + str(" ".join(str(x) for x in site_types)) + "\n"
-            output += "  n_cell_sites " + str(n_cell_sites) + "\n"
-            output += "  site_types " + str(" ".join(str(x) for x in self.__site_types_unit_cell)) + "\n"
+            write("  n_site_types " + str(len(site_types)) + "\n")
+            write("  site_type_names " + str(" ".join(str(x) for x in site_types)) + "\n")
+            write("  n_cell_sites " + str(n_cell_sites) + "\n")
+            write("  site_types " + str(" ".join(str(x) for x in self.__site_types_unit_cell)) + "\n")
 
-            output += "  site_coordinates\n"
+            write("  site_coordinates\n")
             for i in range(n_cell_sites):
-                for j in range(2):
-                    output += "    " + ("%.8f" % self.__site_coordinates_unit_cell[i][j])
-                output += "\n"
+                write("".join("    " + ("%.8f" % self.__site_coordinates_unit_cell[i][j]) for j in range(2)) + "\n")
 
-            output += "  neighboring_structure\n"
+            write("  neighboring_structure\n")
             for i in range(len(self.__neighboring_structure_unit_cell)):
-                output += "    " + str(
-                    "-".join(str(self.__neighboring_structure_unit_cell[i][0][j] + 1) for j in range(2))
+                write(
+                    "    "
+                    + str("-".join(str(self.__neighboring_structure_unit_cell[i][0][j] + 1) for j in range(2)))
+                    + "  "
+                    + Lattice.__NeighboringToStr[self.__neighboring_structure_unit_cell[i][1]]
+                    + "\n"
                 )
-                output += "  " + Lattice.__NeighboringToStr[self.__neighboring_structure_unit_cell[i][1]] + "\n"
-            output += "  end_neighboring_structure\n"
+            write("  end_neighboring_structure\n")
 
-            output += "end_lattice"
+            write("end_lattice")
 
         elif self.__origin == Lattice.__FROM_EXPLICIT:
-            output += "lattice explicit\n"
+            write("lattice explicit\n")
 
             if self.cell_vectors is not None:
-                output += "  cell_vectors\n"
+                write("  cell_vectors\n")
                 for i in range(2):
-                    for j in range(2):
-                        output += "  " + ("%.8f" % self.cell_vectors[i][j])
-                    output += "\n"
+                    write("".join("  " + ("%.8f" % self.cell_vectors[i][j]) for j in range(2)) + "\n")
 
-            output += "  n_sites " + str(len(self.site_types)) + "\n"
-            output += "  max_coord " + str(max([len(neighbors) for neighbors in self.nearest_neighbors])) + "\n"
+            write("  n_sites " + str(len(self.site_types)) + "\n")
+            write("  max_coord " + str(max(len(neighbors) for neighbors in self.nearest_neighbors)) + "\n")
 
             site_types = list(set(self.site_types))
             site_types.sort()
 
-            output += "  n_site_types " + str(len(site_types)) + "\n"
-            output += "  site_type_names " + str(" ".join(str(x) for x in site_types)) + "\n"
-
-            output += "  lattice_structure\n"
-
-            for i in range(len(self.site_types)):
-                output += "    " + "%4d" % (i + 1)
-                output += "  " + "%15.8f" % self.site_coordinates[i][0] + "  " + "%15.8f" % self.site_coordinates[i][1]
-                output += "  " + "%10s" % self.site_types[i]
-                output += "  " + "%4d" % len(self.nearest_neighbors[i])
+            write("  n_site_types " + str(len(site_types)) + "\n")
+            write("  site_type_names " + str(" ".join(str(x) for x in site_types)) + "\n")
 
-                for j in self.nearest_neighbors[i]:
-                    output += "%6d" % (j + 1)
+            write("  lattice_structure\n")
 
-                output += "\n"
-
-            output += "  end_lattice_structure\n"
+            for i, ((x, y), site_type, neighbors) in enumerate(
+                zip(self.site_coordinates, self.site_types, self.nearest_neighbors)
+            ):
+                write(
+                    "    %4d  %15.8f  %15.8f  %10s  %4d" % (i + 1, x, y, site_type, len(neighbors))
+                    + "".join("%6d" % (j + 1) for j in neighbors)
+                    + "\n"
+                )
 
-            output += "end_lattice"
+            write("  end_lattice_structure\n")
 
-        return output
+            write("end_lattice")
 
     def number_of_sites(self):
         """
@@ -822,6 +892,125 @@ class Lattice:
         """
         return len(self.site_types)
 
+    def neighbors_csr(self):
+        """
+        Returns the nearest-neighbors information in compressed sparse row format as a tuple of integer numpy arrays
+        ``(indptr, indices)``. The sorted neighbors of the site ``i`` are ``indices[indptr[i]:indptr[i+1]]``. The arrays
+        are cached, and rebuilt only after the lattice is modified through its methods.
+        """
+        csr = getattr(self, "_Lattice__neighbors_csr", None)
+
+        if csr is None or len(csr[0]) != self.number_of_sites() + 1:
+            rows = [sorted(set(neighbors)) if neighbors is not None else [] for neighbors in self.nearest_neighbors]
+
+            indptr = numpy.zeros(len(rows) + 1, dtype=numpy.int64)
+            numpy.cumsum([len(row) for row in rows], out=indptr[1:])
+            indices = numpy.fromiter((j for row in rows for j in row), dtype=numpy.int64, count=indptr[-1])
+
+            csr = (indptr, indices)
+            self.__neighbors_csr = csr
+
+        return csr
+
+    @staticmethod
+    def _pattern_order(nsites, neighboring):
+        """
+        Returns an order to visit the ``nsites`` sites of a graph pattern, so that each site is a neighbor of a previous
+        one, and the neighboring pairs oriented from the first visited site to the second one. It returns (None, None)
+        if the sites are not connected.
+
+        *   ``nsites`` -- Number of sites of the graph pattern.
+        *   ``neighboring`` -- Neighboring relations between the sites of the graph pattern, e.g., ``[[0,2],[1,2]]``.
+        """
+        connected = [0]
+        to_check = [0]
+        # E.g. when nsites == 3 and neighboring=[[0,2],[1,2]], it should generate 0, 2, 1
+        while to_check and len(connected) < nsites:
+            new_check = []
+            for site in to_check:
+                neighbor_pairs = list(filter(lambda x: site in x, neighboring))
+                neighbors = [x[0] if x[1] == site else x[1] for x in neighbor_pairs]
+                new_check.extend(list(filter(lambda x: x not in connected and x not in to_check, neighbors)))
+            to_check = list(set(new_check))
+            connected.extend(to_check)
+
+        if len(connected) != nsites:
+            return None, None
+
+        neighboring = [
+            [x[0], x[1]] if connected.index(x[0]) < connected.index(x[1]) else [x[1], x[0]] for x in neighboring
+        ]
+
+        return connected, neighboring
+
+    def _pattern_embeddings(self, site_types, order, neighboring, allowed=None):
+        """
+        Returns all the ways to place a graph pattern on the lattice, as an integer array with one row per embedding
+        containing the lattice site of each pattern site. Columns follow ``order``. Embeddings are built by expanding
+        the partial ones with the CSR neighbors of the lattice, one pattern site at a time.
+
+        *   ``site_types`` -- Site types of the pattern sites, e.g., ``["fcc","hcp"]``.
+        *   ``order`` -- Order to visit the pattern sites, and oriented ``neighboring`` pairs (see ``_pattern_order()``).
+        *   ``neighboring`` -- Neighboring relations between the sites of the graph pattern, e.g., ``[[0,1]]``.
+        *   ``allowed`` -- Boolean array with the lattice sites that can be used. By default, all of them.
+        """
+        indptr, indices = self.neighbors_csr()
+        nsites = self.number_of_sites()
+        lattice_site_types = numpy.asarray(self.site_types)
+
+        if allowed is None:
+            allowed = numpy.ones(nsites, dtype=bool)
+
+        confs = numpy.flatnonzero(allowed & (lattice_site_types == site_types[order[0]])).reshape(-1, 1)
+
+        if len(order) > 1:
+            edges = numpy.repeat(numpy.arange(nsites, dtype=numpy.int64), numpy.diff(indptr)) * nsites + indices
+
+        for identicity in order[1:]:
+            pairs = [order.index(x[0]) for x in neighboring if x[1] == identicity]
+            if not pairs:
+                return numpy.empty((0, len(site_types)), dtype=numpy.int64)
+
+            # Candidates are the neighbors of the first connected site ...
+            anchors = confs[:, pairs[0]]
+            degree = indptr[anchors + 1] - indptr[anchors]
+            rows = numpy.repeat(numpy.arange(len(confs)), degree)
+            starts = numpy.repeat(indptr[anchors] - numpy.cumsum(degree) + degree, degree)
+            candidates = indices[starts + numpy.arange(len(rows))]
+
+            # ... which have to be allowed, of the right type, not already in the embedding,
+            # and neighbors of the rest of the connected sites
+            valid = allowed[candidates] & (lattice_site_types[candidates] == site_types[identicity])
+            valid &= numpy.all(confs[rows] != candidates[:, None], axis=1)
+            for pos in pairs[1:]:
+                valid &= numpy.isin(confs[rows, pos] * nsites + candidates, edges)
+
+            confs = numpy.hstack([confs[rows[valid]], candidates[valid, None]])
+
+        return confs
+
+    def grid_shape(self):
+        """
+        Returns the shape ``(n1, n2, n_cell_sites)`` of the grid of sites for lattices built by repeating a unit cell,
+        or None for other lattices. The site ``id`` is placed at the position ``numpy.unravel_index(id, shape)``, i.e.,
+        in the cell ``(i, j)`` and the position ``k`` of the unit cell.
+        """
+        if self.__origin not in [Lattice.__FROM_DEFAULT, Lattice.__FROM_UNIT_CELL]:
+            return None
+
+        repeat_cell = self.__repeat_cell_unit_cell
+        return (repeat_cell[0], repeat_cell[1], len(self.__site_types_unit_cell))
+
+    def unit_cell_vectors(self):
+        """
+        Returns the vectors of the unit cell for lattices built by repeating a unit cell, or None for other lattices.
+        They are repeated ``grid_shape()[0]`` and ``grid_shape()[1]`` times, respectively, to build the lattice.
+        """
+        if self.__origin not in [Lattice.__FROM_DEFAULT, Lattice.__FROM_UNIT_CELL]:
+            return None
+
+        return [list(v) for v in self.__cell_vectors_unit_cell]
+
     def site_types_set(self):
         """
         Returns the set of the sites types
@@ -869,3 +1058,5 @@ class Lattice:
             for j in range(len(self.__site_types_unit_cell)):
                 if self.__site_types_unit_cell[j] == site_types_old[i]:
                     self.__site_types_unit_cell[j] = site_types_new[i]
+
+        self.__input = None
@@ -0,0 +1,354 @@
+"""Module containing the LatticeAnalysis class."""
+
+import numpy
+import scipy.spatial
+
+from .Lattice import *
+from .LatticeState import *
+
+__all__ = ["LatticeAnalysis"]
+
+
+class LatticeAnalysis:
+    """
+    Creates a new LatticeAnalysis object, which computes spatial statistics of lattice states. It works on the arrays
+    of species adsorbed on each site (see ``LatticeState.to_arrays()``) and on the nearest-neighbors of the lattice
+    in CSR format, so a whole trajectory is processed in a single call. All methods accept a LatticeState, a list of
+    them (e.g. ``job.results.lattice_states()``), or an integer array with the position in ``surface_species`` of the
+    species adsorbed on each site (-1 for empty sites), with shape ``(n_sites)`` or ``(n_snapshots, n_sites)``.
+    Results for lists and 2D arrays have an additional leading dimension for the snapshots.
+
+    *   ``lattice`` -- Lattice of the states to analyze.
+    *   ``surface_species`` -- Surface species. It determines the species order, and allows to refer to the species by their symbols. By default, it is taken from the first LatticeState analyzed.
+    """
+
+    def __init__(self, lattice, surface_species=None):
+        self.lattice = lattice
+        self.surface_species = surface_species
+
+        indptr, indices = lattice.neighbors_csr()
+        rows = numpy.repeat(numpy.arange(lattice.number_of_sites()), numpy.diff(indptr))
+
+        # Each pair of neighboring sites is counted once, even if the neighbors lists are not symmetric
+        edges = numpy.sort(numpy.stack([rows, indices], axis=1), axis=1)
+        self.__edges = numpy.unique(edges[edges[:, 0] != edges[:, 1]], axis=0)
+
+        self.__distance_pairs = {}
+
+    def __arrays(self, states):
+        """
+        Returns the species and entities arrays with shape ``(n_snapshots, n_sites)`` and whether ``states`` was a
+        single snapshot. Entities are None if they are not available.
+        """
+        single = isinstance(states, LatticeState) or (not isinstance(states, list) and numpy.ndim(states) == 1)
+
+        if single:
+            states = [states]
+
+        if len(states) > 0 and isinstance(states[0], LatticeState):
+            if self.surface_species is None:
+                self.surface_species = states[0].surface_species
+
+            arrays = [state.to_arrays() for state in states]
+            species = numpy.array([item[0] for item in arrays], dtype=numpy.int64).reshape(len(states), -1)
+            entities = numpy.array([item[1] for item in arrays], dtype=numpy.int64).reshape(len(states), -1)
+        else:
+            species = numpy.asarray(states, dtype=numpy.int64)
+            entities = None
+
+        if species.shape[1] != self.lattice.number_of_sites():
+            msg = "\n### ERROR ### LatticeAnalysis.\n"
+            msg += "              Inconsistent number of sites in the lattice states.\n"
+            msg += "              Expected: " + str(self.lattice.number_of_sites())
+            msg += ". Obtained: " + str(species.shape[1]) + "\n"
+            raise Exception(msg)
+
+        return species, entities, single
+
+    def __species_id(self, species):
+        """
+        Returns the position of ``species`` in ``surface_species``. It can be given as int, str or Species.
+        """
+        if species is None or isinstance(species, (int, numpy.integer)):
+            return species
+
+        symbol = species if isinstance(species, str) else species.symbol
+
+        if self.surface_species is not None:
+            for i, sp in enumerate(self.surface_species):
+                if sp.symbol == symbol:
+                    return i
+
+        msg = "\n### ERROR ### LatticeAnalysis.\n"
+        msg += "              Species " + symbol + " is not included in surface_species\n"
+        raise Exception(msg)
+
+    def __number_of_species(self, species):
+        """
+        Returns the number of different species, taking into account both ``surface_species`` and ``species``.
+        """
+        nspecies = int(species.max()) + 1 if species.size > 0 else 0
+        if self.surface_species is not None:
+            nspecies = max(nspecies, len(self.surface_species))
+        return nspecies
+
+    def pair_counts(self, states):
+        """
+        Returns the number of pairs of neighboring sites occupied by each pair of species, as an array with shape
+        ``(n_species, n_species)``, e.g. ``counts[i,j]`` is the number of contacts between ``surface_species[i]`` and
+        ``surface_species[j]``. The array is symmetric. Sites belonging to the same entity are not counted as a contact.
+
+        *   ``states`` -- Lattice states to analyze.
+        """
+        species, entities, single = self.__arrays(states)
+        nspecies = self.__number_of_species(species)
+        nframes = species.shape[0]
+
+        s1 = species[:, self.__edges[:, 0]]
+        s2 = species[:, self.__edges[:, 1]]
+
+        valid = (s1 >= 0) & (s2 >= 0)
+        if entities is not None:
+            valid &= entities[:, self.__edges[:, 0]] != entities[:, self.__edges[:, 1]]
+
+        frames = numpy.broadcast_to(numpy.arange(nframes)[:, None], s1.shape)
+        codes = (frames[valid] * nspecies + s1[valid]) * nspecies + s2[valid]
+        counts = numpy.bincount(codes, minlength=nframes * nspecies * nspecies).reshape(nframes, nspecies, nspecies)
+
+        counts = counts + counts.transpose(0, 2, 1)
+        diagonal = numpy.arange(nspecies)
+        counts[:, diagonal, diagonal] //= 2
+
+        return counts[0] if single else counts
+
+    def island_labels(self, states, species=None):
+        """
+        Labels the islands, i.e., the groups of connected sites occupied by the species ``species``. Returns an integer
+        array with the label of the island for each site, or -1 for the sites not occupied by ``species``. Labels are
+        the smallest site id in each island. The labelling is done with a union-find over the CSR neighbors, for all
+        snapshots at once.
+
+        *   ``states`` -- Lattice states to analyze.
+        *   ``species`` -- Species forming the islands, e.g. ``"O*"``. By default, all adsorbed species.
+        """
+        species_arr, entities, single = self.__arrays(states)
+        species_id = self.__species_id(species)
+
+        if species_id is None:
+            occupied = species_arr >= 0
+        else:
+            occupied = species_arr == species_id
+
+        nframes, nsites = occupied.shape
+
+        # All snapshots are labelled together as disconnected copies of the lattice
+        offsets = (numpy.arange(nframes) * nsites)[:, None]
+        linked = occupied[:, self.__edges[:, 0]] & occupied[:, self.__edges[:, 1]]
+        sites_1 = (self.__edges[:, 0] + offsets)[linked]
+        sites_2 = (self.__edges[:, 1] + offsets)[linked]
+
+        parent = numpy.arange(nframes * nsites)
+        while True:
+            roots_1 = parent[sites_1]
+            roots_2 = parent[sites_2]
+            roots = numpy.minimum(roots_1, roots_2)
+
+            if numpy.all(roots_1 == roots_2):
+                break
+
+            numpy.minimum.at(parent, roots_1, roots)
+            numpy.minimum.at(parent, roots_2, roots)
+
+            # Path compression
+            while True:
+                grandparent = parent[parent]
+                if numpy.array_equal(grandparent, parent):
+                    break
+                parent = grandparent
+
+        labels = (parent.reshape(nframes, nsites) - offsets).astype(numpy.int64)
+        labels[~occupied] = -1
+
+        return labels[0] if single else labels
+
+    def island_sizes(self, states, species=None):
+        """
+        Returns the sizes, in number of sites, of the islands formed by the species ``species`` (see ``island_labels()``).
+        For several snapshots, it returns a list with the array of sizes for each one.
+
+        *   ``states`` -- Lattice states to analyze.
+        *   ``species`` -- Species forming the islands, e.g. ``"O*"``. By default, all adsorbed species.
+        """
+        labels = self.island_labels(states, species)
+
+        if labels.ndim == 1:
+            return numpy.bincount(labels[labels >= 0])[numpy.unique(labels[labels >= 0])]
+
+        return [numpy.bincount(frame[frame >= 0])[numpy.unique(frame[frame >= 0])] for frame in labels]
+
+    def __pairs_within(self, bins):
+        """
+        Returns the pairs of sites ``i<j`` at a distance inside the range of ``bins``, sorted by bin, and the position
+        where each bin starts. The result is cached for each set of bins.
+        """
+        key = tuple(bins)
+
+        if key not in self.__distance_pairs:
+            coordinates = numpy.asarray(self.lattice.site_coordinates, dtype=float)
+            tree = scipy.spatial.cKDTree(coordinates)
+            pairs = tree.query_pairs(bins[-1], output_type="ndarray")
+
+            distances = numpy.linalg.norm(coordinates[pairs[:, 0]] - coordinates[pairs[:, 1]], axis=1)
+            ibin = numpy.searchsorted(bins, distances, side="right") - 1
+            inside = (ibin >= 0) & (ibin < len(bins) - 1)
+
+            order = numpy.argsort(ibin[inside], kind="stable")
+            pairs = pairs[inside][order]
+            starts = numpy.searchsorted(ibin[inside][order], numpy.arange(len(bins) - 1))
+
+            self.__distance_pairs[key] = (pairs, starts)
+
+        return self.__distance_pairs[key]
+
+    def correlation(self, states, species_1, species_2, bins):
+        """
+        Returns the site-site correlation function between the species ``species_1`` and ``species_2`` as a function of
+        the distance. For each bin of distances, it is the number of pairs of sites occupied by ``species_1`` and
+        ``species_2`` divided by the expected number for randomly distributed species with the same coverages, so it
+        is 1.0 for uncorrelated species. Returns a tuple with the centers of the bins and the correlation function.
+        Distances are computed from ``lattice.site_coordinates`` without periodic images.
+
+        *   ``states`` -- Lattice states to analyze.
+        *   ``species_1`` -- First species, e.g. ``"CO*"``.
+        *   ``species_2`` -- Second species, e.g. ``"O*"``.
+        *   ``bins`` -- Edges of the bins of distances, e.g. ``numpy.linspace(0.0, 10.0, 21)``.
+        """
+        species, entities, single = self.__arrays(states)
+        species_id_1 = self.__species_id(species_1)
+        species_id_2 = self.__species_id(species_2)
+
+        bins = numpy.asarray(bins, dtype=float)
+        pairs, starts = self.__pairs_within(bins)
+
+        occupied_1 = species == species_id_1
+        occupied_2 = species == species_id_2
+
+        found = occupied_1[:, pairs[:, 0]] & occupied_2[:, pairs[:, 1]]
+        found = found.astype(numpy.int64) + (occupied_2[:, pairs[:, 0]] & occupied_1[:, pairs[:, 1]])
+
+        cumulative = numpy.zeros((species.shape[0], len(pairs) + 1), dtype=numpy.int64)
+        numpy.cumsum(found, axis=1, out=cumulative[:, 1:])
+        ends = numpy.append(starts[1:], len(pairs))
+        counts = cumulative[:, ends] - cumulative[:, starts]
+
+        # Expected number of pairs (counted in both orders) if the species were randomly distributed
+        nsites = species.shape[1]
+        n_1 = occupied_1.sum(axis=1)
+        n_2 = occupied_2.sum(axis=1) - (1 if species_id_1 == species_id_2 else 0)
+        pairs_per_bin = ends - starts
+        expected = 2.0 * pairs_per_bin[None, :] * (n_1 * n_2 / (nsites * (nsites - 1.0)))[:, None]
+
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            values = numpy.where(expected > 0.0, counts / expected, 0.0)
+
+        centers = 0.5 * (bins[1:] + bins[:-1])
+
+        return (centers, values[0]) if single else (centers, values)
+
+    def grid(self, states):
+        """
+        Returns the species adsorbed on each site reshaped to the grid of the unit cells of the lattice, as an integer
+        array with shape ``(n1, n2, n_cell_sites)``, where ``(n1, n2)`` is the ``repeat_cell`` of the lattice. Only
+        available for lattices built by repeating a unit cell (see ``Lattice.grid_shape()``).
+
+        *   ``states`` -- Lattice states to analyze.
+        """
+        species, entities, single = self.__arrays(states)
+        shape = self.__grid_shape()
+
+        species = species.reshape((species.shape[0],) + shape)
+
+        return species[0] if single else species
+
+    def __grid_shape(self):
+        """
+        Returns the shape of the grid of the lattice, or raises an exception if it is not a periodic lattice.
+        """
+        shape = self.lattice.grid_shape()
+
+        if shape is None:
+            msg = "\n### ERROR ### LatticeAnalysis.\n"
+            msg += "              The lattice is not built by repeating a unit cell.\n"
+            msg += "              Grid-based analysis is only available for default or unit-cell-defined lattices\n"
+            raise Exception(msg)
+
+        return shape
+
+    def __grid_fluctuations(self, states, species):
+        """
+        Returns the FFT over the cells of the deviation of the occupancy from the coverage, for each position of the
+        unit cell, as an array with shape ``(n_snapshots, n1, n2, n_cell_sites)``, and whether ``states`` was a single
+        snapshot.
+        """
+        species_arr, entities, single = self.__arrays(states)
+        species_id = self.__species_id(species)
+        shape = self.__grid_shape()
+
+        if species_id is None:
+            occupancy = species_arr >= 0
+        else:
+            occupancy = species_arr == species_id
+
+        occupancy = occupancy.reshape((occupancy.shape[0],) + shape).astype(float)
+        occupancy -= occupancy.mean(axis=(1, 2, 3), keepdims=True)
+
+        return numpy.fft.fft2(occupancy, axes=(1, 2)), single
+
+    def structure_factor(self, states, species=None):
+        """
+        Returns the static structure factor of the sites occupied by the species ``species``, computed with FFTs over
+        the grid of unit cells, which assumes periodic boundary conditions like Zacros. Peaks at non-zero wave vectors
+        indicate ordered phases, and the growth of the values at small wave vectors indicates phase separation. Returns
+        a tuple with the wave vectors, with shape ``(n1, n2, 2)``, and the structure factor, with shape ``(n1, n2)``.
+        The element ``(h, l)`` corresponds to the wave vector ``fh*b1 + fl*b2``, where ``b1`` and ``b2`` are the
+        reciprocal vectors of the unit cell and ``fh, fl`` are given by ``numpy.fft.fftfreq()``.
+
+        *   ``states`` -- Lattice states to analyze.
+        *   ``species`` -- Species to analyze, e.g. ``"O*"``. By default, all adsorbed species.
+        """
+        transform, single = self.__grid_fluctuations(states, species)
+        n1, n2, ncellsites = self.__grid_shape()
+
+        cell_vectors = numpy.array(self.lattice.unit_cell_vectors(), dtype=float)
+        reciprocal = 2.0 * numpy.pi * numpy.linalg.inv(cell_vectors).T
+
+        fh = numpy.fft.fftfreq(n1)
+        fl = numpy.fft.fftfreq(n2)
+        q = fh[:, None, None] * reciprocal[0] + fl[None, :, None] * reciprocal[1]
+
+        # Phases due to the positions of the sites inside the unit cell
+        positions = numpy.array(self.lattice.site_coordinates[:ncellsites], dtype=float)
+        phases = numpy.exp(-1j * numpy.einsum("hlx,kx->hlk", q, positions))
+
+        amplitude = numpy.sum(transform * phases[None], axis=3)
+        values = numpy.abs(amplitude) ** 2 / (n1 * n2 * ncellsites)
+
+        return (q, values[0]) if single else (q, values)
+
+    def autocorrelation(self, states, species=None):
+        """
+        Returns the spatial autocorrelation of the occupancy of the species ``species``, computed with FFTs over the
+        grid of unit cells, which assumes periodic boundary conditions like Zacros. The result has shape
+        ``(n1, n2, n_cell_sites, n_cell_sites)``, and the element ``(di, dj, k, l)`` is the covariance between the
+        occupancy of the site ``k`` of a cell and the site ``l`` of the cell displaced by ``(di, dj)`` unit cells.
+
+        *   ``states`` -- Lattice states to analyze.
+        *   ``species`` -- Species to analyze, e.g. ``"O*"``. By default, all adsorbed species.
+        """
+        transform, single = self.__grid_fluctuations(states, species)
+        n1, n2, ncellsites = self.__grid_shape()
+
+        power = numpy.conj(transform)[..., :, None] * transform[..., None, :]
+        values = numpy.fft.ifft2(power, axes=(1, 2)).real / (n1 * n2)
+
+        return values[0] if single else values
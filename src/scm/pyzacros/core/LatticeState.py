@@ -1,3 +1,5 @@
+import io
+import hashlib
 import math
 import random
 import numpy
@@ -19,6 +21,23 @@ class LatticeState:
     *   ``add_info`` -- A dictionary containing additional information. For example, ``self.add_info['time']`` will be used as part of the title in the figure generated by the function ``plot()``.
     """
 
+    # The state is stored as integer arrays over the lattice sites: the position of the adsorbed species
+    # in self.__species (-1 for empty sites) and the id of the entity it belongs to (-1 for empty sites).
+    __slots__ = (
+        "lattice",
+        "surface_species",
+        "initial",
+        "add_info",
+        "__species",
+        "__species_index",
+        "__species_on_site",
+        "__entity_on_site",
+        "__species_counts",
+        "__next_entity_number",
+        "__version",
+        "__input",
+    )
+
     def __init__(self, lattice, surface_species, initial=True, add_info=None):
         """
         Creates a new LatticeState object.
@@ -42,61 +61,184 @@ class LatticeState:
 
         self.initial = initial
 
-        self.__adsorbed_on_site = lattice.number_of_sites() * [None]
-        self.__entity_number = lattice.number_of_sites() * [None]
+        self.__species = []
+        self.__species_index = {}
+        for sp in self.surface_species:
+            if sp.symbol not in self.__species_index:
+                self.__species_index[sp.symbol] = len(self.__species)
+                self.__species.append(sp)
+
+        self.__species_on_site = numpy.full(lattice.number_of_sites(), -1, dtype=numpy.int32)
+        self.__entity_on_site = numpy.full(lattice.number_of_sites(), -1, dtype=numpy.int64)
+        self.__species_counts = numpy.zeros(len(self.__species), dtype=numpy.int64)
         self.__next_entity_number = 0
+        self.__version = 0
+        self.__input = None
 
-        self.__speciesNumbers = {}
-        for sp in self.surface_species:
-            self.__speciesNumbers[sp] = 0
+    def __species_id(self, species):
+        """
+        Returns the position of ``species`` in the internal list of species, registering it if it is not there yet.
+        """
+        loc_id = self.__species_index.get(species.symbol)
+
+        if loc_id is None:
+            loc_id = len(self.__species)
+            self.__species.append(species)
+            self.__species_index[species.symbol] = loc_id
+            self.__species_counts = numpy.append(self.__species_counts, 0)
+            self.__version += 1
+
+        return loc_id
+
+    def __lookup_species(self, species, caller):
+        """
+        Returns the position in the internal list of species for ``species`` given as str or Species.
+        """
+        if isinstance(species, str):
+            loc_id = self.__species_index.get(species)
+
+            if loc_id is None:
+                msg = "\n### ERROR ### LatticeState." + caller + ".\n"
+                msg += "              Species " + species + " is not included in surface_species\n"
+                raise Exception(msg)
+
+            return loc_id
+        elif isinstance(species, Species):
+            return self.__species_id(species)
+        else:
+            msg = "\n### ERROR ### LatticeState." + caller + ".\n"
+            msg += "              Inconsistent type for species. It should be type str or Species.\n"
+            msg += "              Expected: Species|str. Obtained: " + str(type(species)) + "\n"
+            raise Exception(msg)
+
+    def __place(self, sites, species_id):
+        """
+        Fills the sites ``sites`` with the species ``species_id`` as a new entity.
+        """
+        self.__species_on_site[sites] = species_id
+        self.__entity_on_site[sites] = self._next_entity_number()
+        self.__species_counts[species_id] += len(sites)
+        self.__version += 1
+
+    def __place_many(self, confs, species_id):
+        """
+        Fills the sites in each row of ``confs`` with the species ``species_id``. Every row becomes a new entity.
+        """
+        entities = numpy.arange(self.__next_entity_number, self.__next_entity_number + len(confs))
+        self.__next_entity_number += len(confs)
+
+        self.__species_on_site[confs] = species_id
+        self.__entity_on_site[confs] = entities[:, None]
+        self.__species_counts[species_id] += confs.size
+        self.__version += 1
 
     def __str__(self):
         """
         Translates the object to a string
         """
-        if self.initial:
-            output = "initial_state" + "\n"
-        else:
-            output = "state" + "\n"
+        return self.__cached_input()[0]
 
-        if self.surface_species is not None:
-            output += "  # species " + (" ".join([sp.symbol for sp in self.surface_species])) + "\n"
+    def __key(self):
+        """
+        Returns the values the Zacros input of the state depends on, besides the content of the sites.
+        """
+        return (self.__version, self.initial, tuple(sp.symbol for sp in self.surface_species))
 
-        if len(self.__speciesNumbers) > 0:
-            output += "  # species_numbers\n"
-            for sp, nsites in self.__speciesNumbers.items():
-                output += "  #   - " + sp.symbol + "  " + str(nsites) + "\n"
+    def __cached_input(self):
+        """
+        Returns the Zacros input of the state and its SHA-256 hash. Both are cached until the state is modified.
+        """
+        if self.__input is None or self.__input[0] != self.__key():
+            output = io.StringIO()
+            self.__write(output)
+            output = output.getvalue()
 
-        processed_entity_number = {}
-        for id_site, sp in enumerate(self.__adsorbed_on_site):
-            if sp is not None and self.__entity_number[id_site] not in processed_entity_number:
-                entity_pos = [
-                    str(i + 1) for i, v in enumerate(self.__entity_number) if v == self.__entity_number[id_site]
-                ]
+            self.__input = (self.__key(), output, hashlib.sha256(output.encode()).hexdigest())
 
-                if len(entity_pos) > 0:
-                    output += "  seed_on_sites " + sp.symbol + " " + " ".join(entity_pos) + "\n"
+        return self.__input[1:]
 
-                    processed_entity_number[self.__entity_number[id_site]] = 1
+    def fingerprint(self):
+        """
+        Returns the SHA-256 hash of the Zacros input of the state. It is cached, so it can be used to compare states
+        without serializing them again.
+        """
+        return self.__cached_input()[1]
+
+    def write_to(self, fileobj):
+        """
+        Writes the state to ``fileobj`` following the Zacros input files format. Sites are grouped by entity in a
+        single pass over the lattice. If the state was already serialized, e.g., by ``fingerprint()``, the cached
+        content is written instead.
+
+        *   ``fileobj`` -- File-like object with a ``write()`` method, e.g., the file returned by ``open('state_input.dat','w')``.
+        """
+        if self.__input is not None and self.__input[0] == self.__key():
+            fileobj.write(self.__input[1])
+        else:
+            self.__write(fileobj)
+
+    def __write(self, fileobj):
+        """
+        Writes the state to ``fileobj``. See ``write_to()``.
+        """
+        write = fileobj.write
 
         if self.initial:
-            output += "end_initial_state"
+            write("initial_state" + "\n")
         else:
-            output += "end_state"
+            write("state" + "\n")
+
+        if self.surface_species is not None:
+            write("  # species " + (" ".join([sp.symbol for sp in self.surface_species])) + "\n")
+
+        if len(self.__species) > 0:
+            write("  # species_numbers\n")
+            for sp, nsites in zip(self.__species, self.__species_counts.tolist()):
+                write("  #   - " + sp.symbol + "  " + str(nsites) + "\n")
+
+        # Entities are sorted by their first site, and their sites in increasing order
+        sites, starts, ends = self.__entities()
+        species_on_site = self.__species_on_site[sites].tolist()
+        labels = [str(site) for site in (sites + 1).tolist()]
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            write(
+                "  seed_on_sites " + self.__species[species_on_site[start]].symbol + " " + " ".join(labels[start:end]) + "\n"
+            )
+
+        if self.initial:
+            write("end_initial_state")
+        else:
+            write("end_state")
+
+    def __entities(self):
+        """
+        Groups the filled sites by entity. Returns the array of filled sites sorted by entity and the ``starts`` and ``ends``
+        positions of each entity in it. Entities are sorted by their first site, and their sites in increasing order.
+        """
+        sites = numpy.flatnonzero(self.__species_on_site >= 0)
+        sites = sites[numpy.argsort(self.__entity_on_site[sites], kind="stable")]
+        entities = self.__entity_on_site[sites]
 
-        return output
+        starts = numpy.flatnonzero(numpy.diff(entities, prepend=-2))
+        ends = numpy.append(starts[1:], len(sites))
+
+        order = numpy.argsort(sites[starts], kind="stable")
+        starts = starts[order]
+        ends = ends[order]
+
+        return sites, starts, ends
 
     def empty(self):
         """
         Returns True if the state is empty
         """
-        return len(self.__adsorbed_on_site) == self.__adsorbed_on_site.count(None)
+        return not numpy.any(self.__species_on_site >= 0)
 
     def number_of_filled_sites(self):
         """
         Returns the number of filled sites on the lattice
         """
-        return len(self.__adsorbed_on_site)
+        return len(self.__species_on_site)
 
     def _next_entity_number(self):
         entity = self.__next_entity_number
@@ -104,20 +246,99 @@ class LatticeState:
         return entity
 
     def _adsorbed_on_site(self):
-        return self.__adsorbed_on_site
+        return [self.__species[i] if i >= 0 else None for i in self.__species_on_site.tolist()]
 
     def _updateSpeciesNumbers(self):
-        for sp in self.surface_species:
-            self.__speciesNumbers[sp] = 0
+        filled = self.__species_on_site[self.__species_on_site >= 0]
+        self.__species_counts = numpy.bincount(filled, minlength=len(self.__species)).astype(numpy.int64)
 
-        for sp in self.__adsorbed_on_site:
-            if sp is None:
-                continue
+    @classmethod
+    def from_arrays(cls, lattice, surface_species, species_idx, entity_idx=None, initial=True, add_info=None):
+        """
+        Creates a new LatticeState object from arrays with the species and the entity adsorbed on each site, e.g., the
+        ones returned by ``to_arrays()``. All checks are done at once on the arrays, so it is the fastest way to create a
+        state from simulation data, e.g., to use a snapshot as the initial state of a new calculation.
+
+        *   ``lattice`` -- Lattice containing the lattice to be used during the calculation.
+        *   ``surface_species`` -- Surface species. It will be used to determine the species order.
+        *   ``species_idx`` -- Array with the position in ``surface_species`` of the species adsorbed on each site, or -1 for empty sites.
+        *   ``entity_idx`` -- Array with an id of the entity adsorbed on each site, shared by all the sites of a multidentate species. Values for empty sites are ignored. By default, each filled site is a different entity.
+        *   ``initial`` -- Determines if the lattice state is to be considered as an initial state.
+        *   ``add_info`` -- A dictionary containing additional information.
+        """
+        state = cls(lattice, surface_species, initial=initial, add_info=add_info)
+        state.__set_arrays(species_idx, entity_idx)
+        return state
 
-            if sp not in self.__speciesNumbers:
-                self.__speciesNumbers[sp] = 1
-            else:
-                self.__speciesNumbers[sp] += 1
+    def __set_arrays(self, species_idx, entity_idx):
+        """
+        Replaces the content of the state by the given arrays. See ``from_arrays()``.
+        """
+        nsites = self.lattice.number_of_sites()
+        species_idx = numpy.asarray(species_idx, dtype=numpy.int64)
+
+        if entity_idx is None:
+            entity_idx = numpy.arange(nsites, dtype=numpy.int64)
+        entity_idx = numpy.asarray(entity_idx, dtype=numpy.int64)
+
+        if species_idx.shape != (nsites,) or entity_idx.shape != (nsites,):
+            msg = "\n### ERROR ### LatticeState.from_arrays.\n"
+            msg += "              species_idx and entity_idx should be arrays with one element per lattice site\n"
+            msg += "              Expected: " + str(nsites) + ". Obtained: " + str(species_idx.shape)
+            msg += " and " + str(entity_idx.shape) + "\n"
+            raise Exception(msg)
+
+        if numpy.any((species_idx < -1) | (species_idx >= len(self.surface_species))):
+            msg = "\n### ERROR ### LatticeState.from_arrays.\n"
+            msg += "              species_idx contains positions out of surface_species\n"
+            raise Exception(msg)
+
+        # Positions in surface_species to positions in the internal list of species
+        mapping = numpy.array([self.__species_index[sp.symbol] for sp in self.surface_species] + [-1], dtype=numpy.int32)
+        species_on_site = mapping[species_idx]
+
+        filled = numpy.flatnonzero(species_on_site >= 0)
+        entities, first, entity_on_filled = numpy.unique(entity_idx[filled], return_index=True, return_inverse=True)
+
+        entity_species = species_on_site[filled][first]
+        if numpy.any(species_on_site[filled] != entity_species[entity_on_filled]):
+            msg = "\n### ERROR ### LatticeState.from_arrays.\n"
+            msg += "              All the sites of an entity should contain the same species\n"
+            raise Exception(msg)
+
+        denticities = numpy.array([sp.denticity for sp in self.__species], dtype=numpy.int64)
+        if numpy.any(numpy.bincount(entity_on_filled, minlength=len(entities)) != denticities[entity_species]):
+            msg = "\n### ERROR ### LatticeState.from_arrays.\n"
+            msg += "              The number of sites of each entity should be the denticity of its species\n"
+            raise Exception(msg)
+
+        self.__species_on_site = species_on_site
+        self.__entity_on_site = numpy.full(nsites, -1, dtype=numpy.int64)
+        self.__entity_on_site[filled] = entity_on_filled
+        self.__next_entity_number = len(entities)
+        self._updateSpeciesNumbers()
+        self.__version += 1
+
+    def to_arrays(self):
+        """
+        Returns a tuple of arrays ``(species_idx, entity_idx)`` with the species and the entity adsorbed on each site,
+        using the conventions of ``from_arrays()``, so ``species_idx`` contains positions in ``surface_species``.
+        States with species added with ``fill_site()`` that are not included in ``surface_species`` cannot be
+        represented in that way, and an exception is raised.
+        """
+        # Positions in the internal list of species to positions in surface_species
+        mapping = numpy.full(len(self.__species) + 1, -1, dtype=numpy.int64)
+        for i, sp in reversed(list(enumerate(self.surface_species))):
+            mapping[self.__species_index[sp.symbol]] = i
+
+        species_idx = mapping[self.__species_on_site]
+        if numpy.any((species_idx == -1) & (self.__species_on_site >= 0)):
+            extra = sorted(set(sp.symbol for sp in self.__species) - set(sp.symbol for sp in self.surface_species))
+            msg = "\n### ERROR ### LatticeState.to_arrays.\n"
+            msg += "              The state contains species not included in surface_species: " + " ".join(extra) + "\n"
+            raise Exception(msg)
+
+        return species_idx, self.__entity_on_site.copy()
 
     def fill_site(self, site_number, species, update_species_numbers=True):
         """
@@ -125,73 +346,29 @@ class LatticeState:
 
         *   ``site_number`` -- Integer number indicating the site id to be filled.
         *   ``species`` -- Species to be used to fill the site, e.g., ``Species("O2*")``, or ``"O2*"``.
-        *   ``update_species_numbers`` -- Forces to update the statistics about the number of species adsorbed in the lattice. For better performance, it would be wise to set it to False if a massive number of species are going to be added (one by one) using this function.
+        *   ``update_species_numbers`` -- Kept for backward compatibility. The statistics about the number of species adsorbed in the lattice are updated incrementally, so this option has no effect.
         """
-        lSpecies = None
-        if isinstance(species, str):
-            for sp in self.surface_species:
-                if sp.symbol == species:
-                    lSpecies = sp
-                    break
-        elif isinstance(species, Species):
-            lSpecies = species
-        else:
-            msg = "\n### ERROR ### LatticeState.fill_sites.\n"
-            msg += "              Inconsistent type for species. It should be type str or Species.\n"
-            msg += "              Expected: Species|str. Obtained: " + str(type(species)) + "\n"
-            raise Exception(msg)
+        species_id = self.__lookup_species(species, "fill_site")
 
-        if isinstance(site_number, int):
+        if isinstance(site_number, (int, numpy.integer)):
             site_number = [site_number]
 
-        if not (isinstance(site_number, list) or isinstance(site_number, tuple)):
+        if not isinstance(site_number, (list, tuple, numpy.ndarray)):
             msg = "\n### ERROR ### LatticeState.fill_site.\n"
             msg += "              Inconsistent values for species denticity and dimensions of site_number\n"
             msg += "              denticity>1 but site_number is not an instance of list or tuple\n"
             raise Exception(msg)
 
-        # if( len(site_number) != lSpecies.denticity ):
-        # msg  = "\n### ERROR ### LatticeState.fill_site.\n"
-        # msg += "              Inconsistent values for species denticity and dimensions of site_number\n"
-        # msg += "              site_number should have the `denticity` number of elements\n"
-        # raise Exception(msg)
+        site_number = numpy.asarray(site_number, dtype=numpy.int64)
 
-        if any([self.__adsorbed_on_site[site] is not None for site in site_number]):
+        if numpy.any(self.__species_on_site[site_number] >= 0):
             msg = "\n### ERROR ### LatticeState.fill_site.\n"
             msg += "              site is already filled\n"
             raise Exception(msg)
 
-        connected = [site_number[0]]
-        to_check = [site_number[0]]
-        while to_check and len(connected) < lSpecies.denticity:
-            new_check = []
-            for site in to_check:
-                new_check.extend(
-                    list(
-                        filter(
-                            lambda x: x in site_number and x not in connected and x not in to_check,
-                            self.lattice.nearest_neighbors[site],
-                        )
-                    )
-                )
-            to_check = list(set(new_check))
-            connected.extend(to_check)
-
-        # if( len(connected) != lSpecies.denticity ):
-        # msg  = "\n### ERROR ### LatticeState.fill_site.\n"
-        # msg += "              sites are not neighboring\n"
-        # raise Exception(msg)
+        self.__place(site_number, species_id)
 
-        entity_number = self._next_entity_number()
-
-        for site in site_number:
-            self.__adsorbed_on_site[site] = lSpecies
-            self.__entity_number[site] = entity_number
-
-        if update_species_numbers:
-            self._updateSpeciesNumbers()
-
-    def fill_sites_random(self, site_name, species, coverage, neighboring=None):
+    def fill_sites_random(self, site_name, species, coverage, neighboring=None, rng=None):
         """
         Fills the named sites ``site_name`` randomly with the species ``species`` by keeping a
         coverage given by ``coverage``. Coverage is defined relative to the available empty sites.
@@ -202,127 +379,181 @@ class LatticeState:
         *   ``species`` -- Species to be used to fill the site, e.g., ``Species("O2*")``, or ``"O2*"``.
         *   ``coverage`` -- A number between 0.0 and 1.0 represents the expected coverage. The function will try to generate coverage as close as possible to this number.
         *   ``neighboring`` -- Neighboring relations associated to the sites ``site_name``, e.g., ``[[0,2],[1,2]]``.
+        *   ``rng`` -- Seed or ``numpy.random.Generator`` used to pick the configurations. By default, the seed is taken from the ``random`` module, so ``random.seed()`` makes the result reproducible.
         """
-        lSpecies = None
-        if isinstance(species, str):
-            for sp in self.surface_species:
-                if sp.symbol == species:
-                    lSpecies = sp
-                    break
-        elif isinstance(species, Species):
-            lSpecies = species
-        else:
-            msg = "\n### ERROR ### LatticeState.fill_sites_random.\n"
-            msg += "              Inconsistent type for species. It should be type str or Species\n"
-            raise Exception(msg)
+        species_id, confs, n_target_sites = self.__candidate_configurations(
+            species, site_name, neighboring, "fill_sites_random"
+        )
+
+        if rng is None:
+            rng = random.getrandbits(64)
+        rng = numpy.random.default_rng(rng)
+
+        n_sites_to_fill = round(n_target_sites * coverage)
+        (selected,) = self.__sample_configurations([confs], [n_sites_to_fill], rng)
+        self.__place_many(selected, species_id)
+
+        if self.__species_counts[species_id] == 0:
+            return 0.0
+        actual_coverage = float(self.__species_counts[species_id]) / n_target_sites
+        return actual_coverage
+
+    def fill_sites_random_mixture(self, site_name, coverages, neighboring=None, rng=None):
+        """
+        Fills the named sites ``site_name`` randomly with several species at once by keeping the coverages given by
+        ``coverages``. All species are placed in a single randomized pass, in which they compete for the empty sites
+        on equal terms, so the result does not depend on the order of the species. The coverage of each species is
+        defined relative to the sites available to it before filling. Returns a dictionary with the actual coverages.
+
+        *   ``site_name`` -- Name of the sites to be filled, e.g., ``"fcc"``. Multidentate species take ``denticity`` sites of this type. A dictionary with the site names for each species is also accepted, e.g., ``{"H*":"fcc", "H2**":["fcc","hcp"]}``.
+        *   ``coverages`` -- Dictionary with the expected coverage for each species, e.g., ``{"CO*":0.1, "O*":0.2}``. Keys can be Species or str.
+        *   ``neighboring`` -- Dictionary with the neighboring relations associated to the sites of each multidentate species, e.g., ``{"CO3***":[[0,2],[1,2]]}``.
+        *   ``rng`` -- Seed or ``numpy.random.Generator`` used to pick the configurations. By default, the seed is taken from the ``random`` module, so ``random.seed()`` makes the result reproducible.
+        """
+        if neighboring is None:
+            neighboring = {}
+
+        def get_option(options, species, default=None):
+            symbol = species if isinstance(species, str) else species.symbol
+            for key, value in options.items():
+                if (key if isinstance(key, str) else key.symbol) == symbol:
+                    return value
+            return default
+
+        species_ids = []
+        all_confs = []
+        all_n_target_sites = []
+        all_n_sites_to_fill = []
+        for species, coverage in coverages.items():
+            if isinstance(site_name, dict):
+                lSite_name = get_option(site_name, species)
+                if lSite_name is None:
+                    msg = "\n### ERROR ### LatticeState.fill_sites_random_mixture.\n"
+                    msg += "              site_name not given for species " + str(species) + "\n"
+                    raise Exception(msg)
+            else:
+                lSite_name = site_name
+
+            denticity = self.__species[self.__lookup_species(species, "fill_sites_random_mixture")].denticity
+            if isinstance(lSite_name, str) or isinstance(lSite_name, int):
+                lSite_name = denticity * [lSite_name]
+
+            species_id, confs, n_target_sites = self.__candidate_configurations(
+                species, lSite_name, get_option(neighboring, species), "fill_sites_random_mixture"
+            )
+
+            species_ids.append(species_id)
+            all_confs.append(confs)
+            all_n_target_sites.append(n_target_sites)
+            all_n_sites_to_fill.append(round(n_target_sites * coverage))
+
+        if rng is None:
+            rng = random.getrandbits(64)
+        rng = numpy.random.default_rng(rng)
+
+        for species_id, selected in zip(species_ids, self.__sample_configurations(all_confs, all_n_sites_to_fill, rng)):
+            self.__place_many(selected, species_id)
+
+        actual_coverages = {}
+        for species_id, n_target_sites in zip(species_ids, all_n_target_sites):
+            actual_coverages[self.__species[species_id].symbol] = (
+                float(self.__species_counts[species_id]) / n_target_sites
+            )
+
+        return actual_coverages
+
+    def __candidate_configurations(self, species, site_name, neighboring, caller):
+        """
+        Returns the id of the species, the configurations of empty sites where it can be adsorbed (see
+        ``Lattice._pattern_embeddings()``), and the number of different sites involved in them.
+        """
+        species_id = self.__lookup_species(species, caller)
+        lSpecies = self.__species[species_id]
 
         if isinstance(site_name, str) or isinstance(site_name, int):
             site_name = [site_name]
 
         if lSpecies.denticity != len(site_name):
-            msg = "\n### ERROR ### LatticeState.fill_sites_random.\n"
+            msg = "\n### ERROR ### LatticeState." + caller + ".\n"
             msg += "             Inconsistent amount of site_name with species denticity\n"
             raise Exception(msg)
 
-        neighboring_order = []
+        neighboring_order = [0]
         if lSpecies.denticity > 1:
             if neighboring == None:
                 neighboring = [[x - 1, x] for x in range(1, lSpecies.denticity)]
-                neighboring_order = range(lSpecies.denticity)
+                neighboring_order = list(range(lSpecies.denticity))
             else:
-                connected = [0]
-                to_check = [0]
-                # We need to check if the sites are neighboring, and generate an ordering to generate the subgraphs from the site_names
-                # E.g. when denticity == 3 and neighboring=[[0,2],[1,2]], it should generate as site_name[0], site_name[2], site_name[1]
-                while to_check and len(connected) < lSpecies.denticity:
-                    new_check = []
-                    for site in to_check:
-                        neighbor_pairs = list(filter(lambda x: site in x, neighboring))
-                        neighbors = [x[0] if x[1] == site else x[1] for x in neighbor_pairs]
-                        new_check.extend(list(filter(lambda x: x not in connected and x not in to_check, neighbors)))
-                    to_check = list(set(new_check))
-                    connected.extend(to_check)
-                if len(connected) != lSpecies.denticity:
-                    msg = "\n### ERROR ### LatticeState.fill_sites_random.\n"
+                neighboring_order, neighboring = Lattice._pattern_order(lSpecies.denticity, neighboring)
+                if neighboring_order is None:
+                    msg = "\n### ERROR ### LatticeState." + caller + ".\n"
                     msg += "             neighboring sites not connected.\n"
                     raise Exception(msg)
-                neighboring_order = connected
-                neighboring = [
-                    [x[0], x[1]] if connected.index(x[0]) < connected.index(x[1]) else [x[1], x[0]] for x in neighboring
-                ]
 
-        total_available_conf = []
-
-        empty_sites = list(
-            filter(
-                lambda x: self.__adsorbed_on_site[x] is None and self.lattice.site_types[x] == site_name[0],
-                range(self.lattice.number_of_sites()),
-            )
-        )
-        for site_number_i in empty_sites:
-            available_conf = [[site_number_i]]
-            for identicity in neighboring_order[1:]:
-                new_conf = []
-                neighbors = list(filter(lambda x: x[1] == identicity, neighboring))
-                for conf in available_conf:
-                    nearest_neighbors = [
-                        self.lattice.nearest_neighbors[conf[neighboring_order.index(x[0])]] for x in neighbors
-                    ]
-                    if not nearest_neighbors:
-                        continue
-                    nearest_neighbors = set.intersection(*map(set, nearest_neighbors))
-                    new_conf.extend(
-                        [
-                            conf + [x]
-                            for x in list(
-                                filter(
-                                    lambda x: self.__adsorbed_on_site[x] is None
-                                    and x not in conf
-                                    and self.lattice.site_types[x] == site_name[identicity],
-                                    nearest_neighbors,
-                                )
-                            )
-                        ]
-                    )
-                available_conf = new_conf
-            total_available_conf.extend(available_conf)
+        empty = self.__species_on_site < 0
+        confs = self.lattice._pattern_embeddings(site_name, neighboring_order, neighboring, allowed=empty)
 
-        target_sites = set([item for sublist in total_available_conf for item in sublist])
+        n_target_sites = len(numpy.unique(confs))
 
-        if len(target_sites) == 0:
-            msg = "\n### ERROR ### LatticeState.fill_sites_random.\n"
+        if n_target_sites == 0:
+            msg = "\n### ERROR ### LatticeState." + caller + ".\n"
             msg += "              site_name=" + str(site_name) + " not found\n"
             raise Exception(msg)
 
-        n_sites_to_fill = round(len(target_sites) * coverage)
-        random.shuffle(total_available_conf)
+        return species_id, confs, n_target_sites
 
-        filled_sites = {}
-        available_conf = []
-        for conf in total_available_conf:
-            if len(filled_sites) >= n_sites_to_fill:
-                break
-
-            if any((site in filled_sites for site in conf)):
+    def __sample_configurations(self, all_confs, all_n_sites_to_fill, rng):
+        """
+        Picks non-overlapping configurations for several species at once, until ``all_n_sites_to_fill[i]`` sites are
+        covered with configurations from ``all_confs[i]``. The species take turns in a random order proportional to
+        the number of entities each one needs. The configurations of each species are drawn lazily, by chunks, from
+        a random permutation. Returns the array of picked configurations for each species.
+        """
+        orders = [rng.permutation(len(confs)) for confs in all_confs]
+        n_entities = [
+            -(-n_sites // confs.shape[1]) if n_sites > 0 else 0 for confs, n_sites in zip(all_confs, all_n_sites_to_fill)
+        ]
+
+        # Monodentate configurations of a single species never overlap
+        if len(all_confs) == 1 and all_confs[0].shape[1] == 1:
+            return [all_confs[0][orders[0][: n_entities[0]]]]
+
+        schedule = numpy.repeat(numpy.arange(len(all_confs)), n_entities)
+        if len(all_confs) > 1:
+            rng.shuffle(schedule)
+
+        taken = numpy.zeros(self.lattice.number_of_sites(), dtype=bool)
+        selected = [[] for confs in all_confs]
+        pending = [[] for confs in all_confs]
+        positions = len(all_confs) * [0]
+        for i in schedule.tolist():
+            chunk_size = max(64, 2 * n_entities[i])
+
+            conf = None
+            while conf is None:
+                if not pending[i]:
+                    if positions[i] >= len(orders[i]):
+                        break
+
+                    chunk = all_confs[i][orders[i][positions[i] : positions[i] + chunk_size]]
+                    positions[i] += chunk_size
+                    pending[i] = chunk[~numpy.any(taken[chunk], axis=1)].tolist()[::-1]
+                    continue
+
+                candidate = pending[i].pop()
+                if not taken[candidate].any():
+                    conf = candidate
+
+            if conf is None:
                 continue
 
-            for site in conf:
-                filled_sites[site] = True
-            available_conf.append(conf)
+            taken[conf] = True
+            selected[i].append(conf)
 
-        entity_number = self._next_entity_number()
-        for conf in available_conf:
-            for site_number in conf:
-                self.__adsorbed_on_site[site_number] = lSpecies
-                self.__entity_number[site_number] = entity_number
-            entity_number = self._next_entity_number()
-
-        self._updateSpeciesNumbers()
-
-        if lSpecies not in self.__speciesNumbers:
-            return 0.0
-        actual_coverage = self.__speciesNumbers[lSpecies] / len(target_sites)
-        return actual_coverage
+        return [
+            numpy.array(confs_i, dtype=numpy.int64).reshape(-1, confs.shape[1])
+            for confs_i, confs in zip(selected, all_confs)
+        ]
 
     def fill_all_sites(self, site_name, species):
         """
@@ -341,8 +572,9 @@ class LatticeState:
         for sp in self.surface_species:
             fractions[sp.symbol] = 0.0
 
-        for sp, nsites in self.__speciesNumbers.items():
-            fractions[sp.symbol] = float(nsites) / self.lattice.number_of_sites()
+        values = self.__species_counts / self.lattice.number_of_sites()
+        for sp, value in zip(self.__species, values.tolist()):
+            fractions[sp.symbol] = value
 
         return fractions
 
@@ -369,9 +601,11 @@ class LatticeState:
         markers = ["o", "s", "v", "^", "x", "s", "d", "+"]
         colors = ["r", "g", "b", "c", "m", "y", "k", "#eeefff"]
 
-        symbols = [sp if sp is None else sp.symbol for sp in self.__adsorbed_on_site]
+        species_on_site = self.__species_on_site
+        entity_on_site = self.__entity_on_site
+        filled = numpy.flatnonzero(species_on_site >= 0)
 
-        items = list(filter(None.__ne__, set(self.__adsorbed_on_site)))
+        items = numpy.unique(species_on_site[filled]).tolist()
 
         if self.add_info is not None:
             ax.set_title("t = {:.3g} s".format(self.add_info.get("time")))
@@ -385,45 +619,20 @@ class LatticeState:
         # Plots the species
         # --------------------------------
         site_types = sorted(list(set(self.lattice.site_types)))
-        for i, sym_i in enumerate([item.symbol for item in items]):
+        for i, species_id in enumerate(items):
+            sym_i = self.__species[species_id].symbol
+            sids = filled[species_on_site[filled] == species_id]
 
-            if all([sym is None for sym in symbols]):
-                continue
-
-            ids_nn = [pos for pos, v in enumerate(symbols) if v is not None]
-            s_ids_nn = numpy.argsort([symbols[k] for k in ids_nn])
-            sorted_ids = [ids_nn[k] for k in s_ids_nn]
-            sorted_ids = sorted_ids + [k for k in range(len(symbols)) if k not in sorted_ids]
-
-            xvalues = []
-            yvalues = []
-            imarkers = []
-            for sid in sorted_ids:
-                x = self.lattice.site_coordinates[sid][0]
-                y = self.lattice.site_coordinates[sid][1]
-                site_type = self.lattice.site_types[sid]
-                sym = symbols[sid]
-
-                if sym == sym_i:
-                    xvalues.append(x)
-                    yvalues.append(y)
-
-                    lSpecies = None
-                    for sp in self.surface_species:
-                        if sp.symbol == sym_i:
-                            lSpecies = sp
-                            break
-
-                    imarkers.append(site_types.index(site_type))
+            xvalues = [self.lattice.site_coordinates[sid][0] for sid in sids]
+            yvalues = [self.lattice.site_coordinates[sid][1] for sid in sids]
+            imarkers = [site_types.index(self.lattice.site_types[sid]) for sid in sids]
 
             if len(xvalues) > 0:
-                # ax.scatter(xvalues, yvalues, color=colors[i], marker=markers[imarkers[i]], s=100, zorder=4, label=sym_i)
-                # ax.scatter(xvalues, yvalues, color=colors[i], marker=markers[imarkers[i]], s=100/5, zorder=4, label=sym_i)
                 ax.scatter(
                     xvalues,
                     yvalues,
                     color=colors[i],
-                    marker=markers[imarkers[i]],
+                    marker=markers[imarkers[min(i, len(imarkers) - 1)]],
                     s=450 / math.sqrt(len(self.lattice.site_coordinates)),
                     zorder=4,
                     label=sym_i,
@@ -432,23 +641,23 @@ class LatticeState:
         # -------------------------------------------------
         # Plots the links for species with denticity > 1
         # -------------------------------------------------
-        for id_site, sp in enumerate(self.__adsorbed_on_site):
-            if sp is not None:
-                entity_pos = [i for i, v in enumerate(self.__entity_number) if v == self.__entity_number[id_site]]
-
-                if len(entity_pos) > 0:
-                    for id_site_2 in self.lattice.nearest_neighbors[id_site]:
-                        if id_site_2 in entity_pos:
-                            coords_i = self.lattice.site_coordinates[id_site]
-                            coords_j = self.lattice.site_coordinates[id_site_2]
-                            ax.plot(
-                                [coords_i[0], coords_j[0]],
-                                [coords_i[1], coords_j[1]],
-                                color=colors[items.index(sp)],
-                                linestyle="solid",
-                                linewidth=5,
-                                zorder=4,
-                            )
+        for id_site in filled:
+            neighbors = self.lattice.nearest_neighbors[id_site]
+            if neighbors is None:
+                continue
+
+            for id_site_2 in neighbors:
+                if entity_on_site[id_site_2] == entity_on_site[id_site]:
+                    coords_i = self.lattice.site_coordinates[id_site]
+                    coords_j = self.lattice.site_coordinates[id_site_2]
+                    ax.plot(
+                        [coords_i[0], coords_j[0]],
+                        [coords_i[1], coords_j[1]],
+                        color=colors[items.index(species_on_site[id_site])],
+                        linestyle="solid",
+                        linewidth=5,
+                        zorder=4,
+                    )
 
         ax.legend(loc="center left", bbox_to_anchor=(1, 0.5))
 
@@ -1,6 +1,12 @@
+import io
 import os
+import hashlib
+import bisect
 from collections import UserList
 
+import numpy
+
+from .Species import *
 from .SpeciesList import *
 from .ElementaryReaction import *
 
@@ -32,9 +38,15 @@ class Mechanism(UserList):
         copy = self.data
 
         self.data = []
-        for er in copy:
-            if er not in self.data:
-                self.data.append(er)
+        self.__index = None
+        self.__version = 0
+        self.__species = None
+        for rxn in copy:
+            self.append(rxn)
+
+        self.__compiled = None
+        self.__input = None
+        self.__pre_expon_factors = None
 
     def __fromZacrosFile(self, fileName, gas_species, surface_species):
         """
@@ -49,6 +61,8 @@ class Mechanism(UserList):
             line.split("#")[0] for line in file_content if line.split("#")[0].strip()
         ]  # Removes empty lines and comments
 
+        all_parameters = []
+
         nline = 0
         while nline < len(file_content):
             tokens = file_content[nline].split()
@@ -236,12 +250,16 @@ class Mechanism(UserList):
                 if "gas_reacs_prods" in parameters:
                     del parameters["gas_reacs_prods"]
 
-                rxn = ElementaryReaction(**parameters)
-
-                self.append(rxn)
+                all_parameters.append(parameters)
 
             nline += 1
 
+        # All items are created at once, sharing the intermediate results
+        keys = {key: None for parameters in all_parameters for key in parameters}
+        columns = {key: [parameters.get(key) for parameters in all_parameters] for key in keys}
+        if len(all_parameters) > 0:
+            self.extend(ElementaryReaction.from_columns(**columns))
+
     def append(self, item):
         """
         Append item to the end of the sequence
@@ -259,59 +277,258 @@ class Mechanism(UserList):
         """
         Insert value before index
         """
-        for erxn in self:
-            if erxn.label() == item.label():
-                return
+        index = self.__label_index()
+        if item.label() in index:
+            return
+
+        if i >= len(self):
+            index[item.label()] = len(self)
+            self.__index[2] = None
+            self.__version = getattr(self, "_Mechanism__version", 0) + 1
+        else:
+            self.__changed()
 
         super(Mechanism, self).insert(i, item)
 
+    def __label_index(self):
+        """
+        Returns the dictionary label -> position of the reactions. It is kept up to date by the methods modifying the
+        list, but not if the labels are changed directly on the reactions.
+        """
+        index = getattr(self, "_Mechanism__index", None)
+        if index is None or index[0] is not self.data:
+            self.__index = [self.data, {rxn.label(): i for i, rxn in enumerate(self.data)}, None]
+
+        return self.__index[1]
+
+    def __changed(self):
+        """
+        Drops the label index and increases the version counter. It is called by the methods modifying the list, except
+        the ones removing a single item (see ``__pop()``).
+        """
+        self.__index = None
+        self.__version = getattr(self, "_Mechanism__version", 0) + 1
+
+    def __pop(self, i):
+        """
+        Removes and returns the reaction at the i-th index. The label index is updated in place, so only the positions
+        of the following reactions are visited.
+        """
+        i = range(len(self.data))[i]
+        item = self.data.pop(i)
+
+        index = getattr(self, "_Mechanism__index", None)
+        if index is not None and index[0] is self.data:
+            label = item.label()
+            if index[1].get(label) == i:
+                del index[1][label]
+                if index[2] is not None:
+                    del index[2][bisect.bisect_left(index[2], label)]
+
+            for j in range(i, len(self.data)):
+                index[1][self.data[j].label()] = j
+
+        self.__version = getattr(self, "_Mechanism__version", 0) + 1
+
+        return item
+
+    def __species_lists(self):
+        """
+        Returns the gas and surface species lists. They are cached, and rebuilt only if the version counter of the
+        mechanism, or of any of its reactions, has changed.
+        """
+        key = (getattr(self, "_Mechanism__version", 0), sum(rxn._version() for rxn in self.data))
+
+        cached = getattr(self, "_Mechanism__species", None)
+        if cached is None or cached[0] != key:
+            species = [sp for rxn in self.data for sp in rxn.initial + rxn.final if sp != Species.UNSPECIFIED]
+            gas_species = SpeciesList(list(dict.fromkeys(sp for sp in species if sp.is_gas())))
+            surface_species = SpeciesList(list(dict.fromkeys(sp for sp in species if sp.is_adsorbed())))
+            self.__species = cached = (key, gas_species, surface_species)
+
+        return cached[1], cached[2]
+
+    def __setitem__(self, i, item):
+        """
+        Sets the reaction at the i-th index
+        """
+        super(Mechanism, self).__setitem__(i, item)
+        self.__changed()
+
+    def __delitem__(self, i):
+        """
+        Removes the reaction at the i-th index
+        """
+        if isinstance(i, slice):
+            super(Mechanism, self).__delitem__(i)
+            self.__changed()
+        else:
+            self.__pop(i)
+
+    def __iadd__(self, other):
+        """
+        Extend sequence by appending elements from the iterable
+        """
+        self.extend(other)
+        return self
+
+    def __imul__(self, n):
+        """
+        Duplicates are not accepted, so the reactions are kept unchanged unless ``n`` is zero or negative
+        """
+        if n <= 0:
+            self.clear()
+        return self
+
+    def pop(self, i=-1):
+        """
+        Removes and returns the reaction at the i-th index
+        """
+        return self.__pop(i)
+
+    def remove(self, item):
+        """
+        Removes the first occurrence of ``item``
+        """
+        self.__pop(self.data.index(item))
+
+    def clear(self):
+        """
+        Removes all reactions
+        """
+        super(Mechanism, self).clear()
+        self.__changed()
+
+    def reverse(self):
+        """
+        Reverses the order of the reactions
+        """
+        super(Mechanism, self).reverse()
+        self.__changed()
+
+    def sort(self, /, *args, **kwds):
+        """
+        Sorts the reactions
+        """
+        super(Mechanism, self).sort(*args, **kwds)
+        self.__changed()
+
     def __str__(self):
         """
         Translates the object to a string
         """
-        output = "mechanism" + "\n\n"
+        return self.__cached_input()[0]
+
+    def __input_key(self):
+        """
+        Returns the values the Zacros input of the mechanism depends on: the version counter of the list, which changes
+        if any reaction is added, removed or replaced, and the id and version counter of every reaction.
+        """
+        return (getattr(self, "_Mechanism__version", 0), [(id(rxn), rxn._version()) for rxn in self])
+
+    def __cached_input(self):
+        """
+        Returns the Zacros input of the mechanism and its SHA-256 hash. Both are cached, and rebuilt only if the list of
+        reactions changes or any of them is modified by assigning its attributes.
+        """
+        key = self.__input_key()
+
+        cached = getattr(self, "_Mechanism__input", None)
+        if cached is None or cached[0] != key:
+            output = io.StringIO()
+            self.__write(output)
+            output = output.getvalue()
+
+            cached = (key, output, hashlib.sha256(output.encode()).hexdigest())
+            self.__input = cached
+
+        return cached[1:]
+
+    def fingerprint(self):
+        """
+        Returns the SHA-256 hash of the Zacros input of the mechanism. It is cached, so it can be used to compare
+        mechanisms without serializing them again.
+        """
+        return self.__cached_input()[1]
+
+    def write_to(self, fileobj):
+        """
+        Writes the mechanism to ``fileobj`` following the Zacros input files format. Elementary reactions are
+        written one at a time. If the mechanism was already serialized, e.g., by ``fingerprint()``, the cached content
+        is written instead.
+
+        *   ``fileobj`` -- File-like object with a ``write()`` method, e.g., the file returned by ``open('mechanism_input.dat','w')``.
+        """
+        cached = getattr(self, "_Mechanism__input", None)
+
+        if cached is not None and cached[0] == self.__input_key():
+            fileobj.write(cached[1])
+        else:
+            self.__write(fileobj)
+
+    def __write(self, fileobj):
+        """
+        Writes the mechanism to ``fileobj``. See ``write_to()``.
+        """
+        factors = self.pre_expon_factors()
+
+        fileobj.write("mechanism" + "\n\n")
         for i in range(len(self)):
-            output += str(self[i])
+            if factors[i] != 1.0:
+                fileobj.write(self[i]._input(pre_expon=self[i].pre_expon * factors[i]))
+            else:
+                fileobj.write(str(self[i]))
             if i != len(self) - 1:
-                output += "\n\n"
-        output += "\n\n"
-        output += "end_mechanism"
+                fileobj.write("\n\n")
+        fileobj.write("\n\n")
+        fileobj.write("end_mechanism")
 
-        return output
+    def scaled(self, pre_expon_factors):
+        """
+        Returns a new mechanism whose pre-exponential terms are the ones of this mechanism multiplied by
+        ``pre_expon_factors``. The elementary reactions are shared instead of copied, and the factors are only applied
+        when the mechanism is written, e.g., in ``mechanism_input.dat``, or compiled. So it is a cheap alternative to
+        ``copy.deepcopy()``, but changes done on the reactions are seen by both mechanisms.
 
-    def surface_species(self):
+        *   ``pre_expon_factors`` -- List with one factor per elementary reaction, or dictionary with the factors of some elementary reactions, e.g., ``{ "O2_adsorption":0.1 }``.
         """
-        Returns the surface species list.
+        if isinstance(pre_expon_factors, dict):
+            factors = dict(pre_expon_factors)
+        else:
+            factors = {rxn.label(): float(factor) for rxn, factor in zip(self, pre_expon_factors)}
+
+        for rxn, factor in zip(self, self.pre_expon_factors()):
+            if factor != 1.0:
+                factors[rxn.label()] = factors.get(rxn.label(), 1.0) * factor
+
+        mechanism = Mechanism(self.data)
+        mechanism.__pre_expon_factors = factors
+
+        return mechanism
+
+    def pre_expon_factors(self):
+        """
+        Returns a list with the factor applied to the pre-exponential term of every elementary reaction. It is 1.0 for
+        all of them, unless the mechanism was created with ``scaled()``.
         """
-        species = SpeciesList()
+        factors = getattr(self, "_Mechanism__pre_expon_factors", None)
 
-        for erxn in self:
-            for s in erxn.initial:
-                if s.is_adsorbed():
-                    species.append(s)
-            for s in erxn.final:
-                if s.is_adsorbed():
-                    species.append(s)
+        if factors is None:
+            return [1.0] * len(self)
 
-        species.remove_duplicates()
-        return species
+        return [factors.get(rxn.label(), 1.0) for rxn in self]
+
+    def surface_species(self):
+        """
+        Returns the surface species list.
+        """
+        return SpeciesList(self.__species_lists()[1])
 
     def gas_species(self):
         """
         Returns the gas species list.
         """
-        species = SpeciesList()
-
-        for erxn in self:
-            for s in erxn.initial:
-                if s.is_gas():
-                    species.append(s)
-            for s in erxn.final:
-                if s.is_gas():
-                    species.append(s)
-
-        species.remove_duplicates()
-        return species
+        return SpeciesList(self.__species_lists()[0])
 
     def species(self):
         """Returns the adsorbed species."""
@@ -339,14 +556,231 @@ class Mechanism(UserList):
         for erxn in self:
             erxn.replace_site_types(site_types_old, site_types_new)
 
-    def find(self, label):
+        self.__changed()
+
+    def compile(self):
+        """
+        Returns a CompiledMechanism object, a frozen view of the mechanism where species, site types, and graph patterns
+        are replaced by integer indices, and the kinetic parameters are stored as numpy arrays. The view is cached, and
+        it is only rebuilt if the list of reactions changes or any of them is modified by assigning its attributes,
+        e.g., ``mechanism[0].pre_expon = 1e8``.
+        """
+        key = (getattr(self, "_Mechanism__version", 0), [(id(rxn), rxn._version()) for rxn in self])
+
+        compiled = getattr(self, "_Mechanism__compiled", None)
+        if compiled is not None and compiled._key == key:
+            return compiled
+
+        self.__compiled = CompiledMechanism(self, key)
+        return self.__compiled
+
+    def rate_constants(self, temperature, pressure=1.0, molar_fraction=None, cluster_expansion=None):
+        """
+        Returns the forward and reverse rate constants of every step in the zero coverage limit, as an array with shape
+        ``(n_conditions, n_steps, 2)``, where the last index selects the forward (0) or reverse (1) direction. The rate
+        constants are computed as Zacros does: ``k = A*exp(-Ea/kT)``, with the pre-exponential of the reverse direction
+        given by ``pre_expon/pe_ratio`` and its activation energy by ``Ea - dE``, where ``dE`` is the reaction energy.
+        For adsorption steps, the pre-exponential is multiplied by the partial pressures of the gas reactants. Reverse
+        rate constants of irreversible steps are zero. Conditions are defined by broadcasting together ``temperature``,
+        ``pressure``, and the values of ``molar_fraction``.
+
+        *   ``temperature`` -- Temperature in K. Scalar or 1D array.
+        *   ``pressure`` -- Pressure in bar. Scalar or 1D array.
+        *   ``molar_fraction`` -- Dictionary with the molar fraction of each gas species, e.g., ``{"CO": 0.4, "O2": [0.1, 0.2]}``, or ``settings.molar_fraction``. Missing gas species have a molar fraction of 0.0.
+        *   ``cluster_expansion`` -- ClusterExpansion used to compute the reaction energies. The energy of each adsorbed entity is given by the one-body cluster with the same species and site types. If None, only the gas energies are considered.
+        """
+        kB = 8.617333262e-5  # Boltzmann constant in eV/K
+
+        compiled = self.compile()
+        if molar_fraction is None:
+            molar_fraction = {}
+
+        gas_symbols = [sp.symbol for sp in compiled.gas_species]
+        fractions = [molar_fraction.get(symbol, 0.0) for symbol in gas_symbols]
+        temperature, pressure, *fractions = numpy.broadcast_arrays(
+            numpy.atleast_1d(numpy.asarray(temperature, dtype=float)), numpy.asarray(pressure, dtype=float), *fractions
+        )
+
+        if temperature.ndim != 1:
+            msg = "\n### ERROR ### Mechanism.rate_constants.\n"
+            msg += "              temperature, pressure, and molar fractions should be scalars or 1D arrays\n"
+            raise Exception(msg)
+
+        partial_pressures = numpy.array(fractions, dtype=float).T * pressure[:, None]
+
+        # Reaction energies in the zero coverage limit, and the corresponding BEP activation energies
+        gas_energies = numpy.array([sp.gas_energy if sp.gas_energy is not None else 0.0 for sp in compiled.gas_species])
+        reaction_energy = compiled.gas_stoichiometry @ gas_energies.reshape(-1)
+        if cluster_expansion is not None:
+            reaction_energy = reaction_energy + self.__adsorbates_energy(compiled, cluster_expansion)
+
+        activation_energy = numpy.maximum(numpy.maximum(compiled.activation_energy, reaction_energy), 0.0)
+
+        reverse_pre_expon = numpy.divide(
+            compiled.pre_expon,
+            compiled.pe_ratio,
+            out=numpy.zeros(len(compiled)),
+            where=compiled.reversible & (compiled.pe_ratio != 0.0),
+        )
+
+        kT = kB * temperature[:, None]
+        stoichiometry = compiled.gas_stoichiometry
+
+        rates = numpy.empty((len(temperature), len(compiled), 2))
+        rates[:, :, 0] = compiled.pre_expon * numpy.exp(-activation_energy / kT)
+        rates[:, :, 0] *= numpy.prod(partial_pressures[:, None, :] ** numpy.maximum(-stoichiometry, 0), axis=2)
+        rates[:, :, 1] = reverse_pre_expon * numpy.exp(-(activation_energy - reaction_energy) / kT)
+        rates[:, :, 1] *= numpy.prod(partial_pressures[:, None, :] ** numpy.maximum(stoichiometry, 0), axis=2)
+
+        return rates
+
+    @staticmethod
+    def __adsorbates_energy(compiled, cluster_expansion):
+        """
+        Returns the difference between the energies of the adsorbed entities in the final and initial states of every
+        step, as given by the one-body clusters of ``cluster_expansion``.
+        """
+        energies = {}
+        for cl in cluster_expansion:
+            symbols = [sp.symbol if sp != Species.UNSPECIFIED else None for sp in cl.species]
+            if len(set(cl.entity_number)) == 1 and len(set(symbols)) == 1 and symbols[0] not in [None, "*"]:
+                key = (symbols[0], tuple(sorted(cl.site_types, key=str)))
+                energies[key] = energies.get(key, 0.0) + cl.energy
+
+        def entities_energy(species, entity_number, site_types):
+            entities = {}
+            for sp, entity, site_type in zip(species, entity_number, site_types):
+                entities.setdefault(entity, [compiled.surface_species[sp].symbol, []])[1].append(site_type)
+
+            return sum(energies.get((symbol, tuple(sorted(st, key=str))), 0.0) for symbol, st in entities.values())
+
+        output = numpy.zeros(len(compiled))
+        for i, rxn in enumerate(compiled._reactions):
+            sites = slice(compiled.site_offsets[i], compiled.site_offsets[i + 1])
+            output[i] = entities_energy(
+                compiled.final_species[sites], compiled.final_entity_number[sites], rxn.site_types
+            ) - entities_energy(compiled.initial_species[sites], compiled.initial_entity_number[sites], rxn.site_types)
+
+        return output
+
+    def find(self, label, prefix=False):
         """
         Returns the list of reactions where the substring ``label`` is found in the reactions' label
+
+        *   ``label`` -- Substring to look for.
+        *   ``prefix`` -- If True, only labels starting with ``label`` are considered. They are located by binary search on the sorted labels.
         """
-        return [rxn for rxn in self if rxn.label().find(label) != -1]
+        if not prefix:
+            return [rxn for rxn in self if rxn.label().find(label) != -1]
+
+        index = self.__label_index()
+        if self.__index[2] is None:
+            self.__index[2] = sorted(index)
+        labels = self.__index[2]
+
+        positions = []
+        for l in labels[bisect.bisect_left(labels, label) :]:
+            if not l.startswith(label):
+                break
+            positions.append(index[l])
+
+        return [self.data[i] for i in sorted(positions)]
 
     def find_one(self, label):
         """
         Returns the first reaction where the substring ``label`` is found in the reaction's label
         """
         return next(rxn for rxn in self if rxn.label().find(label) != -1)
+
+    def find_exact(self, label):
+        """
+        Returns the reaction with label ``label``, or None if it is not found. The lookup does not depend on the
+        number of reactions.
+        """
+        i = self.__label_index().get(label)
+        if i is not None and self.data[i].label() != label:
+            self.__index = None
+            i = self.__label_index().get(label)
+
+        return self.data[i] if i is not None else None
+
+
+class CompiledMechanism:
+    """
+    Frozen, integer-indexed view of a Mechanism. It is created with ``Mechanism.compile()``. All arrays are read-only.
+    Per-site quantities of all steps are concatenated, and the sites of the step ``i`` are in the slice
+    ``site_offsets[i]:site_offsets[i+1]``. Similarly, the neighboring pairs of the step ``i`` are
+    ``neighbor_pairs[neighbor_offsets[i]:neighbor_offsets[i+1]]``, with indices relative to the first site of the step.
+
+    *   ``labels`` -- Tuple with the labels of the steps.
+    *   ``surface_species`` -- SpeciesList with the surface species. It defines the species ids of ``initial_species`` and ``final_species``.
+    *   ``gas_species`` -- SpeciesList with the gas species. It defines the columns of ``gas_stoichiometry``.
+    *   ``site_types`` -- Tuple with the site types. It defines the ids of ``site_type_ids``.
+    *   ``reversible``, ``pre_expon``, ``pe_ratio``, ``activation_energy``, ``prox_factor`` -- Arrays with one element per step. ``prox_factor`` is ``nan`` if it is not defined.
+    *   ``gas_stoichiometry`` -- Array with shape ``(n_steps, n_gas_species)``. Gas reactants are counted as negative and gas products as positive.
+    *   ``site_offsets``, ``site_type_ids``, ``initial_species``, ``final_species``, ``initial_entity_number``, ``final_entity_number`` -- Per-site arrays.
+    *   ``neighbor_offsets``, ``neighbor_pairs`` -- Neighboring pairs.
+    """
+
+    def __init__(self, mechanism, key):
+        self._key = key
+        self._reactions = tuple(mechanism)
+
+        self.labels = tuple(rxn.label() for rxn in mechanism)
+
+        self.surface_species = mechanism.surface_species()
+        self.gas_species = mechanism.gas_species()
+
+        surface_ids = {sp.symbol: i for i, sp in enumerate(self.surface_species)}
+        gas_ids = {sp.symbol: i for i, sp in enumerate(self.gas_species)}
+
+        site_types = set()
+        for rxn in mechanism:
+            site_types.update(rxn.site_types)
+        self.site_types = tuple(sorted(site_types, key=lambda st: (type(st) == str, st)))
+        site_type_ids = {st: i for i, st in enumerate(self.site_types)}
+
+        nsteps = len(mechanism)
+        self.reversible = numpy.array([rxn.reversible for rxn in mechanism], dtype=bool)
+        self.pre_expon = numpy.array([rxn.pre_expon for rxn in mechanism], dtype=float)
+        self.pre_expon *= mechanism.pre_expon_factors()
+        self.pe_ratio = numpy.array([rxn.pe_ratio for rxn in mechanism], dtype=float)
+        self.activation_energy = numpy.array([rxn.activation_energy for rxn in mechanism], dtype=float)
+        self.prox_factor = numpy.array(
+            [rxn.prox_factor if rxn.prox_factor is not None else numpy.nan for rxn in mechanism], dtype=float
+        )
+
+        self.gas_stoichiometry = numpy.zeros((nsteps, len(self.gas_species)), dtype=numpy.int64)
+        for i, rxn in enumerate(mechanism):
+            for sign, species in [(-1, rxn.initial), (1, rxn.final)]:
+                for sp in species:
+                    if sp.is_gas():
+                        self.gas_stoichiometry[i, gas_ids[sp.symbol]] += sign
+
+        nsites = [rxn.sites for rxn in mechanism]
+        neighboring = [rxn.neighboring if rxn.neighboring is not None else [] for rxn in mechanism]
+
+        self.site_offsets = numpy.concatenate(([0], numpy.cumsum(nsites, dtype=numpy.int64)))
+        self.neighbor_offsets = numpy.concatenate(([0], numpy.cumsum([len(n) for n in neighboring], dtype=numpy.int64)))
+
+        def per_site(values):
+            return numpy.array([v for rxn in mechanism for v in values(rxn)], dtype=numpy.int64)
+
+        self.site_type_ids = per_site(lambda rxn: [site_type_ids[st] for st in rxn.site_types])
+        self.initial_species = per_site(lambda rxn: [surface_ids[sp.symbol] for sp in rxn.initial if sp.is_adsorbed()])
+        self.final_species = per_site(lambda rxn: [surface_ids[sp.symbol] for sp in rxn.final if sp.is_adsorbed()])
+        self.initial_entity_number = per_site(lambda rxn: rxn.initial_entity_number)
+        self.final_entity_number = per_site(lambda rxn: rxn.final_entity_number)
+        self.neighbor_pairs = numpy.array(
+            [pair for pairs in neighboring for pair in pairs], dtype=numpy.int64
+        ).reshape(-1, 2)
+
+        for value in vars(self).values():
+            if isinstance(value, numpy.ndarray):
+                value.setflags(write=False)
+
+    def __len__(self):
+        """
+        Returns the number of steps
+        """
+        return len(self.labels)
@@ -1,3 +1,5 @@
+import weakref
+
 import chemparse
 
 __all__ = ["Species"]
@@ -12,6 +14,9 @@ class Species:
     *   ``gas_energy`` -- Species' gas energy in eV. e.g. ``0.0``
     *   ``kind`` -- It can be ``Species.SURFACE`` (0), or ``Species.GAS`` (1). If None, it is selected from the symbol.
     *   ``mass`` -- Specifies the mass in Da. If None, the mass is calculated from the symbol interpreted as a chemical formula. The mass of the most abundant isotopes of composing atoms is used for this calculation. For example, if ``symbol='CH4'``, the mass will be ``16.0312`` (``12.0000+4*1.0078``).
+
+    Species objects are interned: creating a species with the same parameters as an existing one returns the existing
+    object, so the chemical formula is parsed only once. For this reason, Species objects are immutable.
     """
 
     # Mass of the most common isotope in Da
@@ -91,10 +96,36 @@ class Species:
 
     UNSPECIFIED = -1
 
+    __registry = weakref.WeakValueDictionary()
+
+    def __new__(cls, symbol=None, denticity=None, gas_energy=None, kind=None, mass=None):
+        """
+        Returns the interned species with the same parameters if it exists. Otherwise, it creates a new object.
+        """
+        if symbol is not None:
+            species = Species.__registry.get(Species.__key(symbol, denticity, gas_energy, kind, mass))
+            if species is not None:
+                return species
+
+        return super(Species, cls).__new__(cls)
+
+    @staticmethod
+    def __key(symbol, denticity, gas_energy, kind, mass):
+        """
+        Returns the key of the species in the registry of interned species.
+        """
+        if denticity is None:
+            denticity = symbol.count("*")
+
+        return (symbol, denticity, gas_energy, kind, mass)
+
     def __init__(self, symbol, denticity=None, gas_energy=None, kind=None, mass=None):
         """
         Creates a new Species object.
         """
+        if self.__dict__.get("_Species__interned", False):
+            return
+
         self.symbol = symbol
         self.gas_energy = gas_energy
 
@@ -154,6 +185,32 @@ class Species:
         else:
             self.__mass = mass
 
+        self.__interned = True
+        Species.__registry[Species.__key(symbol, denticity, gas_energy, kind, mass)] = self
+
+    def __setattr__(self, name, value):
+        """
+        Sets the attribute ``name``. It is only allowed during the construction of the object.
+        """
+        if self.__dict__.get("_Species__interned", False):
+            msg = "\n### ERROR ### Species.__setattr__.\n"
+            msg += "              Species objects are immutable. Create a new Species instead\n"
+            raise Exception(msg)
+
+        object.__setattr__(self, name, value)
+
+    def __copy__(self):
+        """
+        Returns the object itself, since it is immutable.
+        """
+        return self
+
+    def __deepcopy__(self, memo):
+        """
+        Returns the object itself, since it is immutable.
+        """
+        return self
+
     def __eq__(self, other):
         """
         Returns True if both objects have the same symbol. Otherwise returns False
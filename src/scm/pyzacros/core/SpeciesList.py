@@ -1,4 +1,3 @@
-import copy
 from collections import UserList
 
 from .Species import *
@@ -17,6 +16,8 @@ class SpeciesList(UserList):
         super(SpeciesList, self).__init__(data)
         self.__label = None
         self.__updateLabel()
+        self.__index = None
+        self.__version = 0
 
     def __hash__(self):
         """
@@ -141,16 +142,122 @@ class SpeciesList(UserList):
 
         return self.__label
 
+    def __changed(self):
+        """
+        Increases the version counter. It is called by the methods modifying the list.
+        """
+        self.__version = getattr(self, "_SpeciesList__version", 0) + 1
+
+    def __setitem__(self, i, item):
+        """
+        Sets the species at the i-th index
+        """
+        super(SpeciesList, self).__setitem__(i, item)
+        self.__changed()
+
+    def __delitem__(self, i):
+        """
+        Removes the species at the i-th index
+        """
+        super(SpeciesList, self).__delitem__(i)
+        self.__changed()
+
+    def __iadd__(self, other):
+        """
+        Extend sequence by appending elements from the iterable
+        """
+        super(SpeciesList, self).__iadd__(other)
+        self.__changed()
+        return self
+
+    def __imul__(self, n):
+        """
+        Repeats the species ``n`` times
+        """
+        super(SpeciesList, self).__imul__(n)
+        self.__changed()
+        return self
+
+    def append(self, item):
+        """
+        Append item to the end of the sequence
+        """
+        super(SpeciesList, self).append(item)
+        self.__changed()
+
+    def extend(self, other):
+        """
+        Extend sequence by appending elements from the iterable
+        """
+        super(SpeciesList, self).extend(other)
+        self.__changed()
+
+    def insert(self, i, item):
+        """
+        Insert value before index
+        """
+        super(SpeciesList, self).insert(i, item)
+        self.__changed()
+
+    def pop(self, i=-1):
+        """
+        Removes and returns the species at the i-th index
+        """
+        self.__changed()
+        return super(SpeciesList, self).pop(i)
+
+    def remove(self, item):
+        """
+        Removes the first occurrence of ``item``
+        """
+        super(SpeciesList, self).remove(item)
+        self.__changed()
+
+    def clear(self):
+        """
+        Removes all species
+        """
+        super(SpeciesList, self).clear()
+        self.__changed()
+
+    def reverse(self):
+        """
+        Reverses the order of the species
+        """
+        super(SpeciesList, self).reverse()
+        self.__changed()
+
+    def sort(self, /, *args, **kwds):
+        """
+        Sorts the species
+        """
+        super(SpeciesList, self).sort(*args, **kwds)
+        self.__changed()
+
+    def symbol_index(self, symbol):
+        """
+        Returns the position of the first species with symbol ``symbol``, or None if it is not found. It uses a
+        dictionary symbol -> position, which is rebuilt only if the list has been modified by its methods or replaced.
+
+        *   ``symbol`` -- Symbol of the species, e.g., ``'CO*'``.
+        """
+        version = getattr(self, "_SpeciesList__version", 0)
+
+        index = getattr(self, "_SpeciesList__index", None)
+        if index is None or index[0] is not self.data or index[1] != version:
+            positions = {}
+            for j, sp in enumerate(self.data):
+                if isinstance(sp, Species):
+                    positions.setdefault(sp.symbol, j)
+            self.__index = index = (self.data, version, positions)
+
+        return index[2].get(symbol)
+
     def remove_duplicates(self):
         """
         Removes duplicate species. Two species are considered the same if they have the same symbol.
         """
-        copy_self = copy.deepcopy(self.data)
-
-        self.data = []
-        for sp in copy_self:
-            if sp not in self.data:
-                self.data.append(sp)
+        self.data = list(dict.fromkeys(self.data))
 
         self.__updateLabel()
 
@@ -0,0 +1,141 @@
+"""Module containing the ZacrosCache class."""
+
+import os
+import time
+import shutil
+import threading
+
+__all__ = ["ZacrosCache"]
+
+
+class ZacrosCache:
+    """
+    Creates a new ZacrosCache object, which represents a persistent directory with the output files of successful Zacros
+    calculations indexed by the hash of their input files (see ``ZacrosJob.hash_input()``). The cache is enabled for
+    all ZacrosJobs by setting the class attribute ``ZacrosJob.cache``, e.g.,
+    ``ZacrosJob.cache = ZacrosCache('~/zacros_cache')``. Then, jobs with the same input files as a previous
+    calculation, including the random seed, restore its output files instead of running Zacros. Restored files are
+    hardlinks to the files in the cache whenever possible. Old entries are evicted every time a new one is stored.
+
+    *   ``path`` -- Path to the cache directory. It is created if it does not exist.
+    *   ``max_size`` -- Maximum size of the cache in bytes. The least recently used entries are removed first. By default, the size is not limited.
+    *   ``max_age`` -- Maximum time in seconds since an entry was used for the last time. By default, entries never expire.
+    """
+
+    def __init__(self, path, max_size=None, max_age=None):
+        self.path = os.path.abspath(os.path.expanduser(str(path)))
+        self.max_size = max_size
+        self.max_age = max_age
+
+        os.makedirs(self.path, exist_ok=True)
+
+    def __entry(self, job):
+        """
+        Returns the path to the entry of ``job``.
+        """
+        return os.path.join(self.path, job.hash_input())
+
+    def __contains__(self, job):
+        """
+        Returns True if there is an entry for ``job``.
+        """
+        return os.path.isdir(self.__entry(job))
+
+    def store(self, job):
+        """
+        Copies the output files of ``job`` to the cache. Input files, the run script, and pickled jobs are not stored.
+        Nothing is done if there is already an entry for ``job``.
+
+        *   ``job`` -- ZacrosJob to store. It should be finished successfully.
+        """
+        entry = self.__entry(job)
+        if os.path.isdir(entry):
+            return
+
+        inputs = ["simulation", "lattice", "energetics", "mechanism", "state", "run", "pid"]
+        inputs = [job._filenames[key] for key in inputs]
+
+        # The entry is completed in a temporary folder, so other processes never restore a partial entry
+        partial = entry + ".partial." + str(os.getpid()) + "." + str(threading.get_ident())
+        os.makedirs(partial)
+
+        for name in os.listdir(job.path):
+            source = os.path.join(job.path, name)
+            if name in inputs or name.endswith(".dill") or not os.path.isfile(source):
+                continue
+            shutil.copyfile(source, os.path.join(partial, name))
+
+        try:
+            os.rename(partial, entry)
+        except OSError:
+            shutil.rmtree(partial, ignore_errors=True)
+
+        self.evict()
+
+    def restore(self, job):
+        """
+        Restores the output files of ``job`` from the cache into its folder ``job.path``. Returns False if there is no
+        entry for ``job``.
+
+        *   ``job`` -- ZacrosJob to restore. Its folder should already exist.
+        """
+        entry = self.__entry(job)
+
+        try:
+            names = os.listdir(entry)
+        except OSError:
+            return False
+
+        for name in names:
+            target = os.path.join(job.path, name)
+            if os.path.lexists(target):
+                os.remove(target)
+
+            try:
+                os.link(os.path.join(entry, name), target)
+            except OSError:
+                shutil.copyfile(os.path.join(entry, name), target)
+
+        # The modification time of the entry records its last use
+        os.utime(entry)
+
+        return True
+
+    def evict(self):
+        """
+        Removes the entries not used during the last ``max_age`` seconds. Then, it removes the least recently used
+        entries until the size of the cache is below ``max_size``.
+        """
+        entries = []
+        for name in os.listdir(self.path):
+            entry = os.path.join(self.path, name)
+            if ".partial." in name or not os.path.isdir(entry):
+                continue
+
+            try:
+                size = sum(os.path.getsize(os.path.join(entry, f)) for f in os.listdir(entry))
+                entries.append((os.path.getmtime(entry), size, entry))
+            except OSError:
+                continue
+
+        entries.sort()
+
+        now = time.time()
+        total_size = sum(size for mtime, size, entry in entries)
+
+        for mtime, size, entry in entries:
+            expired = self.max_age is not None and now - mtime > self.max_age
+            oversized = self.max_size is not None and total_size > self.max_size
+
+            if not expired and not oversized:
+                break
+
+            shutil.rmtree(entry, ignore_errors=True)
+            total_size -= size
+
+    def clear(self):
+        """
+        Removes all the entries of the cache.
+        """
+        for name in os.listdir(self.path):
+            shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
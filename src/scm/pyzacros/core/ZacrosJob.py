@@ -2,7 +2,10 @@
 
 import os
 import stat
+import signal
+import hashlib
 import shutil
+import threading
 from typing import Optional
 
 import scm.plams
@@ -16,6 +19,8 @@ from .ClusterExpansion import *
 from .ElementaryReaction import *
 from .Mechanism import *
 from .Settings import *
+from .ZacrosCache import *
+from .ZacrosMonitor import *
 
 __all__ = ["ZacrosJob", "ZacrosExecutableNotFoundError"]
 
@@ -42,6 +47,15 @@ class ZacrosJob(scm.plams.SingleJob):
     *   ``settings`` -- Settings containing the parameters of the Zacros calculation.
     *   ``name`` -- A string containing the name of the job. All zacros input and output files are stored in a folder with this name. If not supplied, the default name is ``plamsjob``.
     *   ``restart`` -- ZacrosJob object from which the calculation will be restarted
+
+    Poisoned surfaces can be detected while Zacros is running (see ``ZacrosMonitor``). In such a case, the job is
+    stopped and ``surface_poisoned()`` returns True. It is enabled through the following optional settings:
+
+    .. code-block:: python
+
+       settings.poisoning.window = 100.0  # Simulated time in seconds without changes in the gas species
+       settings.poisoning.saturation = 0.99
+       settings.poisoning.interval = 10.0
     """
 
     _command = os.environ["AMSBIN"] + "/zacros" if "AMSBIN" in os.environ else "zacros.x"
@@ -55,9 +69,14 @@ class ZacrosJob(scm.plams.SingleJob):
         "state": "state_input.dat",
         "restart": "restart.inf",
         "run": "slurm.run",
+        "pid": "zacros.pid",
+        "cancel": "zacros.cancel",
         "err": "std.err",
         "out": "std.out",
     }
+    _input_store = "zacros_input_store"
+    cache = None  # ZacrosCache shared by all jobs. It is disabled by default
+    __signal_lock = threading.Lock()  # Serializes stop() with the end of the Zacros processes
 
     def __init__(self, lattice, mechanism, cluster_expansion, initial_state=None, restart=None, **kwargs):
 
@@ -149,6 +168,29 @@ class ZacrosJob(scm.plams.SingleJob):
         """
         return str(self)
 
+    def hash_input(self):
+        """
+        Returns the SHA-256 hash of the input of the job. It is equivalent to hash ``get_input()``, but it is computed
+        from the cached fingerprints of the lattice, cluster expansion, mechanism, and initial state. So, only
+        ``simulation_input.dat`` is generated again for every call. For restarts, the command line options given by
+        ``settings.restart`` are included as well, since they change the output for the same input files.
+        """
+        fingerprints = [hashlib.sha256(self.get_simulation_input().encode()).hexdigest()]
+        fingerprints.append(self.lattice.fingerprint())
+        fingerprints.append(self.cluster_expansion.fingerprint())
+        fingerprints.append(self.mechanism.fingerprint())
+        fingerprints.append(self.initial_state.fingerprint() if self.initial_state is not None else "")
+
+        if self._restart_file_content is not None:
+            restart_hash = self.__dict__.get("_ZacrosJob__restart_hash")
+            if restart_hash is None:
+                restart_hash = hashlib.sha256(self.get_restart_input().encode()).hexdigest()
+                self.__restart_hash = restart_hash
+            fingerprints.append(restart_hash)
+            fingerprints.append(self.__restart_options())
+
+        return hashlib.sha256(" ".join(fingerprints).encode()).hexdigest()
+
     def get_simulation_input(self):
         """
         Return a string with the content of simulation_input.dat.
@@ -251,8 +293,7 @@ class ZacrosJob(scm.plams.SingleJob):
         """
         output = ""
         if self._restart_file_content is not None:
-            for line in self._restart_file_content:
-                output += line
+            output = "".join(self._restart_file_content)
         return output
 
     def run(
@@ -264,7 +305,9 @@ class ZacrosJob(scm.plams.SingleJob):
         """
         Run the job. Raises a ``ZacrosExecutableNotFoundError`` if the Zacros executable cannot be found.
         """
-        self._check_zacros_executable()
+        # Jobs restored from the cache do not need the Zacros executable
+        if ZacrosJob.cache is None or self not in ZacrosJob.cache:
+            self._check_zacros_executable()
         return super().run(jobrunner, jobmanager, **kwargs)
 
     @classmethod
@@ -277,6 +320,10 @@ class ZacrosJob(scm.plams.SingleJob):
         """
         Look for the normal termination signal in the output. Note, that it does not mean your calculation was successful!
         """
+        # The output of a job stopped on purpose is valid up to the point it was stopped
+        if self.stopped():
+            return True
+
         try:
             lines = self.results.grep_file(self.results._filenames["general"], pattern="> Normal termination <")
             return len(lines) > 0
@@ -285,8 +332,12 @@ class ZacrosJob(scm.plams.SingleJob):
 
     def surface_poisoned(self):
         """
-        Returns true in the case the "Warning code 801002" is find in the output.
+        Returns true in the case the "Warning code 801002" is find in the output, or the job was stopped because the
+        surface was poisoned (see ``settings.poisoning``).
         """
+        if self.__dict__.get("_ZacrosJob__poisoned", False):
+            return True
+
         lines = self.results.grep_file(
             self.results._filenames["general"],
             pattern="Warning code 801002 .* this may indicate that the surface is poisoned",
@@ -300,6 +351,63 @@ class ZacrosJob(scm.plams.SingleJob):
         lines = self.results.grep_file(self.results._filenames["general"], pattern="Restart aborted:")
         return len(lines) > 0
 
+    def stopped(self):
+        """
+        Returns true in the case the job was stopped with ``stop()``.
+        """
+        return self.__dict__.get("_ZacrosJob__stopped", False)
+
+    def stop(self, poisoned=False):
+        """
+        Stops the Zacros process of a running job, e.g., once the steady-state is reached. The output files written so
+        far are kept, and the job is considered finished successfully. If Zacros has not started yet, e.g., the job is
+        waiting for free cores, the job is cancelled and Zacros is not executed at all. Only
+        jobs executed on the local machine can be stopped. Returns True if the job was signaled or cancelled.
+
+        *   ``poisoned`` -- If True, the job is marked as poisoned (see ``surface_poisoned()``).
+        """
+        if self.results.done.is_set():
+            return False
+
+        # The pid file is removed under the same lock once the process finishes, so it is never signaled afterwards
+        with ZacrosJob.__signal_lock:
+            if self.__dict__.get("_ZacrosJob__finished", False):
+                return False
+
+            pid = self.__read_pid()
+
+            if pid is None:
+                # Zacros has not started yet. _execute() checks this flag before running the job, and the run script
+                # checks the cancel file in case _execute() is already waiting for the job runner
+                self.__cancelled = True
+                if self.path is not None and os.path.isdir(self.path):
+                    open(os.path.join(self.path, ZacrosJob._filenames["cancel"]), "w").close()
+
+                # The run script writes the pid before checking the cancel file, so it may have started meanwhile
+                pid = self.__read_pid()
+
+            if pid is not None:
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                except OSError:
+                    return False
+
+            self.__stopped = True
+            if poisoned:
+                self.__poisoned = True
+
+        return True
+
+    def __read_pid(self):
+        """
+        Returns the pid of the Zacros process written by the run script, or None if it is not running.
+        """
+        try:
+            with open(os.path.join(self.path, ZacrosJob._filenames["pid"]), "r") as inp:
+                return int(inp.read())
+        except (TypeError, OSError, ValueError):
+            return None
+
     def get_runscript(self):
         """
         Generate a runscript for slurm
@@ -315,7 +423,23 @@ class ZacrosJob(scm.plams.SingleJob):
         ret += "\n"
         ret += "export OMP_NUM_THREADS=" + str(s.get("nproc", 1))
         ret += "\n"
-        ret += self._executable_path
+        # The shell is replaced by Zacros, so the process can be signaled by stop()
+        ret += "echo $$ > " + ZacrosJob._filenames["pid"] + "\n"
+        ret += "[ -f " + ZacrosJob._filenames["cancel"] + " ] && exit 0\n"
+        ret += "exec " + self._executable_path
+        ret += self.__restart_options()
+
+        if s.stdout_redirect:
+            ret += ' >"{}"'.format(ZacrosJob._filenames["out"])
+        ret += "\n"
+
+        return ret
+
+    def __restart_options(self):
+        """
+        Returns the command line options of Zacros given by ``settings.restart``, which are only used for restarts.
+        """
+        ret = ""
 
         if self._restart_file_content is not None and "restart" in self.settings:
             if "max_time" in self.settings["restart"]:
@@ -325,16 +449,13 @@ class ZacrosJob(scm.plams.SingleJob):
             if "wall_time" in self.settings["restart"]:
                 ret += " --wall_time=" + str(self.settings.restart.wall_time)
 
-        if s.stdout_redirect:
-            ret += ' >"{}"'.format(ZacrosJob._filenames["out"])
-        ret += "\n"
-
         return ret
 
     def _get_ready(self):
         """
         Create inputs and runscript files in the job folder.
-        Filenames correspond to entries in the `_filenames` attribute
+        Filenames correspond to entries in the `_filenames` attribute.
+        If the job is found in ``ZacrosJob.cache``, its output files are restored instead of creating the runscript.
         """
         simulation = os.path.join(self.path, ZacrosJob._filenames["simulation"])
         lattice = os.path.join(self.path, ZacrosJob._filenames["lattice"])
@@ -350,28 +471,150 @@ class ZacrosJob(scm.plams.SingleJob):
         with open(simulation, "w") as inp:
             inp.write(self.get_simulation_input())
 
-        with open(lattice, "w") as inp:
-            inp.write(self.get_lattice_input())
-
-        with open(energetics, "w") as inp:
-            inp.write(self.get_energetics_input())
-
-        with open(mechanism, "w") as inp:
-            inp.write(self.get_mechanism_input())
+        # Components usually shared by many jobs, e.g., the children of a parameters scan, are linked from the store
+        self.__write_shared(self.lattice, lattice)
+        self.__write_shared(self.cluster_expansion, energetics)
+        self.__write_shared(self.mechanism, mechanism)
 
         if self.initial_state is not None:
-            with open(state, "w") as inp:
-                inp.write(self.get_initial_state_input())
+            self.__write_shared(self.initial_state, state)
 
         if self._restart_file_content is not None:
             with open(restart, "w") as inp:
-                inp.write(self.get_restart_input())
+                inp.writelines(self._restart_file_content)
+
+        self.__restored = ZacrosJob.cache is not None and ZacrosJob.cache.restore(self)
+        if self.__restored:
+            scm.plams.log("Job {} restored from the cache {}".format(self.name, ZacrosJob.cache.path), 3)
+            return
 
         with open(runfile, "w") as run:
             run.write(self.get_runscript())
 
         os.chmod(runfile, os.stat(runfile).st_mode | stat.S_IEXEC)
 
+    def _execute(self, jobrunner):
+        """
+        Executes the run script, unless the output files were restored from the cache. If the job was stopped with
+        ``stop()``, its output files are truncated to the last complete entries. Poisoned surfaces are detected while
+        Zacros is running if ``settings.poisoning`` is set. Jobs cancelled with ``stop()`` before Zacros started are
+        not executed.
+        """
+        with ZacrosJob.__signal_lock:
+            if self.__dict__.get("_ZacrosJob__cancelled", False):
+                scm.plams.log("JOB " + self._full_name() + " CANCELLED", 3)
+                return
+
+            # Zacros is not executed for jobs restored from the cache, so they cannot be stopped
+            if self.__dict__.get("_ZacrosJob__restored", False):
+                self.__finished = True
+
+        if not self.__dict__.get("_ZacrosJob__restored", False):
+            monitor = None
+            if "poisoning" in self.settings:
+                monitor = ZacrosMonitor(
+                    self,
+                    callback=self.__stop_if_poisoned,
+                    interval=self.settings.poisoning.get("interval", default=10.0),
+                    poisoning_window=self.settings.poisoning.window,
+                    saturation=self.settings.poisoning.get("saturation", default=0.99),
+                )
+                monitor.start()
+
+            super()._execute(jobrunner)
+
+            with ZacrosJob.__signal_lock:
+                self.__finished = True
+                try:
+                    os.remove(os.path.join(self.path, ZacrosJob._filenames["pid"]))
+                except OSError:
+                    pass
+
+            if monitor is not None:
+                monitor.stop()
+
+            if self.stopped():
+                if self.status == "crashed":
+                    self.status = "running"
+                self.__truncate_output()
+
+    def __stop_if_poisoned(self, status):
+        """
+        Stops the job if the ZacrosMonitor ``status`` reports a poisoned surface.
+        """
+        if status.get("poisoned", False) and not self.stopped():
+            scm.plams.log("JOB " + self._full_name() + " SURFACE POISONED. STOPPING")
+            self.stop(poisoned=True)
+
+    def __truncate_output(self):
+        """
+        Removes the incomplete last line of ``specnum_output.txt`` and the incomplete last configuration of
+        ``procstat_output.txt``, which are left if Zacros is stopped while writing them.
+        """
+        for key in ["specnum", "procstat"]:
+            path = os.path.join(self.path, self.results._filenames[key])
+            if not os.path.isfile(path):
+                continue
+
+            with open(path, "rb+") as inp:
+                lines = inp.read().split(b"\n")[:-1]
+
+                # Every configuration of procstat_output.txt has three lines
+                if key == "procstat":
+                    blocks = [i for i, line in enumerate(lines) if line.split()[:1] == [b"configuration"]]
+                    if len(blocks) > 0 and blocks[-1] + 3 > len(lines):
+                        lines = lines[: blocks[-1]]
+
+                inp.truncate(sum(len(line) + 1 for line in lines))
+
+    def postrun(self):
+        """
+        Stores the output files in ``ZacrosJob.cache`` if it is enabled.
+        """
+        restored = self.__dict__.get("_ZacrosJob__restored", False)
+        if ZacrosJob.cache is not None and not restored and not self.stopped():
+            ZacrosJob.cache.store(self)
+
+    def __write_shared(self, component, path):
+        """
+        Writes the input file of ``component`` (Lattice, ClusterExpansion, Mechanism, or LatticeState) at ``path``.
+        The content is stored once in the folder ``_input_store`` of the job manager working directory, named after the
+        fingerprint of the component, and ``path`` is created as a hardlink to it. If hardlinks are not supported, a
+        symbolic link or a copy is used instead. If ``_input_store`` is None, the file is written directly.
+        """
+        jobmanager = getattr(self, "jobmanager", None)
+
+        if ZacrosJob._input_store is None or jobmanager is None:
+            # Large components are streamed directly to the files instead of building the whole string first
+            with open(path, "w") as inp:
+                component.write_to(inp)
+            return
+
+        store = os.path.join(jobmanager.workdir, ZacrosJob._input_store)
+        os.makedirs(store, exist_ok=True)
+
+        # The fingerprint is cached by the component, e.g., after hash_input(), so the file is only written once. It
+        # is streamed to a temporary file moved to its final name once complete, so concurrent jobs never link a
+        # partial file
+        name = os.path.basename(path)
+        stored = os.path.join(store, component.fingerprint() + "_" + name)
+        if not os.path.isfile(stored):
+            partial = os.path.join(store, name + "." + str(os.getpid()) + "." + str(threading.get_ident()))
+            with open(partial, "w") as inp:
+                component.write_to(inp)
+            os.replace(partial, stored)
+
+        if os.path.lexists(path):
+            os.remove(path)
+
+        try:
+            os.link(stored, path)
+        except OSError:
+            try:
+                os.symlink(stored, path)
+            except OSError:
+                shutil.copyfile(stored, path)
+
     def __str__(self):
         """
         Translate the object to a string.
@@ -413,8 +656,7 @@ class ZacrosJob(scm.plams.SingleJob):
             output += "---------------------------------------------------------------------" + "\n"
             output += ZacrosJob._filenames["restart"] + "\n"
             output += "---------------------------------------------------------------------" + "\n"
-            for line in self._restart_file_content:
-                output += line
+            output += self.get_restart_input()
 
         return output
 
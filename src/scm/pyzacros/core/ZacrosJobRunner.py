@@ -0,0 +1,105 @@
+"""Module containing the ZacrosJobRunner class."""
+
+import os
+import threading
+import subprocess
+import collections
+
+import scm.plams
+
+__all__ = ["ZacrosJobRunner"]
+
+
+class ZacrosJobRunner(scm.plams.JobRunner):
+    """
+    Creates a new ZacrosJobRunner object, which is a parallel local job runner aware of the number of cores used by
+    every job. Jobs are started as soon as there are enough free cores for them, so the machine is neither idle nor
+    oversubscribed, even if jobs use a different number of cores. Jobs get the cores in the order they arrive: the cores
+    released while the first waiting job does not fit are reserved for it, so large jobs are not delayed indefinitely by
+    smaller ones. Since smaller jobs are not started in the reserved cores (no backfilling), some cores may be idle
+    while a large job waits, so submit the large jobs first if the throughput matters. The number of cores of each
+    job is taken from its ``OMP_NUM_THREADS``, i.e., ``settings.runscript.nproc`` for ZacrosJobs, or the run keyword
+    argument ``nproc``, e.g., ``job.run(nproc=4)``. It can be used for single ZacrosJobs as well as for the children
+    of MultiJobs like ZacrosSteadyStateJob or ZacrosParametersScanJob, e.g.,
+    ``scm.plams.config.default_jobrunner = ZacrosJobRunner()``.
+
+    *   ``ncores`` -- Number of cores to share among the jobs. By default, all cores available to the current process. If it is larger than that, some cores are shared by several jobs.
+    *   ``affinity`` -- If True, every job is pinned to its cores. It is only supported on Linux.
+    *   ``maxthreads`` -- Maximum number of threads, which is also the maximum number of jobs waiting for free cores. See the PLAMS JobRunner class.
+    """
+
+    def __init__(self, ncores=None, affinity=False, maxthreads=256):
+        scm.plams.JobRunner.__init__(self, parallel=True, maxjobs=0, maxthreads=maxthreads)
+
+        if hasattr(os, "sched_getaffinity"):
+            available = sorted(os.sched_getaffinity(0))
+        else:
+            available = list(range(os.cpu_count()))
+
+        if ncores is None:
+            ncores = len(available)
+
+        self.ncores = ncores
+        self.affinity = affinity
+
+        self.__free_cores = [available[i % len(available)] for i in range(ncores)]
+        self.__condition = threading.Condition()
+        self.__waiting = collections.deque()
+
+    def __nproc(self, runscript, workdir, runflags):
+        """
+        Returns the number of cores required by the runscript.
+        """
+        if "nproc" in runflags:
+            return int(runflags.nproc)
+
+        with open(os.path.join(workdir, runscript), "r") as inp:
+            for line in inp:
+                if line.startswith("export OMP_NUM_THREADS="):
+                    return int(line.split("=")[1])
+
+        return 1
+
+    def call(self, runscript, workdir, out, err, runflags):
+        """
+        Executes the ``runscript`` in the folder ``workdir`` as soon as there are enough free cores for it and every
+        job that arrived before it has started. Redirects output and error streams to ``out`` and ``err``,
+        respectively. Returns the exit code of the ``runscript``. See the PLAMS JobRunner class.
+        """
+        nproc = min(max(self.__nproc(runscript, workdir, runflags), 1), self.ncores)
+
+        with self.__condition:
+            ticket = object()
+            self.__waiting.append(ticket)
+            self.__condition.wait_for(lambda: self.__waiting[0] is ticket and len(self.__free_cores) >= nproc)
+            self.__waiting.popleft()
+            cores = self.__free_cores[:nproc]
+            del self.__free_cores[:nproc]
+
+            # The next waiting job may fit in the remaining cores
+            self.__condition.notify_all()
+
+        try:
+            scm.plams.log("Executing {} on cores {}".format(runscript, cores), 5)
+
+            command = ["./" + runscript] if os.name == "posix" else ["sh", runscript]
+
+            preexec_fn = None
+            if self.affinity and hasattr(os, "sched_setaffinity"):
+                preexec_fn = lambda: os.sched_setaffinity(0, set(cores))
+
+            with open(os.path.join(workdir, err), "w") as e:
+                if out is not None:
+                    with open(os.path.join(workdir, out), "w") as o:
+                        process = subprocess.run(command, cwd=workdir, stderr=e, stdout=o, preexec_fn=preexec_fn)
+                else:
+                    process = subprocess.run(command, cwd=workdir, stderr=e, preexec_fn=preexec_fn)
+
+            scm.plams.log("Execution of {} finished with returncode {}".format(runscript, process.returncode), 5)
+
+        finally:
+            with self.__condition:
+                self.__free_cores.extend(cores)
+                self.__condition.notify_all()
+
+        return process.returncode
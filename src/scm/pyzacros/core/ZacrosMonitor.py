@@ -0,0 +1,240 @@
+"""Module containing the ZacrosMonitor class."""
+
+import os
+import time
+import bisect
+import threading
+
+__all__ = ["ZacrosMonitor"]
+
+
+class ZacrosMonitor:
+    """
+    Creates a new ZacrosMonitor object, which follows the progress of a running ZacrosJob by tailing its
+    ``specnum_output.txt`` and ``procstat_output.txt`` files. Every poll only reads the bytes appended since the
+    previous one, so the overhead is negligible even for long simulations. The monitor can be polled explicitly with
+    ``poll()``, or run in a background thread with ``start()``, which polls every ``interval`` seconds until the job
+    finishes, e.g.::
+
+        job = ZacrosJob( ... )
+        monitor = ZacrosMonitor(job, callback=lambda status: print(status["time"], status["coverages"]))
+        monitor.start()
+        job.run()
+
+    *   ``job`` -- ZacrosJob to follow. It can be started before or after the monitor.
+    *   ``callback`` -- Function called with the ``status`` dictionary every time new data is found.
+    *   ``interval`` -- Time in seconds between two polls of the background thread.
+    *   ``poisoning_window`` -- If not None, the surface is considered poisoned if the fraction of occupied sites is at least ``saturation`` and the number of gas molecules does not change during the last ``poisoning_window`` seconds of simulated time.
+    *   ``saturation`` -- Minimum fraction of occupied sites of a poisoned surface.
+    """
+
+    _fixed_columns = ["Entry", "Nevents", "Time", "Temperature", "Energy"]
+
+    def __init__(self, job, callback=None, interval=1.0, poisoning_window=None, saturation=0.99):
+        self.job = job
+        self.callback = callback
+        self.interval = interval
+        self.poisoning_window = poisoning_window
+        self.saturation = saturation
+
+        self.status = {}
+        self.specnum = None
+
+        self.__tails = {}
+        self.__names = None
+        self.__denticities = None
+        self.__steps = None
+        self.__procstat_lines = []
+        self.__last_poll = None
+        self.__stop = threading.Event()
+        self.__thread = None
+
+    def __new_lines(self, filename):
+        """
+        Returns the lines completed in the file ``filename`` of the job folder since the previous call.
+        """
+        if self.job.path is None:
+            return []
+
+        path = os.path.join(self.job.path, filename)
+        offset, partial = self.__tails.get(filename, (0, b""))
+
+        try:
+            with open(path, "rb") as inp:
+                inp.seek(offset)
+                data = inp.read()
+        except OSError:
+            return []
+
+        lines = (partial + data).split(b"\n")
+        self.__tails[filename] = (offset + len(data), lines[-1])
+
+        return [line.decode() for line in lines[:-1] if line.strip()]
+
+    def __read_specnum(self):
+        """
+        Appends the new rows of ``specnum_output.txt`` to ``specnum``. Returns True if there were new rows.
+        """
+        lines = self.__new_lines(self.job.results._filenames["specnum"])
+
+        if self.__names is None and len(lines) > 0:
+            if lines[0].split()[0] == "Entry":
+                self.__names = lines.pop(0).split()
+            elif self.job.restart is not None:
+                self.__names = self.job.restart.results.provided_quantities_names()
+            else:
+                return False
+
+            self.specnum = {name: [] for name in self.__names}
+
+        for line in lines:
+            for name, token in zip(self.__names, line.split()):
+                value = float(token) if name in ["Time", "Temperature", "Energy"] else int(token)
+                self.specnum[name].append(value)
+
+        return len(lines) > 0
+
+    def __read_procstat(self):
+        """
+        Updates the number of events of each elementary step from ``procstat_output.txt``. Returns True if there was
+        a new complete block.
+        """
+        updated = False
+
+        for line in self.__new_lines(self.job.results._filenames["procstat"]):
+            tokens = line.split()
+
+            if tokens[0] == "Overall":
+                self.__steps = tokens[1:]
+                continue
+
+            if tokens[0] == "configuration":
+                self.__procstat_lines = [tokens]
+            elif len(self.__procstat_lines) > 0:
+                self.__procstat_lines.append(tokens)
+
+            if len(self.__procstat_lines) == 3 and self.__steps is not None:
+                events = self.__procstat_lines[2][1:]
+                self.status["number_of_events"] = {step: int(n) for step, n in zip(self.__steps, events)}
+                self.__procstat_lines = []
+                updated = True
+
+        return updated
+
+    def __occupied_sites(self, row):
+        """
+        Returns the fraction of occupied sites in the row ``row`` of ``specnum``.
+        """
+        if self.__denticities is None:
+            species = self.job.mechanism.species()
+            species.extend(self.job.cluster_expansion.surface_species())
+            self.__denticities = {sp.symbol: sp.denticity for sp in species}
+
+        occupied = 0
+        for name in self.__names:
+            if "*" in name:
+                occupied += self.specnum[name][row] * self.__denticities.get(name, name.count("*"))
+
+        return occupied / self.job.lattice.number_of_sites()
+
+    def __poisoned(self):
+        """
+        Returns True if the surface was saturated and the number of gas molecules did not change during the last
+        ``poisoning_window`` seconds of simulated time.
+        """
+        times = self.specnum["Time"]
+
+        first = bisect.bisect_right(times, times[-1] - self.poisoning_window) - 1
+        if first < 0:
+            return False
+
+        for name in self.__names:
+            if name not in ZacrosMonitor._fixed_columns and "*" not in name:
+                if any(value != self.specnum[name][first] for value in self.specnum[name][first:]):
+                    return False
+
+        return all(self.__occupied_sites(row) >= self.saturation for row in range(first, len(times)))
+
+    def poll(self):
+        """
+        Reads the new data of the output files and updates ``status``, which contains the following keys:
+
+        *   ``"time"`` -- Simulated time in seconds.
+        *   ``"nevents"`` -- Total number of events.
+        *   ``"events_per_second"`` -- Number of events per second of wall time since the previous poll with new data.
+        *   ``"coverages"`` -- Current coverage fractions, e.g., ``{ "CO*":0.32, "O*":0.45 }``.
+        *   ``"progress"`` -- Fraction of ``max_time`` already simulated, if it is set in the job settings.
+        *   ``"number_of_events"`` -- Number of events of each elementary step at the last ``procstat_output.txt`` configuration.
+        *   ``"occupied_sites"`` -- Current fraction of occupied sites.
+        *   ``"poisoned"`` -- True if the surface is poisoned. Only if ``poisoning_window`` is not None.
+
+        Returns True if new data was found. In such a case, ``callback`` is called with ``status``.
+        """
+        now = time.time()
+
+        previous_nevents = self.status.get("nevents")
+        updated = self.__read_specnum()
+
+        if updated:
+            self.status["time"] = self.specnum["Time"][-1]
+            self.status["nevents"] = self.specnum["Nevents"][-1]
+
+            if previous_nevents is not None and now > self.__last_poll:
+                new_events = self.status["nevents"] - previous_nevents
+                self.status["events_per_second"] = new_events / (now - self.__last_poll)
+
+            n_sites = self.job.lattice.number_of_sites()
+            self.status["coverages"] = {name: self.specnum[name][-1] / n_sites for name in self.__names if "*" in name}
+            self.status["occupied_sites"] = self.__occupied_sites(-1)
+
+            if self.poisoning_window is not None:
+                self.status["poisoned"] = self.__poisoned()
+
+            if "max_time" in self.job.settings and isinstance(self.job.settings.max_time, (int, float)):
+                self.status["progress"] = min(self.status["time"] / self.job.settings.max_time, 1.0)
+
+            self.__last_poll = now
+
+        updated = self.__read_procstat() or updated
+
+        if updated and self.callback is not None:
+            self.callback(self.status)
+
+        return updated
+
+    def __run(self):
+        """
+        Polls the output files until the job finishes or the monitor is stopped.
+        """
+        while not self.__stop.is_set():
+            finished = self.job.results.finished.is_set()
+            self.poll()
+
+            if finished:
+                break
+
+            self.__stop.wait(self.interval)
+
+    def start(self):
+        """
+        Starts polling the output files in a background thread.
+        """
+        self.__stop.clear()
+        self.__thread = threading.Thread(name="zacrosmonitor", target=self.__run, daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        """
+        Stops the background thread.
+        """
+        self.__stop.set()
+
+        if self.__thread is not None and self.__thread is not threading.current_thread():
+            self.__thread.join()
+
+    def join(self, timeout=None):
+        """
+        Waits until the background thread finishes, i.e., until the job finishes or the monitor is stopped.
+        """
+        if self.__thread is not None:
+            self.__thread.join(timeout)
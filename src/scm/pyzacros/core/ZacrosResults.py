@@ -316,76 +316,209 @@ class ZacrosResults(scm.plams.Results):
                     + ")"
                 )
 
+        mechanism_species = self.job.mechanism.surface_species()
+        cluster_expansion_species = self.job.cluster_expansion.surface_species()
+
         surface_species = len(surface_species_names) * [None]
         for i, sname in enumerate(surface_species_names):
-            for sp in self.job.mechanism.surface_species():
-                if sname == sp.symbol:
-                    surface_species[i] = sp
-
-            if surface_species[i] is None:
-                for sp in self.job.cluster_expansion.surface_species():
-                    if sname == sp.symbol:
-                        surface_species[i] = sp
+            loc_id = mechanism_species.symbol_index(sname)
+            if loc_id is not None:
+                surface_species[i] = mechanism_species[loc_id]
+            else:
+                loc_id = cluster_expansion_species.symbol_index(sname)
+                if loc_id is not None:
+                    surface_species[i] = cluster_expansion_species[loc_id]
         surface_species = SpeciesList(surface_species)
 
-        lines = self.grep_file(
-            self._filenames["history"], pattern="configuration", options="-A" + str(number_of_lattice_sites)
-        )
-        lines = [line for line in lines if line != "--"]
-        for nconf in range(max(0, number_of_snapshots_to_load - llast), number_of_snapshots_to_load):
-            start = nconf * (number_of_lattice_sites + 1)
-            end = (nconf + 1) * (number_of_lattice_sites + 1)
-            conf_lines = lines[start:end]
-
-            lattice_state = None
-            lattice_state_buffer = {}  # key=adsorbate_number
-            for nline, line in enumerate(conf_lines):
+        first = max(0, number_of_snapshots_to_load - llast)
+        for nconf, (add_info, species_idx, entity_idx) in enumerate(self._snapshots(start=first), start=first):
+            if nconf >= number_of_snapshots_to_load:
+                break
+
+            lattice_state = LatticeState.from_arrays(
+                self.job.lattice, surface_species, species_idx, entity_idx, add_info=add_info
+            )
+            output.append(lattice_state)
+
+        return output
+
+    def _snapshots(self, start=0):
+        """
+        Iterates over the configurations from the 'history_output.txt' file, reading one at a time. It yields a tuple
+        ``(add_info, species_idx, entity_idx)`` for each one, with the arrays used by ``LatticeState.from_arrays()``.
+
+        *   ``start`` -- Number of configurations to skip at the beginning of the file. They are not parsed.
+        """
+        filename = self._filenames["history"]
+        if filename not in self.files:
+            raise scm.plams.FileError("File {} not present in {}".format(filename, self.job.path))
+
+        number_of_lattice_sites = self.number_of_lattice_sites()
+        surface_species_names = self.surface_species_names()
+
+        nconf = -1
+        with open(os.path.join(self.job.path, filename), "r") as inp:
+            for line in inp:
+                if not line.startswith("configuration"):
+                    continue
+
+                nconf += 1
+                conf_lines = [next(inp, None) for i in range(number_of_lattice_sites)]
+
+                # The file may be truncated if Zacros is still running or it was killed. In that case, it stops at
+                # the last complete configuration
+                if None in conf_lines or not conf_lines[-1].endswith("\n"):
+                    return
+
+                if nconf < start:
+                    continue
+
                 tokens = line.split()
 
-                if nline == 0:
-                    assert tokens[0] == "configuration"
+                add_info = {
+                    "number_of_events": int(tokens[2]),
+                    "time": float(tokens[3]),
+                    "temperature": float(tokens[4]),
+                    "energy": float(tokens[5]),
+                }
 
-                    configuration_number = int(tokens[1])
-                    number_of_events = int(tokens[2])
-                    time = float(tokens[3])
-                    temperature = float(tokens[4])
-                    energy = float(tokens[5])
-
-                    add_info = {
-                        "number_of_events": number_of_events,
-                        "time": time,
-                        "temperature": temperature,
-                        "energy": energy,
-                    }
-                    lattice_state = LatticeState(self.job.lattice, surface_species, add_info=add_info)
-                else:
-                    site_number = int(tokens[0]) - 1  # Zacros uses arrays indexed from 1
-                    adsorbate_number = int(tokens[1])
-                    species_number = int(tokens[2]) - 1  # Zacros uses arrays indexed from 1
-                    dentation = int(tokens[3])
-
-                    if species_number > -1:  # In pyzacros -1 means empty site (0 for Zacros)
-                        if adsorbate_number not in lattice_state_buffer:
-                            lattice_state_buffer[adsorbate_number] = [[site_number], species_number, dentation]
-                        else:
-                            lattice_state_buffer[adsorbate_number][0].append(site_number)
-                            if dentation > lattice_state_buffer[adsorbate_number][2]:
-                                lattice_state_buffer[adsorbate_number][2] = dentation
+                # Columns: site_number, adsorbate_number, species_number, dentation
+                data = numpy.array(" ".join(conf_lines).split(), dtype=numpy.int64).reshape(-1, 4)
 
-            for key, item in lattice_state_buffer.items():
-                if len(item[0]) != item[2]:
+                site_number = data[:, 0] - 1  # Zacros uses arrays indexed from 1
+                species_idx = numpy.full(number_of_lattice_sites, -1, dtype=numpy.int64)
+                entity_idx = numpy.full(number_of_lattice_sites, -1, dtype=numpy.int64)
+                species_idx[site_number] = data[:, 2] - 1  # In pyzacros -1 means empty site (0 for Zacros)
+
+                filled = data[:, 2] > 0
+                entity_idx[site_number[filled]] = data[filled, 1]
+
+                adsorbates, inverse = numpy.unique(data[filled, 1], return_inverse=True)
+                dentation = numpy.zeros(len(adsorbates), dtype=numpy.int64)
+                numpy.maximum.at(dentation, inverse, data[filled, 3])
+                wrong = numpy.flatnonzero(numpy.bincount(inverse, minlength=len(adsorbates)) != dentation)
+
+                if len(wrong) > 0:
+                    species_number = data[filled, 2][inverse == wrong[0]][0] - 1
                     msg = "Format error reading lattice state. Species' dentation is not compatible with the number of associated binding sites.\n"
-                    msg += ">> adsorbate_number=" + str(key) + ", site_number=" + str(site_number) + "\n"
-                    msg += ">> species=" + str(surface_species[item[1]]) + ", dentation=" + str(dentation) + "\n"
+                    msg += ">> adsorbate_number=" + str(adsorbates[wrong[0]]) + "\n"
+                    msg += ">> species=" + surface_species_names[species_number]
+                    msg += ", dentation=" + str(dentation[wrong[0]]) + "\n"
                     raise Exception(msg)
-                lattice_state.fill_site(item[0], surface_species[item[1]], update_species_numbers=False)
 
-            if lattice_state is not None:
-                lattice_state._updateSpeciesNumbers()
+                yield add_info, species_idx, entity_idx
 
-            output.append(lattice_state)
+    def site_occupancy(self):
+        """
+        Returns statistics about the occupation of each site, accumulated while reading the configurations from the
+        'history_output.txt' file one at a time. The state of the lattice is assumed to be the one of the last
+        configuration until the next one, so the statistics are limited by the snapshots' sampling. It returns a
+        dictionary with the following keys:
+
+        *   ``"surface_species"`` -- Names of the surface species, which determine the order of the columns of the arrays.
+        *   ``"time"`` -- Total time covered by the configurations.
+        *   ``"occupancy"`` -- Array with shape ``(n_sites, n_species)`` with the fraction of time each site is occupied by each species.
+        *   ``"residence_time"`` -- Array with shape ``(n_sites, n_species)`` with the mean time each species stays on each site. Only adsorbates leaving the site before the last configuration are considered, and it is ``nan`` if there are none.
+        *   ``"residences"`` -- Array with shape ``(n_sites, n_species)`` with the number of adsorbates used to compute ``"residence_time"``.
+        """
+        number_of_lattice_sites = self.number_of_lattice_sites()
+        surface_species_names = self.surface_species_names()
+        nspecies = len(surface_species_names)
+
+        sites = numpy.arange(number_of_lattice_sites)
+        occupied_time = numpy.zeros((number_of_lattice_sites, nspecies))
+        residence_time = numpy.zeros((number_of_lattice_sites, nspecies))
+        residences = numpy.zeros((number_of_lattice_sites, nspecies), dtype=numpy.int64)
+
+        first_time = None
+        prev_time = None
+        prev_species_idx = None
+        prev_entity_idx = None
+        since = None
+        for add_info, species_idx, entity_idx in self._snapshots():
+            time = add_info["time"]
+
+            if prev_species_idx is None:
+                first_time = time
+                since = numpy.full(number_of_lattice_sites, time)
+            else:
+                filled = prev_species_idx >= 0
+                numpy.add.at(occupied_time, (sites[filled], prev_species_idx[filled]), time - prev_time)
+
+                changed = (species_idx != prev_species_idx) | (entity_idx != prev_entity_idx)
+                left = changed & filled
+                numpy.add.at(residence_time, (sites[left], prev_species_idx[left]), time - since[left])
+                numpy.add.at(residences, (sites[left], prev_species_idx[left]), 1)
+                since[changed] = time
+
+            prev_time = time
+            prev_species_idx = species_idx
+            prev_entity_idx = entity_idx
+
+        total_time = prev_time - first_time if prev_time is not None else 0.0
+
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            occupancy = occupied_time / total_time if total_time > 0.0 else occupied_time
+            residence_time = numpy.where(residences > 0, residence_time / residences, numpy.nan)
+
+        return {
+            "surface_species": surface_species_names,
+            "time": total_time,
+            "occupancy": occupancy,
+            "residence_time": residence_time,
+            "residences": residences,
+        }
+
+    def plot_site_occupancy(
+        self, species_name, quantity="occupancy", pause=-1, show=True, ax=None, close=False, file_name=None
+    ):
+        """
+        Uses Matplotlib to create a heatmap of the statistics about the occupation of each site (see ``site_occupancy()``)
+        drawn over the lattice.
 
-        return output
+        *   ``species_name`` -- Name of the species to show, e.g., ``"CO*"``
+        *   ``quantity`` -- Quantity to show: ``"occupancy"``, ``"residence_time"`` or ``"residences"``.
+        *   ``pause`` -- After showing the figure, it will wait ``pause``-seconds before refreshing. This can be used for crude animation.
+        *   ``show`` -- Enables showing the figure on the screen.
+        *   ``ax`` -- The axes of the plot. It contains most of the figure elements: Axis, Tick, Line2D, Text, Polygon, etc., and sets the coordinate system. See `matplotlib.axes <https://matplotlib.org/stable/api/axes_api.html#id2>`_.
+        *   ``close`` -- Closes the figure window after pause time.
+        *   ``file_name`` -- Saves the figure to the file ``file_name``. The format is inferred from the extension, and by default, ``.png`` is used.
+        """
+        try:
+            import matplotlib.pyplot as plt
+        except ImportError as e:
+            return  # module doesn't exist, deal with it.
+
+        if ax is None:
+            fig, ax = plt.subplots()
+
+        statistics = self.site_occupancy()
+        values = statistics[quantity][:, statistics["surface_species"].index(species_name)]
+
+        self.job.lattice.plot(show=False, ax=ax, close=False, color="0.8")
+
+        coordinates = numpy.array(self.job.lattice.site_coordinates)
+        heatmap = ax.scatter(
+            coordinates[:, 0],
+            coordinates[:, 1],
+            c=values,
+            cmap="viridis",
+            s=450 / numpy.sqrt(len(coordinates)),
+            zorder=4,
+        )
+        plt.colorbar(heatmap, ax=ax, label=species_name + " " + quantity.replace("_", " "))
+
+        if file_name is not None:
+            plt.savefig(file_name)
+
+        if show:
+            if pause == -1:
+                plt.show()
+            else:
+                plt.pause(pause)
+
+        if close:
+            plt.close("all")
 
     def last_lattice_state(self):
         """
@@ -919,41 +1052,52 @@ class ZacrosResults(scm.plams.Results):
         Here the convergence criteria is :math:`\\epsilon=1-\\text{confidence}`
 
         """
-        values = {}
-        errors = {}
-        ratios = {}
-        converged = {}
-
         lprovided_quantities = provided_quantities
         if provided_quantities is None:
             lprovided_quantities = self.provided_quantities()
 
-        for sn in self.gas_species_names():
-            nMolsVec = lprovided_quantities[sn]
+        values, errors, ratios, converged = ZacrosResults._turnover_frequency(
+            lprovided_quantities,
+            self.gas_species_names(),
+            self.number_of_lattice_sites(),
+            nbatch,
+            confidence,
+            ignore_nbatch,
+        )
+
+        if species_name is None:
+            return values, errors, ratios, converged
+        else:
+            return values[species_name], errors[species_name], ratios[species_name], converged[species_name]
 
+    @staticmethod
+    def _turnover_frequency(provided_quantities, gas_species_names, n_sites, nbatch, confidence, ignore_nbatch):
+        """
+        Returns the TOF, error, ratio, and convergence flag of every gas species in ``gas_species_names`` for the given
+        ``provided_quantities``. See ``turnover_frequency()``. It does not need the output files, so it can be used
+        while the calculation is still running.
+        """
+        values = {}
+        errors = {}
+        ratios = {}
+        converged = {}
+
+        for sn in gas_species_names:
             values[sn] = 0.0
             errors[sn] = 0.0
             ratios[sn] = 0.0
             converged[sn] = True
 
-            if sum(numpy.abs(lprovided_quantities[sn])) > 0:
+            if sum(numpy.abs(provided_quantities[sn])) > 0:
                 aver, ci, ratio, conv = ZacrosResults.__compute_rate(
-                    lprovided_quantities["Time"],
-                    lprovided_quantities[sn],
-                    self.number_of_lattice_sites(),
-                    nbatch,
-                    confidence,
-                    ignore_nbatch,
+                    provided_quantities["Time"], provided_quantities[sn], n_sites, nbatch, confidence, ignore_nbatch
                 )
                 values[sn] = aver
                 errors[sn] = ci
                 ratios[sn] = ratio
                 converged[sn] = conv
 
-        if species_name is None:
-            return values, errors, ratios, converged
-        else:
-            return values[species_name], errors[species_name], ratios[species_name], converged[species_name]
+        return values, errors, ratios, converged
 
     @staticmethod
     def _average_provided_quantities(provided_quantities_list, key_column_name, columns_name=None):
@@ -2,8 +2,9 @@
 
 import os
 import shutil
-import copy
+import threading
 import numpy
+import scipy.stats
 from collections import OrderedDict
 from typing import Optional
 
@@ -12,6 +13,7 @@ import scm.plams
 from .Settings import *
 from .ZacrosJob import *
 from .ZacrosResults import *
+from .ZacrosMonitor import *
 from .ParametersBase import *
 
 __all__ = ["ZacrosSteadyStateJob", "ZacrosSteadyStateResults"]
@@ -51,32 +53,44 @@ class ZacrosSteadyStateResults(scm.plams.Results):
         """
         return self.job.niterations
 
-    def nreplicas(self):
+    def nreplicas(self, iteration=None):
         """
-        Returns the number of replicas used
+        Returns the number of replicas used in the iteration ``iteration``, or in the last one if it is None. It may
+        change from one iteration to another if ``turnover_frequency.max_nreplicas`` is set.
         """
-        return self.job.nreplicas
+        if iteration is None:
+            return self.job.nreplicas
+
+        return len(self.children_results(iteration=iteration))
 
     def children_results(self, iteration=None, replica=None):
         """
         Returns a list of the children's results or the results for a specific iteration or replica if requested.
+        The jobs of pipelined replicas discarded beyond the last evaluated iteration are not included.
         """
         if iteration is None and replica is None:
             output = []
+            chains = self.job.__dict__.get("_chains")
 
             for i in range(len(self.job.children)):
-                output.append(self.job.children[i].results)
+                if chains is None or any(self.job.children[i] in chain for chain in chains):
+                    output.append(self.job.children[i].results)
 
             return output
-        elif iteration is not None and replica is None:
-            output = []
-
-            for j in range(len(self.job.nreplicas)):
-                output.append(self.job.children[iteration * self.job.nreplicas + j].results)
+        elif iteration is not None and self.job.__dict__.get("_chains") is not None:
+            # Pipelined replicas are not sorted by iteration in the children list
+            if replica is None:
+                return [chain[iteration].results for chain in self.job._chains]
+            else:
+                return self.job._chains[replica][iteration].results
+        elif iteration is not None:
+            # The number of replicas may change from one iteration to another
+            children = [child for child in self.job.children if child.name.startswith("ss_iter%03d" % iteration)]
 
-            return output
-        elif iteration is not None and replica is not None:
-            return self.job.children[iteration * self.job.nreplicas + replica].results
+            if replica is None:
+                return [child.results for child in children]
+            else:
+                return children[replica].results
         else:
             msg = "\n### ERROR ### ZacrosSteadyStateResults.children_results().\n"
             msg += "                Wrong parameters combination.\n"
@@ -86,73 +100,73 @@ class ZacrosSteadyStateResults(scm.plams.Results):
         """
         Returns the zacros's version from the 'general_output.txt' file.
         """
-        return self.job.children[-1].results.get_zacros_version()
+        return self.job._last_replicas()[-1].results.get_zacros_version()
 
     def get_reaction_network(self):
         """
         Returns the reactions from the 'general_output.txt' file associated to the last children.
         """
-        return self.job.children[-1].results.get_reaction_network()
+        return self.job._last_replicas()[-1].results.get_reaction_network()
 
     def provided_quantities(self):
         """
         Returns the provided quantities headers from the ``specnum_output.txt`` file in a list associated to the last children.
         """
-        return self.job.children[-1].results.provided_quantities()
+        return self.job._last_replicas()[-1].results.provided_quantities()
 
     def number_of_lattice_sites(self):
         """
         Returns the number of lattice sites from the 'general_output.txt' file associated to the last children.
         """
-        return self.job.children[-1].results.number_of_lattice_sites()
+        return self.job._last_replicas()[-1].results.number_of_lattice_sites()
 
     def gas_species_names(self):
         """
         Returns the gas species names from the 'general_output.txt' file associated to the last children.
         """
-        return self.job.children[-1].results.gas_species_names()
+        return self.job._last_replicas()[-1].results.gas_species_names()
 
     def surface_species_names(self):
         """
         Returns the surface species names from the 'general_output.txt' file associated to the last children.
         """
-        return self.job.children[-1].results.surface_species_names()
+        return self.job._last_replicas()[-1].results.surface_species_names()
 
     def site_type_names(self):
         """
         Returns the site types from the 'general_output.txt' file associated to the last children.
         """
-        return self.job.children[-1].results.site_type_names()
+        return self.job._last_replicas()[-1].results.site_type_names()
 
     def number_of_snapshots(self):
         """
         Returns the number of configurations from the 'history_output.txt' file associated to the last children.
         """
-        return self.job.children[-1].results.number_of_snapshots()
+        return self.job._last_replicas()[-1].results.number_of_snapshots()
 
     def number_of_process_statistics(self):
         """
         Returns the number of process statistics from the 'procstat_output.txt' file associated to the last children.
         """
-        return self.job.children[-1].results.number_of_process_statistics()
+        return self.job._last_replicas()[-1].results.number_of_process_statistics()
 
     def elementary_steps_names(self):
         """
         Returns the names of elementary steps from the 'procstat_output.txt' file associated to the last children.
         """
-        return self.job.children[-1].results.elementary_steps_names()
+        return self.job._last_replicas()[-1].results.elementary_steps_names()
 
     def lattice_states(self, last=None):
         """
         Returns the configurations from the 'history_output.txt' file associated to the last children.
         """
-        return self.job.children[-1].results.lattice_states(last=last)
+        return self.job._last_replicas()[-1].results.lattice_states(last=last)
 
     def last_lattice_state(self):
         """
         Returns the last configuration from the 'history_output.txt' file associated to the last children.
         """
-        return self.job.children[-1].results.last_lattice_state()
+        return self.job._last_replicas()[-1].results.last_lattice_state()
 
     def average_coverage(self, last=5):
         """
@@ -162,9 +176,7 @@ class ZacrosSteadyStateResults(scm.plams.Results):
 
         acf = {}
 
-        for i in range(self.job.nreplicas):
-            prev = self.job.children[i - self.job.nreplicas]
-
+        for prev in self.job._last_replicas():
             lacf = prev.results.average_coverage(last=last)
 
             for k, v in lacf.items():
@@ -187,7 +199,7 @@ class ZacrosSteadyStateResults(scm.plams.Results):
         *   ``time_perframe`` -- Sets the time interval between frames in seconds.
         *   ``file_name`` -- Saves the figures to the file ``file_name-<id>`` (the corresponding id on the list replaces the ``<id>``). The format is inferred from the extension, and by default, ``.png`` is used.
         """
-        self.job.children[-1].results.plot_lattice_states(
+        self.job._last_replicas()[-1].results.plot_lattice_states(
             data=data, pause=pause, show=show, ax=ax, close=close, time_perframe=time_perframe, file_name=file_name
         )
 
@@ -214,7 +226,7 @@ class ZacrosSteadyStateResults(scm.plams.Results):
         *   ``normalize_per_site`` -- Divides the molecule numbers by the total number of sites in the lattice.
         *   ``derivative`` -- Plots the first derivative.
         """
-        self.job.children[-1].results.plot_molecule_numbers(
+        self.job._last_replicas()[-1].results.plot_molecule_numbers(
             species_name=species_name,
             pause=pause,
             show=show,
@@ -229,7 +241,7 @@ class ZacrosSteadyStateResults(scm.plams.Results):
         """
         Returns the statistics from the 'procstat_output.txt' file in a form of a list of dictionaries associated to the last children.
         """
-        return self.job.children[-1].results.get_process_statistics()
+        return self.job._last_replicas()[-1].results.get_process_statistics()
 
     def plot_process_statistics(
         self, data, key, log_scale=False, pause=-1, show=True, ax=None, close=False, file_name=None
@@ -246,7 +258,7 @@ class ZacrosSteadyStateResults(scm.plams.Results):
         *   ``close`` -- Closes the figure window after pause time.
         *   ``file_name`` -- Saves the figures to the file ``file_name-<id>`` (the corresponding id on the list replaces the ``<id>``). The format is inferred from the extension, and by default, ``.png`` is used.
         """
-        self.job.children[-1].results.plot_process_statistics(
+        self.job._last_replicas()[-1].results.plot_process_statistics(
             data=data, key=key, log_scale=log_scale, pause=pause, show=show, ax=ax, close=close, file_name=file_name
         )
 
@@ -261,16 +273,16 @@ class ZacrosSteadyStateResults(scm.plams.Results):
 
         provided_quantities_list = []
 
-        for i in range(self.job.nreplicas):
-            prev = self.job.children[i - self.job.nreplicas]
+        for prev in self.job._last_replicas():
             provided_quantities_list.append(prev.results.provided_quantities())
 
+        provided_quantities_list = self.job._common_time_span(provided_quantities_list)
         aver_provided_quantities = ZacrosResults._average_provided_quantities(provided_quantities_list, "Time")
 
         # This case happens only when the surface gets quickly poisoned; in less than one iteration.
         # In that case we use only the last values to estimate the TOF
         # We need at least 3 points to make an standard deviation
-        if self.job.niterations == 1:
+        if self.job.niterations == 1 or self.job.__dict__.get("_aligned_iteration") == 0:
             ignore_nbatch = nbatch - 3
 
         TOF, error, ratio, conv = prev.results.turnover_frequency(
@@ -299,6 +311,11 @@ class ZacrosSteadyStateJob(scm.plams.MultiJob):
        settings.turnover_frequency.nbatch = 20
        settings.turnover_frequency.confidence = 0.99
        settings.turnover_frequency.ignore_nbatch = 1
+       settings.turnover_frequency.online = False
+       settings.turnover_frequency.online_interval = 10.0
+       settings.turnover_frequency.pipelined = False
+       settings.turnover_frequency.nreplicas = 1
+       settings.turnover_frequency.max_nreplicas = 1
 
        settings.scaling.enabled = 'F'
        settings.scaling.partial_equilibrium_index_threshold = 0.1
@@ -307,6 +324,24 @@ class ZacrosSteadyStateJob(scm.plams.MultiJob):
        settings.scaling.max_time = None
        settings.scaling.species_numbers = None
        settings.scaling.nevents_per_timestep = None
+
+    If ``turnover_frequency.online`` is True, the convergence of the TOF is also checked while the children are
+    running, every ``turnover_frequency.online_interval`` seconds (see ``ZacrosMonitor``). Once it is reached, Zacros is
+    stopped and the truncated output is used as the last iteration. This is only possible for children running on the
+    local machine.
+
+    If ``turnover_frequency.pipelined`` is True, the replicas are not synchronized at the end of every iteration.
+    Instead, every replica is restarted with the next iteration as soon as it finishes, so a slow replica does not stall
+    the rest. The convergence is evaluated on the time span common to all replicas, every time the slowest one finishes
+    an iteration. Once it is reached, the replicas that are still running are stopped. It can not be combined with
+    ``turnover_frequency.online``.
+
+    If ``turnover_frequency.max_nreplicas`` is larger than ``turnover_frequency.nreplicas``, the calculation starts with
+    ``turnover_frequency.nreplicas`` replicas, and new ones are added at the end of every iteration without convergence
+    if the confidence interval of the TOF among replicas is larger than the error of the averaged TOF. The number of
+    replicas is increased up to the value needed to reach the target precision, or up to
+    ``turnover_frequency.max_nreplicas``. New replicas use new random seeds, and are started from scratch to cover the
+    same time span as the rest. It can not be combined with ``turnover_frequency.pipelined``.
     """
 
     _result_type = ZacrosSteadyStateResults
@@ -375,6 +410,9 @@ class ZacrosSteadyStateJob(scm.plams.MultiJob):
         self.confidence = 0.96
         self.ignore_nbatch = 1
         self.nreplicas = 1
+        self.online = False
+        self.online_interval = 10.0
+        self.pipelined = False
         self.scaling_partial_equilibrium_index_threshold = 0.1
         self.scaling_upper_bound = 100
         self.scaling_max_steps = None
@@ -384,11 +422,32 @@ class ZacrosSteadyStateJob(scm.plams.MultiJob):
         self._new_timestep = None
 
         self.nreplicas = self.settings.turnover_frequency.get("nreplicas", default=self.nreplicas)
+        self.max_nreplicas = self.settings.turnover_frequency.get("max_nreplicas", default=self.nreplicas)
 
         if "turnover_frequency" in self.settings:
             self.nbatch = self.settings.turnover_frequency.get("nbatch", default=self.nbatch)
             self.confidence = self.settings.turnover_frequency.get("confidence", default=self.confidence)
             self.ignore_nbatch = self.settings.turnover_frequency.get("ignore_nbatch", default=self.ignore_nbatch)
+            self.online = self.settings.turnover_frequency.get("online", default=self.online)
+            self.online_interval = self.settings.turnover_frequency.get("online_interval", default=self.online_interval)
+            self.pipelined = self.settings.turnover_frequency.get("pipelined", default=self.pipelined)
+
+        if self.online and self.pipelined:
+            msg = "\n### ERROR ### ZacrosSteadyStateJob.__init__().\n"
+            msg += "              turnover_frequency.online and turnover_frequency.pipelined are incompatible.\n"
+            raise Exception(msg)
+
+        if self.max_nreplicas > self.nreplicas and (self.pipelined or self.nreplicas < 2):
+            msg = "\n### ERROR ### ZacrosSteadyStateJob.__init__().\n"
+            msg += "              turnover_frequency.max_nreplicas requires turnover_frequency.nreplicas > 1,\n"
+            msg += "              and it can not be combined with turnover_frequency.pipelined.\n"
+            raise Exception(msg)
+
+        self._chains = None
+        self._aligned_iteration = -1
+        self._online_npoints = None
+        self._arrival = threading.Condition()
+        self._dont_pickle.append("_arrival")
 
         # Scaling pre-exponential terms parameters
         if "scaling" in self.settings:
@@ -427,6 +486,8 @@ class ZacrosSteadyStateJob(scm.plams.MultiJob):
             + str(self.ignore_nbatch)
             + ",nreplicas="
             + str(self.nreplicas)
+            + ",max_nreplicas="
+            + str(self.max_nreplicas)
         )
 
         # These parameters a needed to make ZacrosSteadyStateJob compatible with ZacrosJob
@@ -437,13 +498,19 @@ class ZacrosSteadyStateJob(scm.plams.MultiJob):
 
     def __steady_state_step(self):
 
+        if self.pipelined and len(self.children) > 0:
+            return self.__pipelined_step()
+
         if self.niterations >= self.max_iterations:
             scm.plams.log("JOB " + self._full_name() + " Steady State Convergence: MAX ITERATIONS REACHED")
             return None
 
+        nnew = 0
+
         if len(self.children) > 0:
             prev = None
             provided_quantities_list = []
+            replicas_TOF = []
 
             # We wait for threads to finish
             for i in range(self.nreplicas):
@@ -468,9 +535,15 @@ class ZacrosSteadyStateJob(scm.plams.MultiJob):
                     else:
                         scm.plams.log("JOB " + prev._full_name() + " Steady State Convergence: FAILED")
 
+                # Poisoning detected while the job was running
+                elif prev.stopped() and prev.surface_poisoned():
+                    scm.plams.log("JOB " + prev._full_name() + " Steady State Convergence: SURFACE POISONED")
+                    self._surface_poisoned = True
+
             # If failures we clean previous results if needed and stops
-            # the creation of new children
-            if self._surface_poisoned:
+            # the creation of new children. The replicas of the first iteration are kept,
+            # since they are the only ones available to estimate the TOF
+            if self._surface_poisoned and len(self.children) > self.nreplicas:
                 for i in range(self.nreplicas):
                     poisoned_job = self.children.pop(i - self.nreplicas)
                     scm.plams.delete_job(poisoned_job)
@@ -508,8 +581,10 @@ class ZacrosSteadyStateJob(scm.plams.MultiJob):
                             + "%10s" % conv[s]
                         )
 
+                replicas_TOF.append(TOF)
                 provided_quantities_list.append(prev.results.provided_quantities())
 
+            provided_quantities_list = self._common_time_span(provided_quantities_list)
             aver_provided_quantities = ZacrosResults._average_provided_quantities(provided_quantities_list, "Time")
 
             TOF, error, ratio, conv = prev.results.turnover_frequency(
@@ -539,59 +614,355 @@ class ZacrosSteadyStateJob(scm.plams.MultiJob):
             if all(conv.values()):
                 scm.plams.log("JOB " + self._full_name() + " Steady State Convergence: CONVERGENCE REACHED. DONE!")
                 return None
+            elif self._surface_poisoned:
+                scm.plams.log("JOB " + self._full_name() + " Steady State Convergence: SURFACE POISONED. DONE!")
+                return None
+            elif any(self.children[i - self.nreplicas].stopped() for i in range(self.nreplicas)):
+                # Stopped jobs can not be restarted
+                scm.plams.log("JOB " + self._full_name() + " Steady State Convergence: CONVERGENCE LOST AFTER STOP")
+                return None
             else:
                 scm.plams.log("JOB " + self._full_name() + " Steady State Convergence: NO CONVERGENCE REACHED YET")
+                nnew = self.__additional_replicas(replicas_TOF, TOF, error, conv)
 
-        # Here we apply the scaling factors
-        mechanism = copy.deepcopy(self._reference.mechanism)
-        if self._scaling_factors is not None:
-            for i, rxn in enumerate(mechanism):
-                old = rxn.pre_expon
-                rxn.pre_expon *= self._scaling_factors[i]
+        mechanism = self.__scaled_mechanism()
 
         lparallel = []
-        for i in range(self.nreplicas):
-            prev = None if len(self.children) == 0 else self.children[i - self.nreplicas]
+        for i in range(self.nreplicas + nnew):
+            prev = None
+            if len(self.children) > 0 and i < self.nreplicas:
+                prev = self.children[i - self.nreplicas]
+            lparallel.append(self.__new_replica(i, self.niterations, mechanism, prev))
 
-            lsettings = self._parameters_settings[self.niterations].copy()
-            lsettings.random_seed = lsettings.get("random_seed", default=0) + i
+        if nnew > 0:
+            self.nreplicas += nnew
+            scm.plams.log(
+                "JOB "
+                + self._full_name()
+                + " Steady State Convergence: NUMBER OF REPLICAS INCREASED TO "
+                + str(self.nreplicas)
+            )
 
-            if self.nreplicas > 1:
-                name = "ss_iter" + "%03d" % self.niterations + "_rep" + "%03d" % i
-            else:
-                name = "ss_iter" + "%03d" % self.niterations
-
-            new_child = ZacrosJob(
-                settings=lsettings,
-                lattice=self._reference.lattice,
-                mechanism=mechanism,
-                cluster_expansion=self._reference.cluster_expansion,
-                name=name,
-                restart=prev,
+        if self.pipelined:
+            self._chains = [[job] for job in lparallel]
+
+        if self.online:
+            self.__start_online_check(lparallel, self.nbatch - 3 if len(self.children) == 0 else self.ignore_nbatch)
+
+        self.niterations += 1
+
+        return lparallel
+
+    def __scaled_mechanism(self):
+        """
+        Returns the mechanism of the reference job with the scaling factors applied to the pre-exponential terms. The
+        elementary reactions are shared with the reference mechanism, so it is never modified.
+        """
+        if self._scaling_factors is None:
+            return self._reference.mechanism
+
+        # It is created only once, so its Zacros input is also serialized only once
+        mechanism = self.__dict__.get("_scaled_mechanism")
+        if mechanism is None:
+            mechanism = self._scaled_mechanism = self._reference.mechanism.scaled(self._scaling_factors)
+
+        return mechanism
+
+    def __new_replica(self, i, iteration, mechanism, prev):
+        """
+        Creates the child for the iteration ``iteration`` of the replica ``i``, restarting from the job ``prev``.
+        """
+        lsettings = self._parameters_settings[iteration].copy()
+        lsettings.random_seed = lsettings.get("random_seed", default=0) + i
+
+        # Replicas added after the first iteration start from scratch, so they have to reach the same time
+        if prev is None and iteration > 0 and "restart" in lsettings:
+            for option in ["max_time", "max_steps"]:
+                if option in lsettings.restart:
+                    lsettings[option] = lsettings.restart[option]
+
+        if self.max_nreplicas > 1:
+            name = "ss_iter" + "%03d" % iteration + "_rep" + "%03d" % i
+        else:
+            name = "ss_iter" + "%03d" % iteration
+
+        new_child = ZacrosJob(
+            settings=lsettings,
+            lattice=self._reference.lattice,
+            mechanism=mechanism,
+            cluster_expansion=self._reference.cluster_expansion,
+            name=name,
+            restart=prev,
+        )
+
+        if prev is None:
+            scm.plams.log("JOB " + self.name + "/" + name + " Steady State: NEW")
+        else:
+            scm.plams.log(
+                "JOB " + self.name + "/" + name + " Steady State: NEW" + " (dep=" + self.name + "/" + prev.name + ")"
             )
 
-            if prev is None:
-                scm.plams.log("JOB " + self.name + "/" + name + " Steady State: NEW")
+        return new_child
+
+    def __additional_replicas(self, replicas_TOF, TOF, error, conv):
+        """
+        Returns the number of replicas to add, given the TOF of every replica ``replicas_TOF``, and the TOF, error, and
+        convergence flag of their average. Replicas are only added for the species without convergence whose confidence
+        interval among replicas is larger than ``error``. Since this interval decreases as the square root of the number
+        of replicas, it estimates the number of replicas needed to get a ratio error/TOF below ``1 - confidence``.
+        """
+        if self.nreplicas >= self.max_nreplicas:
+            return 0
+
+        t_value = scipy.stats.t.ppf((1.0 + self.confidence) / 2.0, self.nreplicas - 1)
+
+        nreplicas = self.nreplicas
+        for s in TOF:
+            values = [replica_TOF[s] for replica_TOF in replicas_TOF]
+            ci = t_value * numpy.std(values, ddof=1) / numpy.sqrt(self.nreplicas)
+
+            if conv[s] or ci <= error[s] or TOF[s] == 0.0:
+                continue
+
+            target = (1.0 - self.confidence) * abs(TOF[s])
+            nreplicas = max(nreplicas, int(numpy.ceil(self.nreplicas * (ci / target) ** 2)))
+
+        return min(nreplicas, self.max_nreplicas) - self.nreplicas
+
+    def __pipelined_step(self):
+        """
+        Pipelined version of the steady-state step. It waits until the last job of any replica finishes and restarts
+        it immediately with the next iteration. The convergence is evaluated on the time span common to all replicas,
+        every time it grows, i.e., every time the slowest replica finishes an iteration.
+        """
+        # We wait until at least one replica can be restarted, or all of them are finished
+        with self._arrival:
+            while True:
+                done = [chain[-1].results.done.is_set() for chain in self._chains]
+                arrived = [i for i, chain in enumerate(self._chains) if done[i] and len(chain) < self.max_iterations]
+
+                if len(arrived) > 0 or all(done):
+                    break
+
+                self._arrival.wait(scm.plams.config.sleepstep)
+
+        # We check for failures. If one replica fails, we stop all of them
+        poisoned = []
+        for i, chain in enumerate(self._chains):
+            prev = chain[-1]
+
+            if not done[i]:
+                continue
+
+            if not prev.ok():
+                if len(chain) > 1 and (prev.restart_aborted() or chain[-2].surface_poisoned()):
+                    poisoned.append(i)
+                else:
+                    scm.plams.log("JOB " + prev._full_name() + " Steady State Convergence: FAILED")
+                    self.__truncate_chains()
+                    return None
+
+            # Poisoning detected while the job was running
+            elif prev.stopped() and prev.surface_poisoned():
+                poisoned.append(i)
+
+        # If the surface is poisoned, we clean the results of the poisoned replicas and stop the rest
+        if len(poisoned) > 0:
+            self._surface_poisoned = True
+
+            for i in poisoned:
+                scm.plams.log("JOB " + self._chains[i][-1]._full_name() + " Steady State Convergence: SURFACE POISONED")
+
+                if len(self._chains[i]) > 1:
+                    poisoned_job = self._chains[i].pop()
+                    self.children.remove(poisoned_job)
+                    scm.plams.delete_job(poisoned_job)
+                    scm.plams.log("JOB " + poisoned_job._full_name() + " Steady State Convergence: JOB REMOVED")
+
+            self.__truncate_chains()
+            return None
+
+        # The last finished iteration of the slowest replica
+        finished = [len(chain) - 1 if chain[-1].results.done.is_set() else len(chain) - 2 for chain in self._chains]
+        aligned_iteration = min(finished)
+
+        if aligned_iteration > self._aligned_iteration:
+            self._aligned_iteration = aligned_iteration
+
+            if self.__aligned_convergence([chain[k] for chain, k in zip(self._chains, finished)]):
+                scm.plams.log("JOB " + self._full_name() + " Steady State Convergence: CONVERGENCE REACHED. DONE!")
+                self.__truncate_chains()
+                return None
             else:
-                scm.plams.log(
-                    "JOB "
-                    + self.name
-                    + "/"
-                    + name
-                    + " Steady State: NEW"
-                    + " (dep="
-                    + self.name
-                    + "/"
-                    + prev.name
-                    + ")"
-                )
+                scm.plams.log("JOB " + self._full_name() + " Steady State Convergence: NO CONVERGENCE REACHED YET")
 
+        if len(arrived) == 0:
+            scm.plams.log("JOB " + self._full_name() + " Steady State Convergence: MAX ITERATIONS REACHED")
+            return None
+
+        mechanism = self.__scaled_mechanism()
+
+        lparallel = []
+        for i in arrived:
+            prev = self._chains[i][-1]
+            new_child = self.__new_replica(i, len(self._chains[i]), mechanism, prev)
+            self._chains[i].append(new_child)
             lparallel.append(new_child)
 
-        self.niterations += 1
+        self.niterations = max(len(chain) for chain in self._chains)
 
         return lparallel
 
+    def __aligned_convergence(self, replicas):
+        """
+        Applies the batch-means test to the average of the jobs ``replicas``, one per replica, on the time span common
+        to all of them. The result is appended to the history. Returns True if the TOF is converged.
+        """
+        provided_quantities_list = [job.results.provided_quantities() for job in replicas]
+
+        npoints = min(len(quantities["Time"]) for quantities in provided_quantities_list)
+        provided_quantities_list = [
+            {name: values[:npoints] for name, values in quantities.items()} for quantities in provided_quantities_list
+        ]
+        aver_provided_quantities = ZacrosResults._average_provided_quantities(provided_quantities_list, "Time")
+
+        # We need at least 3 points to make an standard deviation
+        ignore_nbatch = self.ignore_nbatch
+        if self._aligned_iteration == 0:
+            ignore_nbatch = self.nbatch - 3
+
+        TOF, error, ratio, conv = replicas[0].results.turnover_frequency(
+            nbatch=self.nbatch,
+            confidence=self.confidence,
+            ignore_nbatch=ignore_nbatch,
+            provided_quantities=aver_provided_quantities,
+        )
+
+        scm.plams.log(
+            "   Average (iteration %d, time %g)" % (self._aligned_iteration, aver_provided_quantities["Time"][-1])
+        )
+        scm.plams.log("   %10s" % "species" + "%15s" % "TOF" + "%15s" % "error" + "%15s" % "ratio" + "%10s" % "conv?")
+        for s in replicas[0].results.gas_species_names():
+            scm.plams.log(
+                "   %10s" % s + "%15.5f" % TOF[s] + "%15.5f" % error[s] + "%15.5f" % ratio[s] + "%10s" % conv[s]
+            )
+
+        history_i = {"turnover_frequency": TOF, "turnover_frequency_error": error, "converged": conv}
+
+        for name, item in self._parameters.items():
+            history_i[name] = self._parameters_values[self._aligned_iteration][name]
+
+        self._history.append(history_i)
+
+        return all(conv.values())
+
+    def __truncate_chains(self):
+        """
+        Stops the jobs of every replica beyond the last evaluated iteration, and removes them from the replicas, so
+        the results only include the evaluated iterations. Jobs still queued, e.g., waiting for free cores, are
+        cancelled before Zacros starts. They are kept as children, since PLAMS waits for all children to finish.
+        """
+        for chain in self._chains:
+            while len(chain) > max(self._aligned_iteration + 1, 1):
+                job = chain.pop()
+                if not job.results.done.is_set():
+                    job.stop()
+                scm.plams.log("JOB " + job._full_name() + " Steady State Convergence: JOB DISCARDED")
+
+        self.niterations = max(len(chain) for chain in self._chains)
+
+    def _last_replicas(self):
+        """
+        Returns the last job of every replica.
+        """
+        chains = self.__dict__.get("_chains")
+
+        if chains is not None:
+            return [chain[-1] for chain in chains]
+
+        return [self.children[i - self.nreplicas] for i in range(self.nreplicas)]
+
+    def _common_time_span(self, provided_quantities_list):
+        """
+        Returns the provided quantities of the last replicas truncated to their common time span, since replicas
+        stopped online or pipelined ones may have different numbers of points. If the replicas were stopped by the
+        online convergence check, only the points used by the check are kept, so its verdict is reproduced.
+        """
+        npoints = min(len(quantities["Time"]) for quantities in provided_quantities_list)
+
+        online_npoints = self.__dict__.get("_online_npoints")
+        if online_npoints is not None and any(job.stopped() for job in self._last_replicas()):
+            npoints = min(npoints, online_npoints)
+
+        return [
+            {name: values[:npoints] for name, values in quantities.items()} for quantities in provided_quantities_list
+        ]
+
+    def __start_online_check(self, replicas, ignore_nbatch):
+        """
+        Starts a ZacrosMonitor for every replica of the new iteration. Every time there are new data, the batch-means
+        test is applied to the average of the replicas, including the previous iterations. Once the TOF is converged,
+        all replicas are stopped.
+        """
+        previous = [None if job.restart is None else job.restart.results.provided_quantities() for job in replicas]
+        self._online_npoints = None
+        n_sites = self._reference.lattice.number_of_sites()
+        lock = threading.Lock()
+        monitors = []
+
+        def check(status):
+            with lock:
+                if any(job.stopped() for job in replicas):
+                    return
+
+                provided_quantities_list = []
+                for quantities, monitor in zip(previous, monitors):
+                    if monitor.specnum is None:
+                        return
+
+                    if quantities is not None:
+                        quantities = {name: quantities[name] + monitor.specnum[name] for name in quantities}
+                    else:
+                        quantities = monitor.specnum
+
+                    provided_quantities_list.append(quantities)
+
+                # Replicas are compared at the same times
+                npoints = min(len(quantities["Time"]) for quantities in provided_quantities_list)
+                if npoints < 2 * self.nbatch:
+                    return
+
+                provided_quantities_list = [
+                    {name: values[:npoints] for name, values in quantities.items()}
+                    for quantities in provided_quantities_list
+                ]
+                aver_provided_quantities = ZacrosResults._average_provided_quantities(provided_quantities_list, "Time")
+
+                fixed_columns = ZacrosMonitor._fixed_columns
+                gas_species_names = [n for n in aver_provided_quantities if n not in fixed_columns and "*" not in n]
+
+                TOF, error, ratio, conv = ZacrosResults._turnover_frequency(
+                    aver_provided_quantities, gas_species_names, n_sites, self.nbatch, self.confidence, ignore_nbatch
+                )
+
+                if all(conv.values()):
+                    scm.plams.log(
+                        "JOB "
+                        + self._full_name()
+                        + " Steady State Convergence: CONVERGENCE REACHED AT TIME "
+                        + str(aver_provided_quantities["Time"][-1])
+                        + ". STOPPING"
+                    )
+                    self._online_npoints = npoints
+                    for job in replicas:
+                        job.stop()
+
+        for job in replicas:
+            monitors.append(ZacrosMonitor(job, callback=check, interval=self.online_interval))
+
+        for monitor in monitors:
+            monitor.start()
+
     # --------------------------------------------------------------
     # Function to compute the scaling factors of the mechanisms
     # pre-exponential factors.
@@ -787,6 +1158,15 @@ class ZacrosSteadyStateJob(scm.plams.MultiJob):
         scaling_job = self.children.pop()
         # scm.plams.delete_job( scaling_job )
 
+    def _notify(self):
+        """
+        Notifies that one of the children has finished. It wakes up the pipelined steady-state step if needed.
+        """
+        super()._notify()
+
+        with self._arrival:
+            self._arrival.notify_all()
+
     def new_children(self):
         """ """
         if self._scaling and self._scaling_status != "finished":
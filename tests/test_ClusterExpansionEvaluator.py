@@ -0,0 +1,74 @@
+import numpy
+
+import scm.pyzacros as pz
+
+
+def test_ClusterExpansionEvaluator():
+    print("---------------------------------------------------")
+    print(">>> Testing ClusterExpansionEvaluator class")
+    print("---------------------------------------------------")
+
+    s0 = pz.Species("*", 1)
+    s1 = pz.Species("O*", 1)
+    s2 = pz.Species("O2**", 2)
+
+    lattice = pz.Lattice(lattice_type=pz.Lattice.RECTANGULAR, lattice_constant=1.0, repeat_cell=[4, 4])
+
+    cluster_expansion = pz.ClusterExpansion(
+        [
+            pz.Cluster(species=[s1], energy=-1.0),
+            pz.Cluster(species=[s1, s1], neighboring=[(0, 1)], multiplicity=2, energy=0.2),
+            pz.Cluster(species=[s2, s2], neighboring=[(0, 1)], multiplicity=2, energy=-0.5),
+            pz.Cluster(species=[s2, s2, s1], neighboring=[(0, 1), (1, 2)], energy=0.3),
+        ]
+    )
+
+    evaluator = pz.ClusterExpansionEvaluator(cluster_expansion, lattice)
+
+    # Sites are numbered by columns:
+    #   3  7 11 15
+    #   2  6 10 14
+    #   1  5  9 13
+    #   0  4  8 12
+    state = pz.LatticeState(lattice, [s0, s1, s2])
+    state.fill_site(0, s1)
+    state.fill_site(1, s1)
+    state.fill_site(5, s1)
+    state.fill_site((10, 11), s2)
+    state.fill_site((14, 15), s2)
+    state.fill_site(7, s1)
+
+    counts = evaluator.cluster_counts(state)
+    print(counts)
+    assert counts.tolist() == [4, 4, 4, 1]
+
+    energy = evaluator.energy(state)
+    print(energy)
+    assert abs(energy - (-4.0 + 0.4 - 1.0 + 0.3)) < 1e-8
+
+    empty = pz.LatticeState(lattice, [s0, s1, s2])
+    energies = evaluator.energy([state, empty, state])
+    assert numpy.allclose(energies, [energy, 0.0, energy])
+
+    species_idx, entity_idx = state.to_arrays()
+    assert numpy.allclose(evaluator.energy(numpy.array([species_idx]), numpy.array([entity_idx])), [energy])
+
+    compiled = cluster_expansion.compile()
+    assert [sp.symbol for sp in compiled.surface_species] == ["O*", "O2**"]
+    assert compiled.site_offsets.tolist() == [0, 1, 3, 5, 8]
+    assert compiled.species.tolist() == [0, 0, 0, 1, 1, 1, 1, 0]
+    assert compiled.entity_number.tolist() == [0, 0, 1, 0, 0, 0, 0, 1]
+    assert compiled.neighbor_offsets.tolist() == [0, 0, 1, 2, 4]
+    assert cluster_expansion.compile() is compiled
+
+    cluster_expansion[0].energy = -2.0
+    assert cluster_expansion.compile() is not compiled
+    assert abs(evaluator.energy(state) - (energy - 4.0)) < 1e-8
+    assert cluster_expansion.find_exact(cluster_expansion[1].label()) is cluster_expansion[1]
+
+    # Removing clusters updates the label index in place
+    index = cluster_expansion._ClusterExpansion__index
+    first = cluster_expansion.pop(0)
+    assert cluster_expansion._ClusterExpansion__index is index
+    assert cluster_expansion.find_exact(first.label()) is None
+    assert all(cluster_expansion.find_exact(cl.label()) is cl for cl in cluster_expansion)
@@ -76,3 +76,25 @@ step H*1fH*2f->*1f*2f:H2;(0,1)
 end_step\
 """
     assert pz.utils.compare(output, expectedOutput, 1e-3)
+
+    # Bulk construction
+    reactions = pz.ElementaryReaction.from_columns(
+        site_types=[("f", "f"), ("f", "f")],
+        neighboring=[[(0, 1)], [(0, 1)]],
+        initial=[[s1, s1], [s2, s0]],
+        final=[[s2, s0], [s0, s0, pz.Species("H2", gas_energy=0.0)]],
+        reversible=[True, None],
+        pre_expon=1e13,
+        pe_ratio=0.676,
+        activation_energy=[0.2, 0.3],
+    )
+    assert reactions[0] == myReaction1
+    assert str(reactions[0]) == str(myReaction1)
+    assert reactions[1].label() == "H2*1f*2f<->*1f*2f:H2;(0,1)"
+    assert reactions[1].reversible and reactions[1].activation_energy == 0.3
+
+    try:
+        pz.ElementaryReaction.from_columns(initial=[[s1, s1]], final=[[s2, s0]], pre_expon=[1.0, 2.0])
+        assert False
+    except NameError as e:
+        assert "pre_expon" in str(e)
@@ -1,3 +1,5 @@
+import io
+
 import scm.pyzacros as pz
 import scm.pyzacros.utils
 
@@ -188,6 +190,19 @@ end_lattice\
 """
     assert pz.utils.compare(output, expectedOutput, 1e-3)
 
+    buffer = io.StringIO()
+    myLattice.write_to(buffer)
+    assert buffer.getvalue() == output
+
+    # Assigning the public attributes drops the cached input
+    fingerprint = myLattice.fingerprint()
+    myLattice.site_types = [st.replace("cn", "top") for st in myLattice.site_types]
+    assert "top4" in str(myLattice) and "cn4" not in str(myLattice)
+    assert myLattice.fingerprint() != fingerprint
+    buffer = io.StringIO()
+    myLattice.write_to(buffer)
+    assert buffer.getvalue() == str(myLattice)
+
     ## reading from yaml
     # myLattice = pz.Lattice(path_to_slab_yaml="./pyzacros/slabs/pd111.yaml")
     # output2 = str(myLattice)
@@ -0,0 +1,96 @@
+import numpy
+
+import scm.pyzacros as pz
+
+
+def test_LatticeAnalysis():
+    print("---------------------------------------------------")
+    print(">>> Testing LatticeAnalysis class")
+    print("---------------------------------------------------")
+
+    s1 = pz.Species("CO*", 1)
+    s2 = pz.Species("O*", 1)
+    s3 = pz.Species("O2**", 2)
+
+    lattice = pz.Lattice(lattice_type=pz.Lattice.RECTANGULAR, lattice_constant=1.0, repeat_cell=[4, 4])
+
+    # Sites are numbered by columns:
+    #   3  7 11 15
+    #   2  6 10 14
+    #   1  5  9 13
+    #   0  4  8 12
+    state = pz.LatticeState(lattice, [s1, s2, s3])
+    state.fill_site(0, s1)
+    state.fill_site(1, s1)
+    state.fill_site(5, s2)
+    state.fill_site(15, s2)
+    state.fill_site((10, 11), s3)
+
+    analysis = pz.LatticeAnalysis(lattice)
+
+    counts = analysis.pair_counts(state)
+    print(counts)
+    assert counts.tolist() == [[1, 1, 0], [1, 0, 1], [0, 1, 0]]
+
+    labels = analysis.island_labels(state)
+    print(labels)
+    assert labels.tolist() == [0, 0, -1, -1, -1, 0, -1, -1, -1, -1, 10, 10, -1, -1, -1, 10]
+    assert sorted(analysis.island_sizes(state, "CO*").tolist()) == [2]
+    assert sorted(analysis.island_sizes(state, "O*").tolist()) == [1, 1]
+
+    # Whole trajectories give the same results as each snapshot separately
+    empty = pz.LatticeState(lattice, [s1, s2, s3])
+    trajectory = [state, empty, state]
+    assert numpy.array_equal(analysis.pair_counts(trajectory), numpy.stack([counts, 0 * counts, counts]))
+    assert numpy.array_equal(analysis.island_labels(trajectory)[2], labels)
+    assert analysis.island_sizes(trajectory)[1].tolist() == []
+
+    species_idx, entity_idx = state.to_arrays()
+    assert numpy.array_equal(analysis.island_labels(species_idx), labels)
+
+    centers, values = analysis.correlation(trajectory, "CO*", "O*", bins=[0.5, 1.5, 2.5])
+    print(centers, values)
+    assert numpy.allclose(centers, [1.0, 2.0])
+    # Two CO*-O* pairs out of the 42 pairs of sites at distances 1.0 and 1.41, and none beyond
+    assert numpy.allclose(values[0], [2 / (42 * 2 * 2 * 2 / (16 * 15)), 0.0])
+    assert numpy.allclose(values[1], [0.0, 0.0])
+
+    # Checkerboard ordering on the grid of unit cells
+    checkerboard = numpy.array([(i + j) % 2 - 1 for i in range(4) for j in range(4)])
+    assert analysis.grid(checkerboard).shape == (4, 4, 1)
+
+    q, sq = analysis.structure_factor(checkerboard)
+    print(sq)
+    assert numpy.allclose(q[2, 2], [-numpy.pi, -numpy.pi])
+    assert numpy.isclose(sq[2, 2], 4.0)
+    assert numpy.isclose(sq.sum() - sq[2, 2], 0.0)
+
+    cr = analysis.autocorrelation([checkerboard, checkerboard])
+    assert cr.shape == (2, 4, 4, 1, 1)
+    assert numpy.allclose(cr[1, :2, :2, 0, 0], [[0.25, -0.25], [-0.25, 0.25]])
+
+    try:
+        analysis = pz.LatticeAnalysis(pz.Lattice(site_types=["A"], site_coordinates=[[0.0, 0.0]], nearest_neighbors=[[]]))
+        analysis.structure_factor(numpy.array([0]))
+        assert False
+    except Exception as e:
+        assert "unit cell" in str(e)
+
+    # Stripes along the second vector of a non-orthogonal unit cell, with n1 != n2
+    lattice = pz.Lattice(
+        cell_vectors=[[2.0, 0.0], [1.0, 1.5]],
+        repeat_cell=[4, 6],
+        site_types=["A"],
+        site_coordinates=[[0.0, 0.0]],
+        neighboring_structure=[[(0, 0), pz.Lattice.NORTH], [(0, 0), pz.Lattice.EAST]],
+    )
+    assert lattice.unit_cell_vectors() == [[2.0, 0.0], [1.0, 1.5]]
+
+    analysis = pz.LatticeAnalysis(lattice)
+    stripes = numpy.array([i % 2 - 1 for i in range(4) for j in range(6)])
+    q, sq = analysis.structure_factor(stripes)
+    assert q.shape == (4, 6, 2)
+    assert numpy.isclose(sq[2, 0], 6.0)
+    assert numpy.isclose(sq.sum() - sq[2, 0], 0.0)
+    assert numpy.isclose(numpy.dot(q[2, 0], [2.0, 0.0]), -numpy.pi)
+    assert numpy.isclose(numpy.dot(q[2, 0], [1.0, 1.5]), 0.0)
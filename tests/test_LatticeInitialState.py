@@ -1,3 +1,4 @@
+import io
 import random
 
 import scm.pyzacros as pz
@@ -53,28 +54,32 @@ initial_state
   #   - H*  9
   #   - H2**  8
   seed_on_sites H2** 1 2
-  seed_on_sites H* 3
-  seed_on_sites H2** 4 9
+  seed_on_sites H2** 3 4
   seed_on_sites H* 5
-  seed_on_sites H* 6
-  seed_on_sites H2** 8 13
+  seed_on_sites H2** 6 11
+  seed_on_sites H* 7
+  seed_on_sites H* 8
+  seed_on_sites H* 9
   seed_on_sites H* 10
-  seed_on_sites H* 11
   seed_on_sites H* 12
-  seed_on_sites H* 14
-  seed_on_sites H* 15
-  seed_on_sites H2** 16 17
+  seed_on_sites H2** 13 14
+  seed_on_sites H* 16
+  seed_on_sites H* 17
   seed_on_sites H* 18
 end_initial_state\
 """
     assert output == expectedOutput
 
+    buffer = io.StringIO()
+    initialState.write_to(buffer)
+    assert buffer.getvalue() == expectedOutput
+
     initialState = pz.LatticeState(lattice, [s3])
     initialState.fill_sites_random(
         site_name=("fcc", "fcc", "fcc"), species=s3, coverage=0.1, neighboring=[[0, 1], [1, 2], [0, 2]]
     )
     initialState.fill_sites_random(site_name=("fcc", "fcc", "fcc"), species=s3, coverage=0.3)
-    initialState.fill_site((12, 13, 14), s3)
+    initialState.fill_site((14, 15, 16), s3)
     initialState.plot(pause=2, show_sites_ids=True, close=True)
 
     print(initialState)
@@ -86,9 +91,80 @@ initial_state
   # species CO3***
   # species_numbers
   #   - CO3***  9
-  seed_on_sites CO3*** 3 7 9
-  seed_on_sites CO3*** 5 11 17
-  seed_on_sites CO3*** 13 14 15
+  seed_on_sites CO3*** 1 7 13
+  seed_on_sites CO3*** 5 9 11
+  seed_on_sites CO3*** 15 16 17
+end_initial_state\
+"""
+    assert output == expectedOutput
+
+    fractions = initialState.coverage_fractions()
+    assert fractions == {"CO3***": 9 / 18}
+    assert not initialState.empty()
+    assert pz.LatticeState(lattice, [s3]).empty()
+
+    initialState = pz.LatticeState(lattice, [s1, s3])
+    coverages = initialState.fill_sites_random_mixture(
+        site_name="fcc", coverages={"H*": 0.3, s3: 0.5}, neighboring={s3: [[0, 1], [1, 2], [0, 2]]}, rng=7
+    )
+
+    print(initialState)
+
+    output = str(initialState)
+
+    expectedOutput = """\
+initial_state
+  # species H* CO3***
+  # species_numbers
+  #   - H*  3
+  #   - CO3***  6
+  seed_on_sites CO3*** 1 3 7
+  seed_on_sites CO3*** 5 9 11
+  seed_on_sites H* 13
+  seed_on_sites H* 15
+  seed_on_sites H* 17
 end_initial_state\
 """
     assert output == expectedOutput
+    assert coverages == {"H*": 3 / 9, "CO3***": 6 / 9}
+
+    # Site names given per species are expanded to the denticity of the species as well
+    dictState = pz.LatticeState(lattice, [s1, s3])
+    dictState.fill_sites_random_mixture(
+        site_name={"H*": "fcc", s3: "fcc"},
+        coverages={"H*": 0.3, s3: 0.5},
+        neighboring={s3: [[0, 1], [1, 2], [0, 2]]},
+        rng=7,
+    )
+    assert str(dictState) == expectedOutput
+
+    species_idx, entity_idx = initialState.to_arrays()
+    newState = pz.LatticeState.from_arrays(lattice, [s1, s3], species_idx, entity_idx)
+    assert str(newState) == expectedOutput
+    assert newState.fingerprint() == initialState.fingerprint()
+
+    newState.fill_site(1, s1)
+    assert newState.fingerprint() != initialState.fingerprint()
+    assert str(newState).count("seed_on_sites H*") == 4
+
+    species_idx[0] = 0  # H* on a site of a CO3*** entity
+    try:
+        pz.LatticeState.from_arrays(lattice, [s1, s3], species_idx, entity_idx)
+        assert False
+    except Exception as e:
+        assert "same species" in str(e)
+
+    extraState = pz.LatticeState(lattice, [s1])
+    extraState.fill_site(0, s1)
+    extraState.fill_site(2, pz.Species("O*"))
+    try:
+        extraState.to_arrays()
+        assert False
+    except Exception as e:
+        assert "not included in surface_species: O*" in str(e)
+
+    extraState = pz.LatticeState(lattice, [s3, s1])
+    extraState.fill_site(0, s1)
+    species_idx, entity_idx = extraState.to_arrays()
+    assert species_idx[0] == 1
+    assert pz.LatticeState.from_arrays(lattice, [s3, s1], species_idx, entity_idx).fingerprint() == extraState.fingerprint()
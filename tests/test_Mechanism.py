@@ -1,8 +1,10 @@
+import numpy
+
 import scm.pyzacros as pz
 import scm.pyzacros.utils
 
 
-def test_Mechanism():
+def test_Mechanism(tmp_path):
     print("---------------------------------------------------")
     print(">>> Testing Mechanism class")
     print("---------------------------------------------------")
@@ -78,3 +80,145 @@ end_reversible_step
 end_mechanism\
 """
     assert pz.utils.compare(output, expectedOutput, 1e-3)
+
+    compiled = myMechanism.compile()
+    print(compiled.labels)
+    assert [sp.symbol for sp in compiled.surface_species] == ["H*", "H2*", "*"]
+    assert compiled.site_types == ("f",)
+    assert compiled.site_offsets.tolist() == [0, 2, 4]
+    assert compiled.initial_species.tolist() == [0, 0, 1, 1]
+    assert compiled.final_species.tolist() == [1, 2, 1, 2]
+    assert compiled.initial_entity_number.tolist() == [0, 1, 0, 0]
+    assert compiled.neighbor_pairs.tolist() == [[0, 1], [0, 1]]
+    assert compiled.pre_expon.tolist() == [1e13, 1e13]
+    assert compiled.gas_stoichiometry.shape == (2, 0)
+    assert not compiled.pre_expon.flags.writeable
+
+    # The compiled view is cached until the mechanism changes
+    assert myMechanism.compile() is compiled
+    myMechanism[1].pre_expon = 2e13
+    assert myMechanism.compile() is not compiled
+    assert myMechanism.compile().pre_expon.tolist() == [1e13, 2e13]
+    del myMechanism[0]
+    assert len(myMechanism.compile()) == 1
+
+    # Replacing a reaction rebuilds the view, even if the new one has the same version as the old one
+    myMechanism.pop()
+    myMechanism.append(pz.ElementaryReaction(initial=[s1], final=[s0], pre_expon=3e13, label="H_removal"))
+    assert myMechanism.compile().labels == ("H_removal",)
+    assert myMechanism.compile().pre_expon.tolist() == [3e13]
+
+    # The same for the cached Zacros input
+    fingerprint = myMechanism.fingerprint()
+    myMechanism.pop()
+    removal = pz.ElementaryReaction(initial=[s1], final=[s0], pre_expon=4e13, label="H_removal")
+    myMechanism.append(removal)
+    assert myMechanism.fingerprint() != fingerprint
+    assert str(myMechanism) == str(pz.Mechanism([removal]))
+
+    CO_gas = pz.Species("CO", gas_energy=0.0)
+    CO_ads = pz.Species("CO*", 1)
+
+    adsorption = pz.ElementaryReaction(
+        initial=[s0, CO_gas], final=[CO_ads], reversible=True, pre_expon=1e7, pe_ratio=2.0, activation_energy=0.0
+    )
+    diffusion = pz.ElementaryReaction(
+        neighboring=[(0, 1)],
+        initial=[CO_ads, s0],
+        final=[s0, CO_ads],
+        reversible=False,
+        pre_expon=1e9,
+        activation_energy=0.4,
+    )
+
+    myMechanism = pz.Mechanism([adsorption, diffusion])
+    myClusterExpansion = pz.ClusterExpansion([pz.Cluster(species=[CO_ads], energy=-1.5)])
+
+    kT = 8.617333262e-5 * numpy.array([500.0, 600.0])
+    rates = myMechanism.rate_constants([500.0, 600.0], 2.0, {"CO": 0.5}, myClusterExpansion)
+    print(rates)
+    assert rates.shape == (2, 2, 2)
+    assert numpy.allclose(rates[:, 0, 0], 1e7)
+    assert numpy.allclose(rates[:, 0, 1], 5e6 * numpy.exp(-1.5 / kT))
+    assert numpy.allclose(rates[:, 1, 0], 1e9 * numpy.exp(-0.4 / kT))
+    assert numpy.allclose(rates[:, 1, 1], 0.0)
+
+    rates = myMechanism.rate_constants(500.0, molar_fraction={"CO": [0.0, 1.0]})
+    assert numpy.allclose(rates[:, 0, 0], [0.0, 1e7])
+    assert numpy.allclose(rates[:, 0, 1], 5e6)
+
+    # Label lookups
+    myMechanism.append(adsorption)
+    assert len(myMechanism) == 2
+    assert myMechanism.find_exact(adsorption.label()) is adsorption
+    assert myMechanism.find_exact("CO_adsorption") is None
+    assert myMechanism.find("CO*1", prefix=True) == [diffusion]
+    assert myMechanism.find("CO*", prefix=True) == [adsorption, diffusion]
+
+    myMechanism.insert(0, pz.ElementaryReaction(initial=[s0, CO_gas], final=[CO_ads], label="CO_adsorption"))
+    myMechanism.remove(adsorption)
+    assert [rxn.label() for rxn in myMechanism] == ["CO_adsorption", diffusion.label()]
+    assert myMechanism.find_exact(diffusion.label()) is diffusion
+    assert myMechanism.find_exact(adsorption.label()) is None
+
+    # Removing reactions updates the label index in place
+    myMechanism.insert(1, adsorption)
+    myMechanism.find("CO", prefix=True)
+    index = myMechanism._Mechanism__index
+    assert myMechanism.pop(0).label() == "CO_adsorption"
+    assert myMechanism._Mechanism__index is index
+    assert myMechanism.find_exact(diffusion.label()) is diffusion
+    assert myMechanism.find("CO*", prefix=True) == [adsorption, diffusion]
+    del myMechanism[0]
+    assert myMechanism._Mechanism__index is index
+    assert myMechanism.find_exact(diffusion.label()) is diffusion
+    assert myMechanism.find_exact(adsorption.label()) is None
+    assert myMechanism.find("CO*", prefix=True) == [diffusion]
+    myMechanism.insert(0, pz.ElementaryReaction(initial=[s0, CO_gas], final=[CO_ads], label="CO_adsorption"))
+
+    # Species lists are cached, but callers get their own copies
+    gas_species = myMechanism.gas_species()
+    gas_species.append(pz.Species("O2", gas_energy=0.0))
+    assert [sp.symbol for sp in myMechanism.gas_species()] == ["CO"]
+    assert [sp.symbol for sp in myMechanism.surface_species()] == ["*", "CO*"]
+
+    O2_gas = pz.Species("O2", gas_energy=0.0)
+    O_ads = pz.Species("O*", 1)
+    myMechanism.append(pz.ElementaryReaction(initial=[s0, s0, O2_gas], final=[O_ads, O_ads], neighboring=[(0, 1)]))
+    assert [sp.symbol for sp in myMechanism.gas_species()] == ["CO", "O2"]
+    assert [sp.symbol for sp in myMechanism.surface_species()] == ["*", "CO*", "O*"]
+
+    # Mechanisms loaded from Zacros input files are created in bulk
+    with open(tmp_path / "mechanism_input.dat", "w") as f:
+        myMechanism.write_to(f)
+
+    loaded = pz.Mechanism(
+        fileName=str(tmp_path / "mechanism_input.dat"),
+        gas_species=myMechanism.gas_species(),
+        surface_species=myMechanism.surface_species(),
+    )
+    assert str(loaded) == str(myMechanism)
+
+    # Scaled mechanisms share the reactions, and only change the written pre-exponential terms
+    scaled = myMechanism.scaled([1.0, 0.5, 1.0])
+    assert scaled[1] is myMechanism[1]
+    assert myMechanism[1].pre_expon == 1e9
+    assert scaled.pre_expon_factors() == [1.0, 0.5, 1.0]
+    assert "pre_expon  5.00000e+08" in str(scaled)
+    assert "pre_expon  5.00000e+08" not in str(myMechanism)
+    assert scaled.fingerprint() != myMechanism.fingerprint()
+    assert numpy.allclose(scaled.compile().pre_expon, [0.0, 5e8, 0.0])
+
+    with open(tmp_path / "mechanism_input.dat", "w") as f:
+        scaled.write_to(f)
+
+    loaded = pz.Mechanism(
+        fileName=str(tmp_path / "mechanism_input.dat"),
+        gas_species=myMechanism.gas_species(),
+        surface_species=myMechanism.surface_species(),
+    )
+    assert str(loaded) == str(scaled)
+    assert loaded[1].pre_expon == 5e8
+
+    # Factors are combined
+    assert myMechanism.scaled({diffusion.label(): 0.5}).scaled([1.0, 4.0, 1.0]).pre_expon_factors() == [1.0, 2.0, 1.0]
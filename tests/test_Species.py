@@ -29,3 +29,14 @@ def test_Species():
     output = str(myAdsorptionFreeSite)
     expectedOutput = "*"
     assert output == expectedOutput
+
+    # Species with the same parameters are interned
+    assert pz.Species("H2*", denticity=1) is myAdsorbedSpecies
+    assert pz.Species("H2*") is myAdsorbedSpecies
+    assert pz.Species("H2*", denticity=2) is not myAdsorbedSpecies
+
+    try:
+        myAdsorbedSpecies.denticity = 2
+        assert False
+    except Exception as e:
+        assert "immutable" in str(e)
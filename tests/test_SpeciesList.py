@@ -38,3 +38,18 @@ surf_specs_names         H2*       O2*
 surf_specs_dent            1         1\
 """
     assert pz.utils.compare(output, expectedOutput, 1e-3)
+
+    assert mySpeciesList.symbol_index("O2") == 3
+    assert mySpeciesList.symbol_index("CO") is None
+    mySpeciesList.insert(0, gs2)
+    assert mySpeciesList.symbol_index("O2") == 0
+
+    # Misses do not rebuild the index of an unchanged list
+    index = mySpeciesList._SpeciesList__index
+    assert mySpeciesList.symbol_index("CO") is None
+    assert mySpeciesList._SpeciesList__index is index
+    mySpeciesList[0] = pz.Species("CO", gas_energy=0.0)
+    assert mySpeciesList.symbol_index("CO") == 0
+    del mySpeciesList[0]
+    assert mySpeciesList.symbol_index("CO") is None
+    assert mySpeciesList.symbol_index("O2") == 3
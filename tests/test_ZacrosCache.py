@@ -0,0 +1,92 @@
+import os
+import time
+
+import scm.plams
+import scm.pyzacros as pz
+
+
+def test_ZacrosCache(test_folder, tmp_path):
+    print("---------------------------------------------------")
+    print(">>> Testing ZacrosCache class")
+    print("---------------------------------------------------")
+
+    scm.plams.init(folder=tmp_path / "test_ZacrosCache")
+
+    # Precalculated results from test_ZacrosResults
+    reference = scm.plams.load(test_folder / "test_ZacrosResults.data/plamsjob/plamsjob.dill")
+
+    cache = pz.ZacrosCache(tmp_path / "cache")
+    assert reference not in cache
+
+    cache.store(reference)
+    assert reference in cache
+    assert sorted(os.listdir(os.path.join(cache.path, reference.hash_input()))) == [
+        "general_output.txt",
+        "history_output.txt",
+        "lattice_output.txt",
+        "procstat_output.txt",
+        "restart.inf",
+        "specnum_output.txt",
+        "std.err",
+        "std.out",
+    ]
+
+    # A job with the same inputs is restored from the cache without running Zacros
+    job = pz.ZacrosJob(
+        settings=reference.settings.copy(),
+        lattice=reference.lattice,
+        mechanism=reference.mechanism,
+        cluster_expansion=reference.cluster_expansion,
+    )
+
+    pz.ZacrosJob.cache = cache
+    try:
+        results = job.run()
+    finally:
+        pz.ZacrosJob.cache = None
+
+    assert job.ok()
+    assert results.provided_quantities()["CO2"][0:5] == [0, 100, 202, 309, 398]
+
+    # A different random seed is a different calculation
+    job = pz.ZacrosJob(
+        settings=reference.settings.copy(),
+        lattice=reference.lattice,
+        mechanism=reference.mechanism,
+        cluster_expansion=reference.cluster_expansion,
+    )
+    job.settings.random_seed = 1
+    assert job not in cache
+
+    # Restarts from the same job are different calculations if their restart options differ
+    restarts = []
+    for max_time in [100.0, 500.0]:
+        restart = pz.ZacrosJob(
+            settings=reference.settings.copy(),
+            lattice=reference.lattice,
+            mechanism=reference.mechanism,
+            cluster_expansion=reference.cluster_expansion,
+            restart=reference,
+        )
+        restart.settings.restart.max_time = max_time
+        restarts.append(restart)
+    assert restarts[0].hash_input() != restarts[1].hash_input()
+    restarts[0].path = reference.path
+    cache.store(restarts[0])
+    assert restarts[0] in cache
+    assert restarts[1] not in cache
+
+    # Eviction by size and by age
+    cache.max_size = 1024
+    cache.evict()
+    assert reference not in cache
+
+    cache.max_size = None
+    cache.max_age = 3600
+    cache.store(reference)
+    entry = os.path.join(cache.path, reference.hash_input())
+    os.utime(entry, (time.time() - 7200, time.time() - 7200))
+    cache.evict()
+    assert reference not in cache
+
+    scm.plams.finish()
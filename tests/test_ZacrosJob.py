@@ -1,6 +1,11 @@
+import os
+import stat
+import time
+
 import scm.plams
 
 import scm.pyzacros as pz
+import scm.pyzacros.models
 import scm.pyzacros.utils
 
 
@@ -62,6 +67,48 @@ def test_ZacrosJob(test_folder, tmp_path):
         expectedOutput = inp.read()
     assert pz.utils.compare(output, expectedOutput, 1e-3)
 
+    # The input hash is built from the fingerprints of the components
+    myJob2 = pz.ZacrosJob(myLattice, myMechanism, myClusterExpansion, settings=sett.copy())
+    assert myJob2.hash_input() == myJob.hash_input()
+    myJob2.settings.random_seed = 11
+    assert myJob2.hash_input() != myJob.hash_input()
+    fingerprint = myMechanism.fingerprint()
+    reaction1.pre_expon = 3.0
+    assert myMechanism.fingerprint() != fingerprint
+    reaction1.pre_expon = 2.5
+    assert myMechanism.fingerprint() == fingerprint
+
+    # Identical input files are linked from the store in the working directory. They are written only once
+    written = []
+    write_to = pz.Lattice.write_to
+    pz.Lattice.write_to = lambda lattice, fileobj: written.append(lattice) or write_to(lattice, fileobj)
+    try:
+        for i, job in enumerate([myJob, myJob2]):
+            job.jobmanager = scm.plams.config.default_jobmanager
+            job.path = str(tmp_path / "test_ZacrosJob" / ("shared_inputs" + str(i)))
+            os.makedirs(job.path, exist_ok=True)
+            try:
+                job._get_ready()
+            except pz.ZacrosExecutableNotFoundError:
+                # The run script is written after the input files
+                pass
+    finally:
+        pz.Lattice.write_to = write_to
+    assert len(written) == 1
+    for name in ["lattice", "energetics", "mechanism"]:
+        path1 = os.path.join(myJob.path, pz.ZacrosJob._filenames[name])
+        path2 = os.path.join(myJob2.path, pz.ZacrosJob._filenames[name])
+        assert os.path.samefile(path1, path2)
+    # Stored files are named after the fingerprints, and no temporary files are left
+    store = os.path.join(scm.plams.config.default_jobmanager.workdir, pz.ZacrosJob._input_store)
+    components = {"lattice": myLattice, "energetics": myClusterExpansion, "mechanism": myMechanism}
+    expected = [c.fingerprint() + "_" + pz.ZacrosJob._filenames[name] for name, c in components.items()]
+    assert sorted(os.listdir(store)) == sorted(expected)
+    path1 = os.path.join(myJob.path, pz.ZacrosJob._filenames["simulation"])
+    path2 = os.path.join(myJob2.path, pz.ZacrosJob._filenames["simulation"])
+    assert not os.path.samefile(path1, path2)
+    assert pz.ZacrosJob.load_external(path=myJob.path).get_input() == myJob.get_input()
+
     try:
         myJob.run()
 
@@ -94,3 +141,71 @@ def test_ZacrosJob(test_folder, tmp_path):
     assert pz.utils.compare(output, expectedOutput, 1e-3)
 
     scm.plams.finish()
+
+
+def test_ZacrosJob_stop(test_folder, tmp_path):
+    print("---------------------------------------------------")
+    print(">>> Testing ZacrosJob.stop()")
+    print("---------------------------------------------------")
+
+    zgb = pz.models.ZiffGulariBarshad()
+
+    # Mock of Zacros which takes one second to finish
+    general_output = test_folder / "test_ZacrosResults.data/plamsjob/general_output.txt"
+    zacros = str(tmp_path / "zacros_slow.sh")
+    with open(zacros, "w") as out:
+        out.write("#!/bin/bash\n")
+        out.write('echo "Entry Nevents Time Temperature Energy CO* O* CO O2 CO2" > specnum_output.txt\n')
+        out.write("sleep 1.0\n")
+        out.write('cp "' + str(general_output) + '" general_output.txt\n')
+    os.chmod(zacros, os.stat(zacros).st_mode | stat.S_IEXEC)
+
+    def new_job(name, seed):
+        sett = pz.Settings()
+        sett.random_seed = seed
+        sett.temperature = 500.0
+        sett.pressure = 1.0
+        sett.species_numbers = ("time", 1.0)
+        sett.max_time = 20.0
+        sett.molar_fraction.CO = 0.42
+        sett.molar_fraction.O2 = 1.0 - sett.molar_fraction.CO
+
+        return pz.ZacrosJob(
+            settings=sett,
+            lattice=zgb.lattice,
+            mechanism=zgb.mechanism,
+            cluster_expansion=zgb.cluster_expansion,
+            name=name,
+        )
+
+    executable_path = pz.ZacrosJob._executable_path
+    pz.ZacrosJob._executable_path = zacros
+
+    # Jobs stopped while waiting for free cores are not executed
+    try:
+        scm.plams.init(folder=tmp_path / "test_ZacrosJob_stop")
+
+        jobrunner = pz.ZacrosJobRunner(ncores=1)
+
+        first = new_job("first", 953129)
+        first.run(jobrunner=jobrunner)
+        while first.path is None or not os.path.exists(os.path.join(first.path, pz.ZacrosJob._filenames["pid"])):
+            time.sleep(0.01)
+
+        queued = [new_job("queued1", 953131), new_job("queued2", 953133)]
+        for qjob in queued:
+            qjob.run(jobrunner=jobrunner)
+
+        time.sleep(0.3)
+        assert all(qjob.stop() for qjob in queued)
+
+        scm.plams.finish()
+
+    finally:
+        pz.ZacrosJob._executable_path = executable_path
+
+    assert first.ok() and not first.stopped()
+    assert not first.stop()
+    for qjob in queued:
+        assert qjob.ok() and qjob.stopped()
+        assert not os.path.exists(os.path.join(qjob.path, qjob.results._filenames["specnum"]))
@@ -0,0 +1,59 @@
+import os
+import stat
+import threading
+import time
+
+import scm.pyzacros as pz
+
+
+def test_ZacrosJobRunner(tmp_path):
+    print("---------------------------------------------------")
+    print(">>> Testing ZacrosJobRunner class")
+    print("---------------------------------------------------")
+
+    runner = pz.ZacrosJobRunner(ncores=4, affinity=True)
+    assert runner.parallel
+
+    def run(name, nproc):
+        workdir = str(tmp_path / name)
+        os.makedirs(workdir)
+        with open(os.path.join(workdir, "job.run"), "w") as run:
+            run.write("#!/bin/bash\n")
+            run.write("export OMP_NUM_THREADS=" + str(nproc) + "\n")
+            run.write("date +%s.%N; sleep 0.3; date +%s.%N\n")
+        runfile = os.path.join(workdir, "job.run")
+        os.chmod(runfile, os.stat(runfile).st_mode | stat.S_IEXEC)
+        assert runner.call("job.run", workdir, "job.out", "job.err", pz.Settings()) == 0
+
+    jobs = [("job" + str(i), nproc) for i, nproc in enumerate([2, 1, 3, 2, 4, 1])]
+    threads = [threading.Thread(target=run, args=job) for job in jobs]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # The cores in use never exceed the cores of the runner
+    intervals = []
+    for name, nproc in jobs:
+        with open(tmp_path / name / "job.out", "r") as inp:
+            start, end = [float(line) for line in inp]
+        intervals.append((start, end, nproc))
+
+    for start, end, nproc in intervals:
+        used = sum(n for s, e, n in intervals if s <= start < e)
+        assert used <= 4
+
+    # A small job arriving after a large waiting one does not take the cores reserved for it
+    jobs = [("fair0", 3), ("fair1", 4), ("fair2", 1)]
+    threads = [threading.Thread(target=run, args=job) for job in jobs]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.1)
+    for thread in threads:
+        thread.join()
+
+    starts = {}
+    for name, nproc in jobs:
+        with open(tmp_path / name / "job.out", "r") as inp:
+            starts[name] = float(inp.readline())
+    assert starts["fair0"] < starts["fair1"] <= starts["fair2"]
@@ -0,0 +1,75 @@
+import os
+
+import scm.plams
+import scm.pyzacros as pz
+
+
+def test_ZacrosMonitor(test_folder, tmp_path):
+    print("---------------------------------------------------")
+    print(">>> Testing ZacrosMonitor class")
+    print("---------------------------------------------------")
+
+    scm.plams.init(folder=tmp_path / "test_ZacrosMonitor")
+
+    # Precalculated results from test_ZacrosResults
+    job = scm.plams.load(test_folder / "test_ZacrosResults.data/plamsjob/plamsjob.dill")
+
+    contents = {}
+    for name in ["specnum", "procstat"]:
+        with open(os.path.join(job.path, job.results._filenames[name]), "r") as inp:
+            contents[name] = inp.read()
+
+    # The output files are written in pieces to simulate a running job
+    job.path = str(tmp_path / "running")
+    os.makedirs(job.path)
+
+    statuses = []
+    monitor = pz.ZacrosMonitor(job, callback=lambda status: statuses.append(dict(status)))
+    assert not monitor.poll()
+
+    for fraction in [0.25, 0.6, 1.0]:
+        for name, content in contents.items():
+            with open(os.path.join(job.path, job.results._filenames[name]), "w") as out:
+                out.write(content[: int(fraction * len(content))])
+        monitor.poll()
+
+    assert len(statuses) == 3
+    assert statuses[0]["time"] < statuses[1]["time"] < statuses[2]["time"]
+    assert "events_per_second" not in statuses[0]
+    assert "events_per_second" in statuses[2]
+
+    # The last status is the same as the complete results
+    provided_quantities = job.results.provided_quantities()
+    assert monitor.specnum == provided_quantities
+    assert statuses[2]["nevents"] == provided_quantities["Nevents"][-1]
+    assert abs(statuses[2]["progress"] - 1.0) < 1e-8
+    for name in ["CO*", "O*"]:
+        assert abs(statuses[2]["coverages"][name] - provided_quantities[name][-1] / 400) < 1e-8
+    assert statuses[2]["number_of_events"] == job.results.get_process_statistics()[-1]["number_of_events"]
+
+    # The thread stops by itself once the job is finished
+    monitor = pz.ZacrosMonitor(job, interval=0.1)
+    monitor.start()
+    monitor.join(timeout=10.0)
+    assert monitor.status["time"] == provided_quantities["Time"][-1]
+
+    # Saturated surface without changes in the gas species during the last 5 seconds
+    job.path = str(tmp_path / "poisoned")
+    os.makedirs(job.path)
+    with open(os.path.join(job.path, job.results._filenames["specnum"]), "w") as out:
+        out.write("Entry Nevents Time Temperature Energy CO* O* CO O2 CO2\n")
+        for i in range(10):
+            nco2 = min(i, 3)
+            row = (i + 1, 10 * i, float(i), 120 + 10 * nco2, 250, 0, 0, nco2)
+            out.write("%d %d %f 500.0 0.0 %d %d %d %d %d\n" % row)
+
+    monitor = pz.ZacrosMonitor(job, poisoning_window=5.0)
+    monitor.poll()
+    assert monitor.status["occupied_sites"] == 1.0
+    assert monitor.status["poisoned"]
+
+    monitor = pz.ZacrosMonitor(job, poisoning_window=7.0)
+    monitor.poll()
+    assert not monitor.status["poisoned"]
+
+    scm.plams.finish()
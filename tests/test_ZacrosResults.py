@@ -1,3 +1,5 @@
+import shutil
+
 import scm.plams
 import scm.pyzacros as pz
 
@@ -152,6 +154,43 @@ def test_ZacrosResults(test_folder, tmp_path):
 
     results.plot_lattice_states(lattice_states, pause=2, close=True)
 
+    # The energies of the cluster expansion are the ones reported by Zacros for the same times
+    evaluator = pz.ClusterExpansionEvaluator(job.cluster_expansion, job.lattice)
+    energies = evaluator.energy(lattice_states)
+    times = [ls.add_info["time"] for ls in lattice_states]
+    assert len(energies) == len(lattice_states)
+    for energy, time in zip(energies, times):
+        row = min(range(len(provided_quantities["Time"])), key=lambda i: abs(provided_quantities["Time"][i] - time))
+        assert abs(provided_quantities["Time"][row] - time) < 1e-8
+        assert abs(energy - provided_quantities["Energy"][row]) < 1e-6
+
+    site_occupancy = results.site_occupancy()
+    assert site_occupancy["surface_species"] == ["CO*", "O*"]
+    assert site_occupancy["occupancy"].shape == (400, 2)
+    assert abs(site_occupancy["time"] - 1.0) < 1e-8
+
+    # The time average of the coverages equals the average occupancy of the sites
+    times = [ls.add_info["time"] for ls in lattice_states]
+    for sname in ["CO*", "O*"]:
+        coverages = [ls.coverage_fractions()[sname] for ls in lattice_states]
+        average = sum(c * (t2 - t1) for c, t1, t2 in zip(coverages, times, times[1:])) / (times[-1] - times[0])
+        column = site_occupancy["surface_species"].index(sname)
+        assert abs(site_occupancy["occupancy"][:, column].mean() - average) < 1e-8
+
+    results.plot_site_occupancy("O*", pause=2, close=True)
+
+    # A truncated history file, e.g., while Zacros is running, stops at the last complete configuration
+    shutil.copytree(test_folder / "test_ZacrosResults.data", tmp_path / "truncated")
+    with open(tmp_path / "truncated/plamsjob/history_output.txt", "r+") as f:
+        content = f.read()
+        f.seek(0)
+        f.write(content[: content.rfind("configuration") + 200])
+        f.truncate()
+
+    truncated = scm.plams.load(tmp_path / "truncated/plamsjob/plamsjob.dill").results
+    nconfs = sum(1 for snapshot in truncated._snapshots())
+    assert nconfs == len(lattice_states) - 1
+
     results.plot_molecule_numbers(results.gas_species_names(), pause=2, close=True)
 
     process_statistics = results.get_process_statistics()
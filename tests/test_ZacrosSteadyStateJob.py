@@ -1,3 +1,5 @@
+import os
+import stat
 import numpy
 import multiprocessing
 import scm.plams
@@ -7,6 +9,54 @@ import scm.pyzacros.models
 import scm.pyzacros.utils
 
 
+def mock_zacros(test_folder, tmp_path, name, body, restart=False, terminated=True):
+    """
+    Writes a mock of Zacros for the ZGB model, which runs the shell commands ``body`` to write specnum_output.txt. The
+    variable ``seed`` holds the random seed of the job. For restarts, ``start`` holds the last entry of the previous
+    job, and ``body`` sets ``end``, the last entry written to restart.inf. If ``terminated`` is False, the output does
+    not report a normal termination, as for jobs stopped before reaching max_time.
+    """
+    general_output = test_folder / "test_ZacrosResults.data/plamsjob/general_output.txt"
+    header = 'echo "Entry Nevents Time Temperature Energy CO* O* CO O2 CO2" > specnum_output.txt'
+
+    zacros = str(tmp_path / name)
+    with open(zacros, "w") as out:
+        out.write("#!/bin/bash\n")
+        if terminated:
+            out.write('cp "' + str(general_output) + '" general_output.txt\n')
+        else:
+            out.write('grep -v "Normal termination" "' + str(general_output) + '" > general_output.txt\n')
+        out.write("seed=$(awk '/random_seed/{print $2}' simulation_input.dat)\n")
+        if restart:
+            out.write("if [ -f restart.inf ]; then start=$(tail -1 restart.inf); else start=0; " + header + "; fi\n")
+        else:
+            out.write(header + "\n")
+        out.write(body)
+        if restart:
+            out.write('printf "Version 300000\\n$end\\n" > restart.inf\n')
+    os.chmod(zacros, os.stat(zacros).st_mode | stat.S_IEXEC)
+
+    return zacros
+
+
+def reference_job(zgb, max_time):
+    """
+    Returns the reference ZacrosJob of the ZGB model used with the mocks of Zacros.
+    """
+    sett = pz.Settings()
+    sett.random_seed = 953129
+    sett.temperature = 500.0
+    sett.pressure = 1.0
+    sett.species_numbers = ("time", 1.0)
+    sett.max_time = max_time
+    sett.molar_fraction.CO = 0.42
+    sett.molar_fraction.O2 = 1.0 - sett.molar_fraction.CO
+
+    return pz.ZacrosJob(
+        settings=sett, lattice=zgb.lattice, mechanism=zgb.mechanism, cluster_expansion=zgb.cluster_expansion
+    )
+
+
 def test_ZacrosSteadyStateJob(test_folder, tmp_path):
     print("---------------------------------------------------")
     print(">>> Testing ZacrosSteadyStateJob class")
@@ -83,3 +133,270 @@ iter    TOF_CO2      error   max_time     conv?
 """
 
     assert pz.utils.compare(output, expectedOutput, rel_error=0.1)
+
+
+def test_ZacrosSteadyStateJob_online(test_folder, tmp_path):
+    print("---------------------------------------------------")
+    print(">>> Testing ZacrosSteadyStateJob class (online convergence check)")
+    print("---------------------------------------------------")
+
+    zgb = pz.models.ZiffGulariBarshad()
+
+    # Mock of Zacros which produces CO2 at a constant rate until it is stopped
+    body = "for i in $(seq 1 2000); do\n"
+    body += '    echo "$i $((10*i)) $i.0 500.0 0.0 0 0 -$((10*i)) -$((5*i)) $((10*i))" >> specnum_output.txt\n'
+    body += "    sleep 0.01\n"
+    body += "done\n"
+    zacros = mock_zacros(test_folder, tmp_path, "zacros_online.sh", body, terminated=False)
+
+    executable_path = pz.ZacrosJob._executable_path
+    pz.ZacrosJob._executable_path = zacros
+
+    try:
+        scm.plams.init(folder=tmp_path / "test_ZacrosSteadyStateJob_online")
+
+        parameters = pz.ZacrosSteadyStateJob.Parameters()
+        parameters.add("max_time", "restart.max_time", [2000.0, 4000.0])
+
+        job = reference_job(zgb, max_time=2000.0)
+
+        sett = pz.Settings()
+        sett.turnover_frequency.nbatch = 20
+        sett.turnover_frequency.online = True
+        sett.turnover_frequency.online_interval = 0.1
+
+        mjob = pz.ZacrosSteadyStateJob(settings=sett, reference=job, parameters=parameters)
+        results = mjob.run()
+
+        scm.plams.finish()
+
+    finally:
+        pz.ZacrosJob._executable_path = executable_path
+
+    assert mjob.ok()
+    assert len(mjob.children) == 1
+    assert mjob.children[0].stopped()
+    # Finished jobs have no pid file, and they cannot be stopped again
+    assert not os.path.exists(os.path.join(mjob.children[0].path, pz.ZacrosJob._filenames["pid"]))
+    assert not mjob.children[0].stop()
+    assert len(mjob.children[0].results.provided_quantities()["Time"]) < 2000
+    assert abs(results.history()[0]["turnover_frequency"]["CO2"] - 10.0 / 400) < 1e-8
+
+
+def test_ZacrosSteadyStateJob_online_replicas(test_folder, tmp_path):
+    print("---------------------------------------------------")
+    print(">>> Testing ZacrosSteadyStateJob class (online convergence check with replicas)")
+    print("---------------------------------------------------")
+
+    zgb = pz.models.ZiffGulariBarshad()
+
+    # The replica with an odd random seed is faster, so it has more points once stopped
+    body = "for i in $(seq 1 2000); do\n"
+    body += '    echo "$i $((10*i)) $i.0 500.0 0.0 0 0 -$((10*i)) -$((5*i)) $((10*i))" >> specnum_output.txt\n'
+    body += "    if [ $((seed % 2)) -eq 1 ]; then sleep 0.01; else sleep 0.03; fi\n"
+    body += "done\n"
+    zacros = mock_zacros(test_folder, tmp_path, "zacros_online_replicas.sh", body, terminated=False)
+
+    executable_path = pz.ZacrosJob._executable_path
+    pz.ZacrosJob._executable_path = zacros
+
+    try:
+        scm.plams.init(folder=tmp_path / "test_ZacrosSteadyStateJob_online_replicas")
+
+        parameters = pz.ZacrosSteadyStateJob.Parameters()
+        parameters.add("max_time", "restart.max_time", [2000.0, 4000.0])
+
+        job = reference_job(zgb, max_time=2000.0)
+
+        sett = pz.Settings()
+        sett.turnover_frequency.nbatch = 20
+        sett.turnover_frequency.nreplicas = 2
+        sett.turnover_frequency.online = True
+        sett.turnover_frequency.online_interval = 0.1
+
+        mjob = pz.ZacrosSteadyStateJob(settings=sett, reference=job, parameters=parameters)
+        results = mjob.run(jobrunner=pz.ZacrosJobRunner(ncores=2))
+
+        scm.plams.finish()
+
+    finally:
+        pz.ZacrosJob._executable_path = executable_path
+
+    assert mjob.ok()
+    assert len(mjob.children) == 2
+    assert all(child.stopped() for child in mjob.children)
+    npoints = [len(child.results.provided_quantities()["Time"]) for child in mjob.children]
+    assert npoints[0] > npoints[1]
+    # The TOF is evaluated on the points used by the online check, so its verdict is kept
+    assert mjob._online_npoints <= npoints[1]
+    assert all(results.history()[-1]["converged"].values())
+    TOF, error, ratio, conv = results.turnover_frequency(species_name="CO2")
+    assert conv
+    assert abs(TOF - 10.0 / 400) < 1e-8
+
+
+def test_ZacrosSteadyStateJob_poisoned(test_folder, tmp_path):
+    print("---------------------------------------------------")
+    print(">>> Testing ZacrosSteadyStateJob class (surface poisoned in the first iteration)")
+    print("---------------------------------------------------")
+
+    zgb = pz.models.ZiffGulariBarshad()
+
+    # Mock of Zacros whose surface is saturated with O*, and which stops producing CO2 after 30 seconds
+    body = "for i in $(seq 1 2000); do\n"
+    body += "    n=$((i < 30 ? i : 30))\n"
+    body += '    echo "$i $((10*i)) $i.0 500.0 0.0 0 2500 -$((10*n)) -$((5*n)) $((10*n))" >> specnum_output.txt\n'
+    body += "    sleep 0.01\n"
+    body += "done\n"
+    zacros = mock_zacros(test_folder, tmp_path, "zacros_poisoned.sh", body, terminated=False)
+
+    executable_path = pz.ZacrosJob._executable_path
+    pz.ZacrosJob._executable_path = zacros
+
+    try:
+        scm.plams.init(folder=tmp_path / "test_ZacrosSteadyStateJob_poisoned")
+
+        parameters = pz.ZacrosSteadyStateJob.Parameters()
+        parameters.add("max_time", "restart.max_time", [2000.0, 4000.0])
+
+        job = reference_job(zgb, max_time=2000.0)
+        job.settings.poisoning.window = 5.0
+        job.settings.poisoning.interval = 0.1
+
+        sett = pz.Settings()
+        sett.turnover_frequency.nbatch = 5
+
+        mjob = pz.ZacrosSteadyStateJob(settings=sett, reference=job, parameters=parameters)
+        results = mjob.run()
+
+        scm.plams.finish()
+
+    finally:
+        pz.ZacrosJob._executable_path = executable_path
+
+    # The replica of the first iteration is kept, so the TOF is estimated from its last points
+    assert mjob.ok()
+    assert len(mjob.children) == 1
+    assert mjob.children[0].stopped() and mjob.children[0].surface_poisoned()
+    assert len(results.history()) == 1
+    TOF, error, ratio, conv = results.turnover_frequency(species_name="CO2")
+    assert abs(TOF - results.history()[0]["turnover_frequency"]["CO2"]) < 1e-8
+
+
+def test_ZacrosSteadyStateJob_pipelined(test_folder, tmp_path):
+    print("---------------------------------------------------")
+    print(">>> Testing ZacrosSteadyStateJob class (pipelined replicas)")
+    print("---------------------------------------------------")
+
+    zgb = pz.models.ZiffGulariBarshad()
+
+    # Mock of Zacros which produces CO2 at a noisy constant rate. Each iteration adds 20 points, and the replica with
+    # an odd random seed is much slower than the other one
+    body = "if [ $((seed % 2)) -eq 1 ]; then sleep 1.0; else sleep 0.2; fi\n"
+    body += "end=$((start+20))\n"
+    body += "for i in $(seq $((start+1)) $end); do\n"
+    body += "    co2=$((10*i + (7919*i*i) % 20))\n"
+    body += '    echo "$i $((10*i)) $i.0 500.0 0.0 0 0 -$co2 -$((co2/2)) $co2" >> specnum_output.txt\n'
+    body += "done\n"
+    zacros = mock_zacros(test_folder, tmp_path, "zacros_pipelined.sh", body, restart=True)
+
+    executable_path = pz.ZacrosJob._executable_path
+    pz.ZacrosJob._executable_path = zacros
+
+    try:
+        scm.plams.init(folder=tmp_path / "test_ZacrosSteadyStateJob_pipelined")
+
+        parameters = pz.ZacrosSteadyStateJob.Parameters()
+        parameters.add("max_time", "restart.max_time", 20.0 * (numpy.arange(20) + 1))
+
+        job = reference_job(zgb, max_time=20.0)
+
+        sett = pz.Settings()
+        sett.turnover_frequency.nbatch = 5
+        sett.turnover_frequency.nreplicas = 2
+        sett.turnover_frequency.pipelined = True
+
+        mjob = pz.ZacrosSteadyStateJob(settings=sett, reference=job, parameters=parameters)
+        results = mjob.run(jobrunner=pz.ZacrosJobRunner(ncores=2))
+
+        scm.plams.finish()
+
+    finally:
+        pz.ZacrosJob._executable_path = executable_path
+
+    assert mjob.ok()
+    assert [step["max_time"] for step in results.history()] == [20.0, 40.0, 60.0, 80.0]
+    assert all(results.history()[-1]["converged"].values())
+    assert results.children_results(iteration=3, replica=1).job.name == "ss_iter003_rep001"
+
+    # The jobs beyond the last evaluated iteration are discarded, so the results only include the evaluated ones
+    assert results.niterations() == 4
+    assert len(results.children_results()) == 8
+    assert not any(child.job.stopped() for child in results.children_results())
+    for i in range(results.niterations()):
+        for j in range(results.nreplicas(i)):
+            assert results.children_results(i, j) in results.children_results()
+    assert len(results.provided_quantities()["Time"]) == 80
+
+    TOF, error, ratio, conv = results.turnover_frequency(species_name="CO2")
+    assert conv
+    assert abs(TOF - results.history()[-1]["turnover_frequency"]["CO2"]) < 1e-8
+
+
+def test_ZacrosSteadyStateJob_adaptive(test_folder, tmp_path):
+    print("---------------------------------------------------")
+    print(">>> Testing ZacrosSteadyStateJob class (adaptive number of replicas)")
+    print("---------------------------------------------------")
+
+    zgb = pz.models.ZiffGulariBarshad()
+
+    # Mock of Zacros whose TOF depends on the random seed
+    body = "end=$(awk '/max_time/{print int($2)}' simulation_input.dat)\n"
+    body += 'for arg in "$@"; do case $arg in --max_time=*) end=${arg#--max_time=}; end=${end%.*};; esac; done\n'
+    body += "for i in $(seq $((start+1)) $end); do\n"
+    body += "    co2=$(((8 + 2*(seed % 3))*i + (7919*i*i) % 20))\n"
+    body += '    echo "$i $((10*i)) $i.0 500.0 0.0 0 0 -$co2 -$((co2/2)) $co2" >> specnum_output.txt\n'
+    body += "done\n"
+    zacros = mock_zacros(test_folder, tmp_path, "zacros_adaptive.sh", body, restart=True)
+
+    executable_path = pz.ZacrosJob._executable_path
+    pz.ZacrosJob._executable_path = zacros
+
+    try:
+        scm.plams.init(folder=tmp_path / "test_ZacrosSteadyStateJob_adaptive")
+
+        parameters = pz.ZacrosSteadyStateJob.Parameters()
+        parameters.add("max_time", "restart.max_time", 20.0 * (numpy.arange(10) + 1))
+
+        job = reference_job(zgb, max_time=20.0)
+
+        sett = pz.Settings()
+        sett.turnover_frequency.nbatch = 5
+        sett.turnover_frequency.nreplicas = 2
+        sett.turnover_frequency.max_nreplicas = 4
+
+        mjob = pz.ZacrosSteadyStateJob(settings=sett, reference=job, parameters=parameters)
+        results = mjob.run()
+
+        scm.plams.finish()
+
+    finally:
+        pz.ZacrosJob._executable_path = executable_path
+
+    assert mjob.ok()
+    assert results.nreplicas() == 4
+    assert results.nreplicas(0) == 2
+    assert results.nreplicas(1) == 4
+    assert len(results.children_results(iteration=0)) == 2
+    assert len(results.children_results(iteration=1)) == 4
+    for i in range(results.niterations()):
+        for j in range(results.nreplicas(i)):
+            assert results.children_results(i, j).job.name == "ss_iter%03d_rep%03d" % (i, j)
+
+    # New replicas start from scratch and reach the same time as the restarted ones
+    restarted = results.children_results(iteration=1, replica=1)
+    added = results.children_results(iteration=1, replica=3)
+    assert restarted.job.restart is not None
+    assert added.job.restart is None
+    assert added.provided_quantities()["Time"] == restarted.provided_quantities()["Time"]
+    assert abs(results.turnover_frequency(species_name="CO2")[0] - 10.5 / 400) < 1e-3